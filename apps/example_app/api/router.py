@@ -2,19 +2,21 @@
 Example app API router providing content-specific ledger operations.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, Optional
 import uuid
 
 from core.shared_ledger.schemas.ledger import (
     LedgerEntryCreate,
     LedgerOperationResponse
 )
-from core.shared_ledger.api.router import router as core_ledger_router
+from core.shared_ledger.api.router import router as core_ledger_router, attach_write_token
 from core.shared_ledger.utils.ledger import process_ledger_operation, InsufficientCreditsError, DuplicateTransactionError
+from core.shared_ledger.utils.coalescer import LedgerWriteCoalescer
+from core.shared_ledger.utils.replicas import ReplicaRouter
 from ..operations import ExampleAppOperations, ExampleAppOperationType
-from .dependencies import get_db
+from .dependencies import get_db, get_write_coalescer, get_replica_router
 
 # Create app-specific router
 router = APIRouter(tags=["example_app"])
@@ -24,19 +26,30 @@ router.include_router(core_ledger_router, prefix="")
 
 async def create_entry(
     entry: LedgerEntryCreate,
-    db: AsyncSession
+    db: AsyncSession,
+    coalescer: Optional[LedgerWriteCoalescer] = None,
+    response: Optional[Response] = None,
+    replicas: Optional[ReplicaRouter] = None
 ) -> LedgerOperationResponse:
     """
     Create a ledger entry using example app operations.
+    Goes through the write coalescer when one is enabled, and returns the
+    write's LSN token in the response headers when replicas are used.
     """
     try:
-        return await process_ledger_operation(
-            db,
-            ExampleAppOperations,
-            entry
-        )
+        if coalescer is not None:
+            result = await coalescer.submit(ExampleAppOperations, entry)
+        else:
+            result = await process_ledger_operation(
+                db,
+                ExampleAppOperations,
+                entry
+            )
     except (ValueError, InsufficientCreditsError, DuplicateTransactionError) as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if response is not None:
+        await attach_write_token(response, db, replicas)
+    return result
 
 # App-specific endpoints
 @router.post(
@@ -47,7 +60,10 @@ async def create_entry(
 )
 async def daily_reward(
     owner_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    coalescer: Annotated[Optional[LedgerWriteCoalescer], Depends(get_write_coalescer)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
 ) -> LedgerOperationResponse:
     """
     Convenience endpoint for claiming daily reward.
@@ -59,7 +75,7 @@ async def daily_reward(
         nonce=f"daily_reward_{owner_id}_{uuid.uuid4()}"
     )
     
-    return await create_entry(entry, db)
+    return await create_entry(entry, db, coalescer, response, replicas)
 
 @router.post(
     "/signup",
@@ -69,7 +85,10 @@ async def daily_reward(
 )
 async def signup_credit(
     owner_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    coalescer: Annotated[Optional[LedgerWriteCoalescer], Depends(get_write_coalescer)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
 ) -> LedgerOperationResponse:
     """
     Convenience endpoint for signup credit.
@@ -81,7 +100,7 @@ async def signup_credit(
         nonce=f"signup_{owner_id}"
     )
     
-    return await create_entry(entry, db)
+    return await create_entry(entry, db, coalescer, response, replicas)
 
 @router.post(
     "/content",
@@ -91,7 +110,10 @@ async def signup_credit(
 )
 async def create_content(
     owner_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    coalescer: Annotated[Optional[LedgerWriteCoalescer], Depends(get_write_coalescer)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
 ) -> LedgerOperationResponse:
     """
     Convenience endpoint for content creation operation.
@@ -103,7 +125,7 @@ async def create_content(
         nonce=str(uuid.uuid4())
     )
     
-    return await create_entry(entry, db)
+    return await create_entry(entry, db, coalescer, response, replicas)
 
 @router.post(
     "/content/{content_id}/access",
@@ -114,7 +136,10 @@ async def create_content(
 async def access_content(
     content_id: str,
     owner_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    coalescer: Annotated[Optional[LedgerWriteCoalescer], Depends(get_write_coalescer)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
 ) -> LedgerOperationResponse:
     """
     Convenience endpoint for content access operation.
@@ -126,4 +151,4 @@ async def access_content(
         nonce=f"access_{content_id}_{owner_id}_{uuid.uuid4()}"
     )
     
-    return await create_entry(entry, db)
\ No newline at end of file
+    return await create_entry(entry, db, coalescer, response, replicas)
\ No newline at end of file
@@ -2,22 +2,115 @@
 Example app using the shared ledger system.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .api.router import router
-from .api.dependencies import get_db
+from .operations import ExampleAppOperations
+from .api.dependencies import (
+    get_db,
+    get_write_coalescer,
+    get_replica_router,
+    engine,
+    replica_router,
+    settings,
+    write_coalescer,
+    balance_checkpointer,
+    usage_rollup_updater,
+    partition_maintainer,
+    price_reloader,
+    replica_engines,
+    AsyncSessionLocal,
+    APP_PARTITIONS,
+    LISTEN_FOR_BALANCE_CHANGES
+)
+from core.shared_ledger.database import warm_up_engine
+from core.shared_ledger.utils.cache import BalanceCacheListener
+from core.shared_ledger.utils.partitions import ensure_ledger_partitions
+from core.shared_ledger.utils.prices import reload_operation_prices
+from core.shared_ledger.utils.sqlite import create_sqlite_schema
 from core.shared_ledger.api.router import router as ledger_router
+from core.shared_ledger.api.metrics import router as metrics_router, track_request_latency
+from core.shared_ledger.api.profiling import QueryProfilingMiddleware
+from core.shared_ledger.utils.metrics import register_pool_metrics, register_replica_metrics
+from core.shared_ledger.utils.profiling import install_query_profiler
 from core.shared_ledger.api.router import get_db as core_get_db
+from core.shared_ledger.api.router import get_write_coalescer as core_get_write_coalescer
+from core.shared_ledger.api.router import get_replica_router as core_get_replica_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare ledger partitions and prices, start background jobs, and flush coalesced writes on shutdown."""
+    embedded = engine.dialect.name == "sqlite"
+    async with engine.begin() as conn:
+        if embedded:
+            await create_sqlite_schema(conn)
+        else:
+            await ensure_ledger_partitions(conn, app_ids=APP_PARTITIONS)
+    # Load prices and compile the operation table, failing fast if it is invalid
+    async with AsyncSessionLocal() as session:
+        await reload_operation_prices(session)
+    ExampleAppOperations.operation_table()
+    # Open pool connections and prepare the hot statements before serving
+    await warm_up_engine(engine, settings.DB_WARMUP_CONNECTIONS)
+    # SQLite has no LISTEN/NOTIFY; serve each database file from a single worker
+    balance_listener = BalanceCacheListener(engine) if LISTEN_FOR_BALANCE_CHANGES and not embedded else None
+    if balance_listener is not None:
+        await balance_listener.start()
+    if balance_checkpointer is not None:
+        balance_checkpointer.start()
+    if usage_rollup_updater is not None:
+        usage_rollup_updater.start()
+    if partition_maintainer is not None:
+        partition_maintainer.start()
+    if price_reloader is not None:
+        price_reloader.start()
+    yield
+    if partition_maintainer is not None:
+        await partition_maintainer.stop()
+    if price_reloader is not None:
+        await price_reloader.stop()
+    if usage_rollup_updater is not None:
+        await usage_rollup_updater.stop()
+    if balance_checkpointer is not None:
+        await balance_checkpointer.stop()
+    if write_coalescer is not None:
+        await write_coalescer.close()
+    if balance_listener is not None:
+        await balance_listener.stop()
 
 app = FastAPI(
     title="Example Ledger App",
     description="Example application using the shared ledger system",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Override core dependencies
 app.dependency_overrides[core_get_db] = get_db
+app.dependency_overrides[core_get_write_coalescer] = get_write_coalescer
+app.dependency_overrides[core_get_replica_router] = get_replica_router
+
+# Report request latency, connection pool usage, and read routing on /metrics
+app.middleware("http")(track_request_latency)
+register_pool_metrics(engine)
+for index, replica_engine in enumerate(replica_engines):
+    register_pool_metrics(replica_engine, pool=f"replica_{index}")
+if replica_router is not None:
+    register_replica_metrics(replica_router)
+
+# Profile the SQL of sampled requests, logging those over budget
+if settings.QUERY_PROFILE_SAMPLE_RATE > 0:
+    for profiled_engine in (engine, *replica_engines):
+        install_query_profiler(profiled_engine)
+    app.middleware("http")(QueryProfilingMiddleware(
+        sample_rate=settings.QUERY_PROFILE_SAMPLE_RATE,
+        debug_headers=settings.QUERY_PROFILE_HEADERS,
+        max_queries=settings.QUERY_BUDGET_COUNT,
+        max_seconds=settings.QUERY_BUDGET_MS / 1000 if settings.QUERY_BUDGET_MS is not None else None
+    ))
 
 # Add CORS middleware
 app.add_middleware(
@@ -31,6 +124,7 @@ app.add_middleware(
 # Include routers
 app.include_router(router)
 app.include_router(ledger_router)
+app.include_router(metrics_router)
 
 # Health check endpoint
 @app.get("/health")
@@ -2,6 +2,7 @@
 Example app-specific ledger operations.
 """
 
+from datetime import timedelta
 from enum import Enum
 from typing import Dict, Literal
 
@@ -40,6 +41,11 @@ class ExampleAppOperations(BaseLedgerOperations):
     Extends base operations with content-specific operations and their credit values.
     """
     
+    # Answer client retries with the original result for a day
+    RESPONSE_RETENTION = timedelta(days=1)
+    
+    APP_ID = "example_app"
+    
     # App-specific operation configuration
     APP_CONFIG: Dict[ExampleAppOperationLiteral, int] = {
         # Content operations with their credit costs
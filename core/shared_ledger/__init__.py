@@ -8,18 +8,42 @@ that can be used across multiple applications.
 __version__ = "0.1.0"
 
 from .models.base import Base
-from .models.ledger import LedgerEntry
+from .models.ledger import LedgerEntry, LedgerNonce, LedgerResponse
+from .models.balance import OwnerBalance, BalanceCheckpoint
+from .models.operation import OperationPrice
+from .models.archive import LedgerArchiveSummary
+from .models.rollup import LedgerUsageHourly, LedgerUsageDaily, LedgerRollupWatermark
 from .operations.base import BaseLedgerOperations, LedgerOperationType
 from .schemas.ledger import LedgerEntryCreate, LedgerBalance
-from .utils.ledger import get_balance, process_ledger_operation
+from .utils.ledger import (
+    LedgerStore,
+    get_balance,
+    get_balances,
+    process_ledger_operation,
+    process_ledger_operations_batch
+)
+from .utils.memory import MemoryLedger
 
 __all__ = [
     "Base",
     "LedgerEntry",
+    "LedgerNonce",
+    "LedgerResponse",
+    "OwnerBalance",
+    "BalanceCheckpoint",
+    "OperationPrice",
+    "LedgerArchiveSummary",
+    "LedgerUsageHourly",
+    "LedgerUsageDaily",
+    "LedgerRollupWatermark",
     "BaseLedgerOperations",
     "LedgerOperationType",
     "LedgerEntryCreate",
     "LedgerBalance",
+    "LedgerStore",
+    "MemoryLedger",
     "get_balance",
+    "get_balances",
     "process_ledger_operation",
+    "process_ledger_operations_batch",
 ]
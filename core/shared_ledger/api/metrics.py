@@ -0,0 +1,54 @@
+"""
+Prometheus metrics endpoint and request latency tracking.
+"""
+
+import time
+from typing import Awaitable, Callable
+
+from fastapi import APIRouter, Request, Response
+
+from ..utils.metrics import CONTENT_TYPE, metrics_registry, request_duration_seconds
+
+router = APIRouter(tags=["metrics"])
+
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+    summary="Prometheus metrics"
+)
+async def metrics_handler() -> Response:
+    """
+    Expose the ledger metrics of this worker in the Prometheus text format.
+
+    Values are per process; scrape each worker separately, see utils.metrics.
+
+    Returns:
+        Response: The current values of all registered metrics
+    """
+    return Response(metrics_registry.render(), media_type=CONTENT_TYPE)
+
+async def track_request_latency(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    HTTP middleware observing each request's latency by route template.
+
+    Register with ``app.middleware("http")(track_request_latency)``. Requests
+    that match no route are grouped under "unmatched" so arbitrary paths
+    cannot create new series.
+    """
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        request_duration_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
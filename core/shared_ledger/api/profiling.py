@@ -0,0 +1,78 @@
+"""
+Middleware profiling the SQL statements each request issues.
+"""
+
+import logging
+import random
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request, Response
+
+from ..utils.profiling import profile_queries
+
+logger = logging.getLogger(__name__)
+
+# Debug headers carrying a request's query count and database time
+QUERY_COUNT_HEADER = "X-Ledger-Query-Count"
+SERVER_TIMING_HEADER = "Server-Timing"
+
+
+class QueryProfilingMiddleware:
+    """
+    HTTP middleware recording the statements of a sample of requests.
+
+    Register with ``app.middleware("http")(QueryProfilingMiddleware(...))``
+    after calling install_query_profiler on the app's engines. Sampled
+    requests over the query-count or duration budget are logged with their
+    slowest statements. Statements issued while a streaming response is
+    being sent are not included.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        debug_headers: bool = False,
+        max_queries: Optional[int] = None,
+        max_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Args:
+            sample_rate: Share of requests profiled, from 0 to 1
+            debug_headers: Whether to add the query count and database
+                           time to profiled responses
+            max_queries: Statements a request may issue before it is logged
+            max_seconds: Database time a request may use before it is logged
+        """
+        self.sample_rate = sample_rate
+        self.debug_headers = debug_headers
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+
+    async def __call__(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return await call_next(request)
+
+        with profile_queries() as profile:
+            response = await call_next(request)
+
+        if self.debug_headers:
+            response.headers[QUERY_COUNT_HEADER] = str(profile.count)
+            response.headers.append(SERVER_TIMING_HEADER, f"db;dur={profile.total_seconds * 1000:.2f}")
+
+        over_count = self.max_queries is not None and profile.count > self.max_queries
+        over_time = self.max_seconds is not None and profile.total_seconds > self.max_seconds
+        if over_count or over_time:
+            route = request.scope.get("route")
+            logger.warning(
+                "%s %s issued %d queries taking %.1f ms, over budget:\n%s",
+                request.method,
+                getattr(route, "path", request.url.path),
+                profile.count,
+                profile.total_seconds * 1000,
+                profile.describe()
+            )
+        return response
@@ -2,22 +2,40 @@
 Core ledger API router providing basic ledger functionality.
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Annotated
+from typing import Annotated, AsyncGenerator, Literal, Optional
 
 from ..schemas.ledger import (
     LedgerEntryCreate,
     LedgerEntryResponse,
+    LedgerEntryPage,
     LedgerBalance,
-    LedgerOperationResponse
+    LedgerBalances,
+    LedgerBalancesRequest,
+    LedgerOperationResponse,
+    LedgerBatchCreate,
+    LedgerBatchItemResult,
+    LedgerBatchResponse,
+    LedgerUsageStats
 )
 from ..utils.ledger import (
+    get_app_balance,
     get_balance,
+    get_balances,
+    list_entries,
     process_ledger_operation,
+    process_ledger_operations_batch,
     InsufficientCreditsError,
     DuplicateTransactionError
 )
+from ..utils.coalescer import LedgerWriteCoalescer
+from ..utils.dialect import as_utc
+from ..utils.export import EXPORT_MEDIA_TYPES, export_entries
+from ..utils.replicas import LSN_HEADER, ReplicaRouter
+from ..utils.rollups import STATS_DEFAULT_WINDOWS, Granularity, get_usage_stats
 from ..operations.base import BaseLedgerOperations
 
 router = APIRouter(prefix="/ledger", tags=["ledger"])
@@ -26,15 +44,56 @@ router = APIRouter(prefix="/ledger", tags=["ledger"])
 async def get_db() -> AsyncSession:
     raise NotImplementedError("Database dependency must be overridden by the app")
 
+# Apps that coalesce concurrent writes override this to return their coalescer
+async def get_write_coalescer() -> Optional[LedgerWriteCoalescer]:
+    return None
+
+# Apps with read replicas override this to return their replica router
+async def get_replica_router() -> Optional[ReplicaRouter]:
+    return None
+
+async def get_read_db(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)],
+    lsn: Annotated[Optional[str], Header(alias=LSN_HEADER, description="Token from an earlier write that the read must observe")] = None
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only handlers.
+    
+    A replica session when the app has replicas, waiting for the write
+    identified by the LSN header, otherwise the request's primary session.
+    """
+    if replicas is None:
+        yield db
+        return
+    try:
+        session = await replicas.read_session(lsn)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def attach_write_token(
+    response: Response,
+    db: AsyncSession,
+    replicas: Optional[ReplicaRouter]
+) -> None:
+    """Return the LSN token of a committed write so follow-up reads can observe it."""
+    if replicas is not None:
+        response.headers[LSN_HEADER] = await replicas.write_token(db)
+
 @router.get(
     "/{owner_id}/balance",
     response_model=LedgerBalance,
     summary="Get owner balance",
-    description="Get the current balance for an owner."
+    description="Get the current balance for an owner, or the part of it from one app's entries."
 )
 async def get_owner_balance_handler(
     owner_id: str,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    app_id: Annotated[Optional[str], Query(description="Only count entries written by this app")] = None
 ) -> LedgerBalance:
     """
     Get the current balance for an owner.
@@ -42,12 +101,164 @@ async def get_owner_balance_handler(
     Args:
         owner_id: The unique identifier of the owner
         db: The database session
+        app_id: Sum only the entries written by this app
         
     Returns:
         LedgerBalance: The current balance and last update time
     """
+    if app_id is not None:
+        return await get_app_balance(db, owner_id, app_id)
     return await get_balance(db, owner_id)
 
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export entries",
+    description="Stream ledger entries as NDJSON or CSV."
+)
+async def export_entries_handler(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    owner_id: Optional[str] = None,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None
+) -> StreamingResponse:
+    """
+    Stream ledger entries for audits.
+    
+    Rows are read through a server-side cursor, or from the app's LedgerStore,
+    and written out chunk by chunk, so memory use stays flat regardless of
+    how many entries match.
+    
+    Args:
+        db: The database session
+        format: Output format, ndjson or csv
+        owner_id: Only export entries of this owner
+        operation: Only export entries of this operation
+        since: Only export entries created at or after this time
+        until: Only export entries created before this time
+        app_id: Only export entries written by this app
+        
+    Returns:
+        StreamingResponse: The matching entries in id order
+    """
+    return StreamingResponse(
+        export_entries(db, format, owner_id, operation, since, until, app_id),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="ledger_entries.{format}"'}
+    )
+
+@router.get(
+    "/stats",
+    response_model=LedgerUsageStats,
+    summary="Get usage statistics",
+    description="Get entry counts and amount totals per app and operation in hourly or daily buckets."
+)
+async def get_usage_stats_handler(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    granularity: Granularity = "day",
+    since: Annotated[Optional[datetime], Query(description="Start of the first bucket; defaults to a day of hours or 30 days")] = None,
+    until: Annotated[Optional[datetime], Query(description="Buckets start before this time; defaults to now")] = None,
+    app_id: Optional[str] = None,
+    operation: Optional[str] = None
+) -> LedgerUsageStats:
+    """
+    Get usage time series from the rollup tables.
+    
+    The rollups are maintained by a background job, so the latest entries
+    appear only after their balance checkpoint and the next job run. A
+    LedgerStore serves its own statistics.
+    
+    Args:
+        db: The database session
+        granularity: Bucket size, hour or day
+        since: Only include buckets starting at or after this time
+        until: Only include buckets starting before this time
+        app_id: Only include this app
+        operation: Only include this operation
+        
+    Returns:
+        LedgerUsageStats: A series of buckets per app and operation
+        
+    Raises:
+        HTTPException: If the range is empty
+    """
+    # Times without a zone are taken as UTC
+    until = as_utc(until) if until is not None else datetime.now(timezone.utc)
+    since = as_utc(since) if since is not None else until - STATS_DEFAULT_WINDOWS[granularity]
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    series = await get_usage_stats(db, granularity, since, until, app_id=app_id, operation=operation)
+    return LedgerUsageStats(granularity=granularity, since=since, until=until, series=series)
+
+@router.get(
+    "/{owner_id}/entries",
+    response_model=LedgerEntryPage,
+    summary="List owner entries",
+    description="List an owner's ledger entries, newest first, one page at a time."
+)
+async def list_owner_entries_handler(
+    owner_id: str,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    cursor: Annotated[Optional[int], Query(description="Cursor from the previous page")] = None,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None
+) -> LedgerEntryPage:
+    """
+    List an owner's ledger entries using cursor-based pagination.
+    
+    Args:
+        owner_id: The unique identifier of the owner
+        db: The database session
+        cursor: The next_cursor of the previous page, omitted for the first page
+        limit: Maximum number of entries per page
+        operation: Only list entries of this operation
+        since: Only list entries created at or after this time
+        until: Only list entries created before this time
+        app_id: Only list entries written by this app
+        
+    Returns:
+        LedgerEntryPage: The entries and the cursor of the next page
+    """
+    entries, next_cursor = await list_entries(
+        db,
+        owner_id,
+        cursor=cursor,
+        limit=limit,
+        operation=operation,
+        since=since,
+        until=until,
+        app_id=app_id
+    )
+    return LedgerEntryPage(entries=entries, next_cursor=next_cursor)
+
+@router.post(
+    "/balances",
+    response_model=LedgerBalances,
+    summary="Get balances of many owners",
+    description="Get the current balances for a list of owners in one request."
+)
+async def get_owner_balances_handler(
+    request: LedgerBalancesRequest,
+    db: Annotated[AsyncSession, Depends(get_read_db)]
+) -> LedgerBalances:
+    """
+    Get the current balances for many owners.
+    
+    Args:
+        request: The owner IDs to look up
+        db: The database session
+        
+    Returns:
+        LedgerBalances: Balance of each requested owner, zero for unknown owners
+    """
+    return LedgerBalances(balances=await get_balances(db, request.owner_ids))
+
 @router.post(
     "/entry",
     response_model=LedgerOperationResponse,
@@ -56,7 +267,10 @@ async def get_owner_balance_handler(
 )
 async def create_ledger_entry_handler(
     entry: LedgerEntryCreate,
-    db: Annotated[AsyncSession, Depends(get_db)]
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    coalescer: Annotated[Optional[LedgerWriteCoalescer], Depends(get_write_coalescer)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
 ) -> LedgerOperationResponse:
     """
     Create a new ledger entry.
@@ -66,7 +280,10 @@ async def create_ledger_entry_handler(
     
     Args:
         entry: The ledger entry to create
+        response: The response, given the LSN header when replicas are used
         db: The database session
+        coalescer: Optional coalescer that commits concurrent entries together
+        replicas: Optional replica router serving follow-up reads
         
     Returns:
         LedgerOperationResponse: The created ledger entry
@@ -75,10 +292,60 @@ async def create_ledger_entry_handler(
         HTTPException: If the operation is invalid, insufficient credits, or duplicate transaction
     """
     try:
-        return await process_ledger_operation(
-            db,
-            BaseLedgerOperations,
-            entry
-        )
+        if coalescer is not None:
+            result = await coalescer.submit(BaseLedgerOperations, entry)
+        else:
+            result = await process_ledger_operation(
+                db,
+                BaseLedgerOperations,
+                entry
+            )
     except (ValueError, InsufficientCreditsError, DuplicateTransactionError) as e:
-        raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+    await attach_write_token(response, db, replicas)
+    return result
+
+@router.post(
+    "/entries/batch",
+    response_model=LedgerBatchResponse,
+    summary="Create ledger entries in batch",
+    description="Create several ledger entries in one transaction, with a result for each entry."
+)
+async def create_ledger_entries_batch_handler(
+    batch: LedgerBatchCreate,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    replicas: Annotated[Optional[ReplicaRouter], Depends(get_replica_router)]
+) -> LedgerBatchResponse:
+    """
+    Create several ledger entries in one request.
+    
+    In atomic mode nothing is written unless every entry succeeds. Otherwise
+    valid entries are written and each failed entry carries its error.
+    
+    Args:
+        batch: The entries to create and the batch mode
+        response: The response, given the LSN header when replicas are used
+        db: The database session
+        replicas: Optional replica router serving follow-up reads
+        
+    Returns:
+        LedgerBatchResponse: Whether the batch was committed and the result of each entry
+    """
+    results = await process_ledger_operations_batch(
+        db,
+        BaseLedgerOperations,
+        batch.entries,
+        atomic=batch.atomic
+    )
+    await attach_write_token(response, db, replicas)
+    
+    return LedgerBatchResponse(
+        committed=results.committed,
+        results=[
+            LedgerBatchItemResult(index=index, error=str(result))
+            if isinstance(result, Exception)
+            else LedgerBatchItemResult(index=index, entry=result.entry, balance=result.balance)
+            for index, result in enumerate(results)
+        ]
+    )
@@ -0,0 +1,259 @@
+"""
+Command line tools for operating the shared ledger.
+
+Usage:
+    python -m core.shared_ledger.cli export --format csv --owner-id alice > alice.csv
+    python -m core.shared_ledger.cli partitions ensure --months-ahead 3
+    python -m core.shared_ledger.cli partitions detach --before 2025-01-01
+    python -m core.shared_ledger.cli checkpoints advance
+    python -m core.shared_ledger.cli responses purge
+    python -m core.shared_ledger.cli rollups advance
+    python -m core.shared_ledger.cli archive run --directory /var/lib/ledger/archive --before 2025-01-01
+    python -m core.shared_ledger.cli archive history --directory /var/lib/ledger/archive --owner-id alice
+    python -m core.shared_ledger.cli archive summarize --directory /var/lib/ledger/archive
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from .utils.archive import ARCHIVE_SEGMENT_SIZE, LedgerArchive, archive_ledger_entries, rebuild_archive_summaries
+from .utils.checkpoints import CHECKPOINT_CHUNK_SIZE, advance_balance_checkpoints
+from .utils.export import export_entries
+from .utils.idempotency import RESPONSE_PURGE_CHUNK_SIZE, purge_expired_responses
+from .utils.partitions import (
+    ARCHIVE_SCHEMA,
+    PARTITION_MONTHS_AHEAD,
+    detach_ledger_partitions,
+    ensure_ledger_partitions
+)
+from .utils.rollups import ROLLUP_CHUNK_SIZE, advance_usage_rollups
+
+
+async def run_export(args: argparse.Namespace) -> None:
+    """Stream matching entries to the output file or stdout."""
+    engine = create_async_engine(args.database_url)
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            async for chunk in export_entries(
+                session,
+                args.format,
+                owner_id=args.owner_id,
+                operation=args.operation,
+                since=args.since,
+                until=args.until,
+                app_id=args.app_id
+            ):
+                output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        await engine.dispose()
+
+
+async def run_partitions_ensure(args: argparse.Namespace) -> None:
+    """Create the partitions of the current month and the months ahead."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with engine.begin() as conn:
+            created = await ensure_ledger_partitions(conn, months_ahead=args.months_ahead, app_ids=args.app_id)
+    finally:
+        await engine.dispose()
+    for name in created:
+        print(f"created {name}")
+
+
+async def run_partitions_detach(args: argparse.Namespace) -> None:
+    """Detach the partitions of months ending before the cutoff."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with engine.begin() as conn:
+            detached = await detach_ledger_partitions(conn, args.before, archive_schema=args.archive_schema)
+    finally:
+        await engine.dispose()
+    for name in detached:
+        print(f"detached {name} into {args.archive_schema}")
+
+
+async def run_checkpoints_advance(args: argparse.Namespace) -> None:
+    """Advance balance checkpoints and report drift."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            report = await advance_balance_checkpoints(session, chunk_size=args.chunk_size)
+    finally:
+        await engine.dispose()
+    print(f"advanced {report.owners} owners over {report.entries} entries")
+    for owner_id, (materialized, ledger) in sorted(report.drift.items()):
+        print(f"drift {owner_id}: materialized {materialized}, ledger {ledger}")
+    if report.drift:
+        raise SystemExit(1)
+
+
+async def run_responses_purge(args: argparse.Namespace) -> None:
+    """Delete stored results past their retention window."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            purged = await purge_expired_responses(session, chunk_size=args.chunk_size)
+    finally:
+        await engine.dispose()
+    print(f"purged {purged} expired responses")
+
+
+async def run_rollups_advance(args: argparse.Namespace) -> None:
+    """Count checkpointed entries into the usage rollups."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            report = await advance_usage_rollups(session, chunk_size=args.chunk_size)
+    finally:
+        await engine.dispose()
+    print(f"rolled up {report.entries} entries of {report.owners} owners")
+
+
+async def run_archive(args: argparse.Namespace) -> None:
+    """Move checkpointed entries created before the cutoff into segment files."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            written = await archive_ledger_entries(session, args.directory, args.before, segment_size=args.segment_size)
+    finally:
+        await engine.dispose()
+    for path in written:
+        print(f"archived {path}")
+
+
+async def run_archive_history(args: argparse.Namespace) -> None:
+    """Print an owner's archived entries as tab-separated lines."""
+    with LedgerArchive(args.directory) as archive:
+        for entry in archive.history(args.owner_id, since=args.since, until=args.until):
+            print(f"{entry.id}\t{entry.created_at.isoformat()}\t{entry.operation}\t{entry.amount}\t{entry.nonce}")
+
+
+async def run_archive_summarize(args: argparse.Namespace) -> None:
+    """Recompute the per-owner and per-app summaries of every segment."""
+    engine = create_async_engine(args.database_url)
+    try:
+        async with async_sessionmaker(engine, class_=AsyncSession)() as session:
+            segments = await rebuild_archive_summaries(session, args.directory)
+    finally:
+        await engine.dispose()
+    print(f"summarized {segments} segments")
+
+
+async def run_archive_verify(args: argparse.Namespace) -> None:
+    """Check every segment's owner totals against its records."""
+    with LedgerArchive(args.directory) as archive:
+        mismatches = archive.verify()
+        print(f"verified {len(archive.segments)} segments")
+    for segment, owners in sorted(mismatches.items()):
+        for owner_id, (recorded, actual) in sorted(owners.items()):
+            print(f"mismatch {segment} {owner_id}: recorded {recorded}, records {actual}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core.shared_ledger.cli", description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Async SQLAlchemy database URL (default: $DATABASE_URL)"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Stream ledger entries as NDJSON or CSV")
+    export.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export.add_argument("--owner-id")
+    export.add_argument("--app-id")
+    export.add_argument("--operation")
+    export.add_argument("--since", type=datetime.fromisoformat, help="ISO timestamp, inclusive")
+    export.add_argument("--until", type=datetime.fromisoformat, help="ISO timestamp, exclusive")
+    export.add_argument("--output", help="File to write instead of stdout")
+    export.set_defaults(handler=run_export)
+
+    partitions = commands.add_parser("partitions", help="Maintain the monthly ledger partitions")
+    partition_commands = partitions.add_subparsers(dest="partition_command", required=True)
+    ensure = partition_commands.add_parser("ensure", help="Create partitions for the current and upcoming months")
+    ensure.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    ensure.add_argument(
+        "--app-id",
+        action="append",
+        help="Give this app its own partition of each new month; repeat for several apps"
+    )
+    ensure.set_defaults(handler=run_partitions_ensure)
+    detach = partition_commands.add_parser("detach", help="Detach old partitions into the archive schema")
+    detach.add_argument(
+        "--before",
+        type=datetime.fromisoformat,
+        required=True,
+        help="ISO timestamp; months ending at or before it are detached"
+    )
+    detach.add_argument("--archive-schema", default=ARCHIVE_SCHEMA)
+    detach.set_defaults(handler=run_partitions_detach)
+
+    checkpoints = commands.add_parser("checkpoints", help="Maintain balance checkpoints")
+    checkpoint_commands = checkpoints.add_subparsers(dest="checkpoint_command", required=True)
+    advance = checkpoint_commands.add_parser(
+        "advance",
+        help="Advance checkpoints past new entries; exits 1 if any balance drifted"
+    )
+    advance.add_argument("--chunk-size", type=int, default=CHECKPOINT_CHUNK_SIZE)
+    advance.set_defaults(handler=run_checkpoints_advance)
+
+    responses = commands.add_parser("responses", help="Maintain stored results of ledger operations")
+    response_commands = responses.add_subparsers(dest="response_command", required=True)
+    purge = response_commands.add_parser("purge", help="Delete results past their retention window")
+    purge.add_argument("--chunk-size", type=int, default=RESPONSE_PURGE_CHUNK_SIZE)
+    purge.set_defaults(handler=run_responses_purge)
+
+    rollups = commands.add_parser("rollups", help="Maintain the hourly and daily usage rollups")
+    rollup_commands = rollups.add_subparsers(dest="rollup_command", required=True)
+    roll_up = rollup_commands.add_parser("advance", help="Count entries covered by balance checkpoints")
+    roll_up.add_argument("--chunk-size", type=int, default=ROLLUP_CHUNK_SIZE)
+    roll_up.set_defaults(handler=run_rollups_advance)
+
+    archive = commands.add_parser("archive", help="Move cold ledger history into binary segment files")
+    archive_commands = archive.add_subparsers(dest="archive_command", required=True)
+    run = archive_commands.add_parser("run", help="Archive entries counted in the usage rollups")
+    run.add_argument("--directory", required=True)
+    run.add_argument(
+        "--before",
+        type=datetime.fromisoformat,
+        required=True,
+        help="ISO timestamp; entries created before it are archived"
+    )
+    run.add_argument("--segment-size", type=int, default=ARCHIVE_SEGMENT_SIZE)
+    run.set_defaults(handler=run_archive)
+    history = archive_commands.add_parser("history", help="Print an owner's archived entries")
+    history.add_argument("--directory", required=True)
+    history.add_argument("--owner-id", required=True)
+    history.add_argument("--since", type=datetime.fromisoformat, help="ISO timestamp, inclusive")
+    history.add_argument("--until", type=datetime.fromisoformat, help="ISO timestamp, exclusive")
+    history.set_defaults(handler=run_archive_history, offline=True)
+    verify = archive_commands.add_parser("verify", help="Check segment totals; exits 1 on a mismatch")
+    verify.add_argument("--directory", required=True)
+    verify.set_defaults(handler=run_archive_verify, offline=True)
+    summarize = archive_commands.add_parser("summarize", help="Rebuild the summary rows of every segment from its records")
+    summarize.add_argument("--directory", required=True)
+    summarize.set_defaults(handler=run_archive_summarize)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    if not args.database_url and not getattr(args, "offline", False):
+        raise SystemExit("A database URL is required (--database-url or $DATABASE_URL)")
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -7,6 +7,38 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    
+    # Read replicas serving balance, history, and export reads
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_WAIT_TIMEOUT: float = 0.2  # seconds a read waits for a lagging replica
+    
+    # Database connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0      # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800        # seconds before a connection is replaced; -1 never
+    DB_POOL_PRE_PING: bool = True
+    DB_WARMUP_CONNECTIONS: int = 5     # connections opened and prepared at startup
+    
+    # asyncpg prepared statements cached per connection; 0 disables the cache
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    
+    # Connect through PgBouncer in transaction pooling mode, where a
+    # connection's prepared statements may belong to another server session
+    DB_PGBOUNCER: bool = False
+    
+    # Embedded SQLite databases (DATABASE_URL=sqlite+aiosqlite:///path)
+    SQLITE_BUSY_TIMEOUT: float = 5.0           # seconds a write waits for the writer lock
+    SQLITE_SYNCHRONOUS: str = "NORMAL"         # FULL also syncs the WAL on every commit
+    SQLITE_CACHE_SIZE_KB: int = 65536          # page cache per connection
+    SQLITE_MMAP_SIZE: int = 268435456          # bytes of the database file memory-mapped
+    
+    # SQL profiling of requests
+    QUERY_PROFILE_SAMPLE_RATE: float = 0.0     # share of requests profiled; 0 disables
+    QUERY_PROFILE_HEADERS: bool = False        # add query count and DB time to responses
+    QUERY_BUDGET_COUNT: Optional[int] = 20     # statements per request before logging
+    QUERY_BUDGET_MS: Optional[float] = 250.0   # DB time per request before logging
     
     # Application
     DEBUG: bool = False
@@ -29,7 +61,8 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
-        case_sensitive=True
+        case_sensitive=True,
+        extra="ignore"
     )
 
 @lru_cache
@@ -0,0 +1,146 @@
+"""
+Async engine and session factories configured from Settings.
+"""
+
+import asyncio
+import os
+from typing import Any, Dict, Optional
+
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine
+)
+
+from .config import Settings
+from .models.ledger import LedgerEntry
+from .utils.dialect import begin_write
+from .utils.ledger import apply_balance_delta, claim_nonces, get_balance, lock_balance
+from .utils.sqlite import configure_sqlite_engine, is_memory_url, is_sqlite_url, sqlite_pragmas
+
+# Owner the warmup statements are run for; nothing is committed
+WARMUP_OWNER_ID = "__warmup__"
+
+
+def _prepared_statement_name() -> str:
+    """Name prepared statements uniquely, since PgBouncer may reuse server sessions."""
+    return f"__asyncpg_{os.urandom(8).hex()}__"
+
+
+def engine_options(settings: Settings, url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build the create_async_engine keyword arguments for the settings.
+
+    In PgBouncer mode, prepared statements are neither cached nor reused by
+    name, because consecutive transactions may run on different server
+    connections. SQLite engines get the pool settings only, and none for
+    in-memory databases, which share a single connection.
+
+    Args:
+        settings: Application settings
+        url: Database the engine connects to; defaults to DATABASE_URL
+
+    Returns:
+        Keyword arguments for create_async_engine
+    """
+    url = url or settings.DATABASE_URL
+    if is_sqlite_url(url):
+        if is_memory_url(url):
+            return {"echo": settings.DB_ECHO}
+        return {
+            "echo": settings.DB_ECHO,
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING
+        }
+
+    connect_args: Dict[str, Any] = {
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+    }
+    if settings.DB_PGBOUNCER:
+        connect_args = {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": _prepared_statement_name
+        }
+    return {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args
+    }
+
+
+def create_ledger_engine(settings: Settings, url: Optional[str] = None) -> AsyncEngine:
+    """
+    Create an async engine configured by the settings.
+
+    URLs starting with ``sqlite+aiosqlite://`` get an embedded SQLite
+    engine; see utils.sqlite.
+
+    Args:
+        settings: Application settings
+        url: Database to connect to instead of DATABASE_URL, e.g. a replica
+    """
+    url = url or settings.DATABASE_URL
+    engine = create_async_engine(url, **engine_options(settings, url))
+    if is_sqlite_url(url):
+        configure_sqlite_engine(engine, sqlite_pragmas(settings))
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    """Create the session factory used for ledger requests."""
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def prepare_ledger_statements(session: AsyncSession) -> None:
+    """
+    Run the statements of the ledger write path once and roll them back.
+
+    Leaves them compiled in the engine's statement cache and prepared on
+    the session's connection.
+
+    Args:
+        session: Database session without an open transaction
+    """
+    try:
+        await begin_write(session)
+        await get_balance(session, WARMUP_OWNER_ID, use_cache=False)
+        await claim_nonces(session, [os.urandom(16)])
+        await lock_balance(session, WARMUP_OWNER_ID)
+        await apply_balance_delta(session, WARMUP_OWNER_ID, 0)
+        session.add(LedgerEntry(operation="WARMUP", owner_id=WARMUP_OWNER_ID, amount=0, nonce="warmup"))
+        await session.flush()
+    finally:
+        await session.rollback()
+
+
+async def warm_up_engine(engine: AsyncEngine, connections: int) -> None:
+    """
+    Open pool connections and prepare the ledger statements on each.
+
+    Meant for application startup, so the first requests after a deploy
+    do not pay for connecting and parsing. All connections are held at
+    once so the pool opens that many.
+
+    Args:
+        engine: Engine to warm up
+        connections: Number of connections to open
+    """
+    async def warm_up(conn: AsyncConnection) -> None:
+        async with AsyncSession(bind=conn, expire_on_commit=False) as session:
+            await prepare_ledger_statements(session)
+
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)))
+    try:
+        await asyncio.gather(*(warm_up(conn) for conn in opened))
+    finally:
+        await asyncio.gather(*(conn.close() for conn in opened))
@@ -3,9 +3,22 @@ Database models for the shared ledger system.
 """
 
 from .base import Base
-from .ledger import LedgerEntry
+from .ledger import LedgerEntry, LedgerNonce, LedgerResponse
+from .balance import OwnerBalance, BalanceCheckpoint
+from .operation import OperationPrice
+from .archive import LedgerArchiveSummary
+from .rollup import LedgerUsageHourly, LedgerUsageDaily, LedgerRollupWatermark
 
 __all__ = [
     "Base",
     "LedgerEntry",
+    "LedgerNonce",
+    "LedgerResponse",
+    "OwnerBalance",
+    "BalanceCheckpoint",
+    "OperationPrice",
+    "LedgerArchiveSummary",
+    "LedgerUsageHourly",
+    "LedgerUsageDaily",
+    "LedgerRollupWatermark",
 ]
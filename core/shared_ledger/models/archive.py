@@ -0,0 +1,37 @@
+"""
+Summaries of ledger entries moved into binary archive segments.
+"""
+
+from datetime import datetime
+from sqlalchemy import String, BigInteger, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class LedgerArchiveSummary(Base):
+    """
+    Entries of one owner and app moved out of ledger_entries into one archive
+    segment. Only entries covered by the owner's balance checkpoint are
+    archived, so balances derived from the ledger stay correct; the summary
+    records what left the table, for audits against the segment file and for
+    per-app balances. See utils.archive.
+    """
+    __tablename__ = "ledger_archive_summaries"
+
+    segment: Mapped[str] = mapped_column(String, primary_key=True)
+    owner_id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
+    app_id: Mapped[str] = mapped_column(String, primary_key=True, server_default="core")
+    entries: Mapped[int] = mapped_column(Integer, nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    first_entry_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_entry_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<LedgerArchiveSummary(segment='{self.segment}', owner_id='{self.owner_id}', app_id='{self.app_id}', entries={self.entries}, amount={self.amount})>"
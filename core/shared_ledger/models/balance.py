@@ -0,0 +1,51 @@
+"""
+Materialized balance model for fast balance lookups.
+"""
+
+from datetime import datetime
+from sqlalchemy import String, BigInteger, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class OwnerBalance(Base):
+    """
+    Running balance of a single owner.
+    Maintained in the same transaction as every ledger entry insert, so a
+    balance read is a primary key lookup regardless of ledger history size.
+    """
+    __tablename__ = "owner_balances"
+
+    owner_id: Mapped[str] = mapped_column(String, primary_key=True)
+    balance: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    last_updated: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<OwnerBalance(owner_id='{self.owner_id}', balance={self.balance})>"
+
+
+class BalanceCheckpoint(Base):
+    """
+    Balance of a single owner as of a ledger entry.
+    Advanced periodically by a background job, so the balance can be derived
+    from the ledger by summing only the entries after the checkpoint.
+    """
+    __tablename__ = "balance_checkpoints"
+
+    owner_id: Mapped[str] = mapped_column(String, primary_key=True)
+    entry_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    balance: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<BalanceCheckpoint(owner_id='{self.owner_id}', entry_id={self.entry_id}, balance={self.balance})>"
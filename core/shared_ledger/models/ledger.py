@@ -3,7 +3,7 @@ Ledger entry model for tracking credit operations.
 """
 
 from datetime import datetime
-from sqlalchemy import String, Integer, DateTime, Index
+from sqlalchemy import String, Integer, DateTime, Index, JSON, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 
@@ -13,17 +13,24 @@ from .base import Base
 class LedgerEntry(Base):
     """
     Represents a single ledger entry for credit operations.
-    Each entry tracks a credit operation (add/spend) for a specific owner.
+    Each entry tracks a credit operation (add/spend) for a specific owner,
+    written by the app whose operations class is given by app_id.
+    The table is partitioned by month of creation; see utils.partitions.
     """
     __tablename__ = "ledger_entries"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    owner_id: Mapped[str] = mapped_column(String, nullable=False, index=True)
+    owner_id: Mapped[str] = mapped_column(String, nullable=False)
+    # APP_ID of the operations class the entry was written with
+    app_id: Mapped[str] = mapped_column(String, nullable=False, server_default="core")
     operation: Mapped[str] = mapped_column(String, nullable=False, index=True)
     amount: Mapped[int] = mapped_column(Integer, nullable=False)
-    nonce: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    # Uniqueness is enforced by LedgerNonce, which also works when this table is partitioned
+    nonce: Mapped[str] = mapped_column(String, nullable=False)
+    # Part of the primary key because it is the partition key
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         server_default=func.now(),
         nullable=False
     )
@@ -37,7 +44,53 @@ class LedgerEntry(Base):
     # Indexes for common queries
     __table_args__ = (
         Index('ix_ledger_entries_owner_operation', 'owner_id', 'operation'),
+        Index('ix_ledger_entries_owner_id_id', 'owner_id', 'id'),
+        # Per-app history and balances read one app's range of an owner's entries
+        Index('ix_ledger_entries_app_owner_id', 'app_id', 'owner_id', 'id', postgresql_include=['amount', 'created_at']),
+        Index('ix_ledger_entries_app_owner_operation', 'app_id', 'owner_id', 'operation'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
     )
 
     def __repr__(self) -> str:
-        return f"<LedgerEntry(id={self.id}, owner_id='{self.owner_id}', operation='{self.operation}', amount={self.amount})>" 
\ No newline at end of file
+        return f"<LedgerEntry(id={self.id}, owner_id='{self.owner_id}', operation='{self.operation}', amount={self.amount})>" 
+
+
+class LedgerNonce(Base):
+    """
+    Registry of claimed transaction nonces.
+    A nonce is claimed in the same transaction as the entry that uses it.
+    Kept outside ledger_entries so global uniqueness holds even when the
+    entries table is partitioned by time. Nonces are stored as fixed-width
+    hashes qualified by their scope; see BaseLedgerOperations.nonce_hash.
+    """
+    __tablename__ = "ledger_nonces"
+
+    nonce_hash: Mapped[bytes] = mapped_column(LargeBinary(16), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<LedgerNonce(nonce_hash='{self.nonce_hash.hex()}')>"
+
+
+class LedgerResponse(Base):
+    """
+    Stored result of a ledger operation, keyed by its nonce hash.
+    Lets a retried request be answered with the original result until the
+    record expires; see utils.idempotency.
+    """
+    __tablename__ = "ledger_responses"
+
+    nonce_hash: Mapped[bytes] = mapped_column(LargeBinary(16), primary_key=True)
+    response: Mapped[dict] = mapped_column(JSON, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        index=True
+    )
+
+    def __repr__(self) -> str:
+        return f"<LedgerResponse(nonce_hash='{self.nonce_hash.hex()}', expires_at={self.expires_at})>"
@@ -0,0 +1,30 @@
+"""
+Operation price overrides loaded into the operation registry.
+"""
+
+from datetime import datetime
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class OperationPrice(Base):
+    """
+    Amount of an operation for one app, overriding the amount in code.
+    Only operations the app's operations class defines can be priced.
+    """
+    __tablename__ = "operation_prices"
+
+    app_id: Mapped[str] = mapped_column(String, primary_key=True)
+    operation: Mapped[str] = mapped_column(String, primary_key=True)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<OperationPrice(app_id='{self.app_id}', operation='{self.operation}', amount={self.amount})>"
@@ -0,0 +1,61 @@
+"""
+Usage rollups maintained incrementally from the ledger.
+"""
+
+from datetime import datetime
+from sqlalchemy import String, BigInteger, Integer, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class LedgerUsageRollup(Base):
+    """
+    Number and amount total of an app's entries of one operation in one
+    time bucket. Keyed by bucket first, so a time range is one index range
+    whatever the app and operation filters.
+    """
+    __abstract__ = True
+
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    app_id: Mapped[str] = mapped_column(String, primary_key=True)
+    operation: Mapped[str] = mapped_column(String, primary_key=True)
+    entries: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    amount: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}(bucket='{self.bucket}', app_id='{self.app_id}', operation='{self.operation}', entries={self.entries}, amount={self.amount})>"
+
+
+class LedgerUsageHourly(LedgerUsageRollup):
+    """
+    Usage per UTC hour.
+    """
+    __tablename__ = "ledger_usage_hourly"
+
+
+class LedgerUsageDaily(LedgerUsageRollup):
+    """
+    Usage per UTC day.
+    """
+    __tablename__ = "ledger_usage_daily"
+
+
+class LedgerRollupWatermark(Base):
+    """
+    Last entry of an owner counted in the usage rollups. Never passes the
+    owner's balance checkpoint, below which no entry can still appear.
+    """
+    __tablename__ = "ledger_rollup_watermarks"
+
+    owner_id: Mapped[str] = mapped_column(String, primary_key=True)
+    entry_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<LedgerRollupWatermark(owner_id='{self.owner_id}', entry_id={self.entry_id})>"
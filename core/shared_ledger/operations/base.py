@@ -2,8 +2,12 @@
 Base ledger operations and configuration.
 """
 
+import hashlib
+from datetime import timedelta
 from enum import Enum
-from typing import Dict, Set, Literal
+from typing import Dict, Mapping, Optional, Set, Literal
+
+from .registry import operation_registry
 
 # Core operation literals - shared operations that all apps can use
 BaseLedgerOperationLiteral = Literal[
@@ -35,12 +39,60 @@ class LedgerOperationType(str, Enum):
         }
 
 
+class LedgerWriteMode(str, Enum):
+    """
+    Strategies for writing a ledger entry.
+    """
+    STANDARD = "standard"                  # Separate dedup, balance, and insert statements
+    SINGLE_STATEMENT = "single_statement"  # Dedup, funds check, insert, and balance in one round trip
+
+
+class LedgerIsolation(str, Enum):
+    """
+    Concurrency control strategies for writing a ledger entry.
+    """
+    LOCKING = "locking"                  # Per-owner and balance row locks at the session's isolation level
+    REPEATABLE_READ = "REPEATABLE READ"  # No locks; conflicting writes fail and are retried
+    SERIALIZABLE = "SERIALIZABLE"        # No locks; serialization failures are retried
+
+
+class NonceScope(str, Enum):
+    """
+    Scopes within which a transaction nonce must be unique.
+    """
+    GLOBAL = "global"  # Unique across all apps and owners
+    APP = "app"        # Unique within the app's operations class
+    OWNER = "owner"    # Unique per owner within the app
+
+
 class BaseLedgerOperations:
     """
     Base class for ledger operations configuration.
     Applications should extend this class and add their specific operations.
     """
     
+    # Strategy used by process_ledger_operation to write entries
+    WRITE_MODE: LedgerWriteMode = LedgerWriteMode.STANDARD
+    
+    # Concurrency control used by process_ledger_operation. Locking suits hot
+    # accounts; the optimistic levels avoid lock waits when contention is low.
+    ISOLATION: LedgerIsolation = LedgerIsolation.LOCKING
+    
+    # Attempts and base backoff in seconds for retrying optimistic writes
+    MAX_WRITE_ATTEMPTS: int = 5
+    RETRY_BACKOFF: float = 0.005
+    
+    # How long results are kept for replaying retried requests; None rejects
+    # every reused nonce with DuplicateTransactionError
+    RESPONSE_RETENTION: Optional[timedelta] = None
+    
+    # Identifies the app in scoped nonces
+    APP_ID: str = "core"
+    
+    # Scope within which nonces must be unique. Changing it for an app with
+    # existing entries lets earlier nonces be reused.
+    NONCE_SCOPE: NonceScope = NonceScope.GLOBAL
+    
     # Core operation configuration with default values
     BASE_CONFIG: Dict[BaseLedgerOperationLiteral, int] = {
         LedgerOperationType.DAILY_REWARD.value: 1,    # Daily reward amount
@@ -54,12 +106,46 @@ class BaseLedgerOperations:
         """
         Get the complete operation configuration.
         Override this in application-specific classes to add custom operations.
+        Called only when the operation table is compiled; the write paths use
+        operation_table instead.
         
         Returns:
             Dict mapping operation names to their credit values
         """
         return cls.BASE_CONFIG.copy()
 
+    @classmethod
+    def operation_table(cls) -> Mapping[str, int]:
+        """
+        Get the compiled operation table, including database price overrides.
+        
+        Returns:
+            Read-only mapping from operation names to their credit values,
+            shared until the prices change
+            
+        Raises:
+            ValueError: If the table is missing required operations
+        """
+        return operation_registry.table(cls)
+
+    @classmethod
+    def nonce_hash(cls, owner_id: str, nonce: str) -> bytes:
+        """
+        Get the fixed-width key under which a nonce is claimed.
+        
+        Args:
+            owner_id: ID of the entry owner
+            nonce: Nonce of the entry
+            
+        Returns:
+            16-byte MD5 digest of the nonce qualified by its scope
+        """
+        if cls.NONCE_SCOPE == NonceScope.APP:
+            nonce = "\x1f".join(("app", cls.APP_ID, nonce))
+        elif cls.NONCE_SCOPE == NonceScope.OWNER:
+            nonce = "\x1f".join(("owner", cls.APP_ID, owner_id, nonce))
+        return hashlib.md5(nonce.encode()).digest()
+
     @classmethod
     def validate_operations(cls, operations: Set[str]) -> None:
         """
@@ -72,6 +158,6 @@ class BaseLedgerOperations:
         Raises:
             ValueError: If any required operations are missing
         """
-        missing_operations = cls.required_operations() - operations
+        missing_operations = LedgerOperationType.required_operations() - operations
         if missing_operations:
             raise ValueError(f"Missing required operations: {missing_operations}") 
\ No newline at end of file
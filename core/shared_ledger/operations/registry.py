@@ -0,0 +1,95 @@
+"""
+Compiled, read-only operation tables for the ledger write paths.
+"""
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Mapping, Tuple, Type
+
+if TYPE_CHECKING:
+    from .base import BaseLedgerOperations
+
+
+class OperationRegistry:
+    """
+    Versioned cache of each operations class's operation table.
+
+    A table is compiled once from ``get_operation_config`` plus any price
+    overrides for the class's ``APP_ID``, checked with
+    ``validate_operations``, and frozen. Lookups return the same read-only
+    mapping until the prices change, which bumps the version and swaps in
+    freshly compiled tables.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._prices: Dict[str, Dict[str, int]] = {}
+        self._tables: Dict[type, Tuple[int, Mapping[str, int]]] = {}
+
+    def table(self, operations: Type["BaseLedgerOperations"]) -> Mapping[str, int]:
+        """
+        Get the operation table of an operations class, compiling it on first use.
+
+        Raises:
+            ValueError: If the compiled table is missing required operations
+        """
+        cached = self._tables.get(operations)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        table = self.compile(operations, self._prices.get(operations.APP_ID, {}))
+        self._tables[operations] = (self.version, table)
+        return table
+
+    def compile(
+        self,
+        operations: Type["BaseLedgerOperations"],
+        prices: Mapping[str, int]
+    ) -> Mapping[str, int]:
+        """
+        Build the operation table of an operations class.
+
+        Args:
+            operations: Operations class to compile
+            prices: Amounts overriding the configured ones; operations the
+                    class does not define are ignored
+
+        Returns:
+            Read-only mapping from operation name to amount
+
+        Raises:
+            ValueError: If the table is missing required operations
+        """
+        config = operations.get_operation_config()
+        config.update({operation: amount for operation, amount in prices.items() if operation in config})
+        operations.validate_operations(set(config))
+        return MappingProxyType(config)
+
+    def set_prices(self, prices: Dict[str, Dict[str, int]]) -> bool:
+        """
+        Replace the price overrides, recompiling the tables already in use.
+
+        Tables are all compiled before any is swapped in, so a failing
+        table leaves the registry unchanged.
+
+        Args:
+            prices: Amounts by app id and operation name
+
+        Returns:
+            Whether the prices changed
+
+        Raises:
+            ValueError: If a recompiled table is missing required operations
+        """
+        if prices == self._prices:
+            return False
+        tables = {
+            operations: self.compile(operations, prices.get(operations.APP_ID, {}))
+            for operations in self._tables
+        }
+        self._prices = prices
+        self.version += 1
+        self._tables = {operations: (self.version, table) for operations, table in tables.items()}
+        return True
+
+
+# Shared registry used by BaseLedgerOperations.operation_table
+operation_registry = OperationRegistry()
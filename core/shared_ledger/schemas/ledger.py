@@ -3,7 +3,7 @@ Pydantic models for ledger operations.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class LedgerEntryBase(BaseModel):
@@ -41,6 +41,13 @@ class LedgerEntryResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class LedgerEntryPage(BaseModel):
+    """
+    Schema for a page of ledger entries, newest first.
+    """
+    entries: List[LedgerEntryResponse]
+    next_cursor: Optional[int] = Field(None, description="Cursor for the next page, absent on the last page")
+
 class LedgerBalance(BaseModel):
     """
     Schema for ledger balance response.
@@ -48,9 +55,74 @@ class LedgerBalance(BaseModel):
     balance: int
     last_updated: Optional[datetime] = None
 
+class LedgerBalancesRequest(BaseModel):
+    """
+    Schema for looking up the balances of many owners.
+    """
+    owner_ids: List[str] = Field(..., min_length=1, max_length=10000, description="IDs of the owners")
+
+class LedgerBalances(BaseModel):
+    """
+    Schema for bulk balance response.
+    """
+    balances: Dict[str, LedgerBalance]
+
 class LedgerOperationResponse(BaseModel):
     """
     Schema for ledger operation response.
     """
     entry: LedgerEntryResponse
-    balance: int 
\ No newline at end of file
+    balance: int 
+
+class LedgerBatchCreate(BaseModel):
+    """
+    Schema for creating several ledger entries in one request.
+    
+    Attributes:
+        entries: Entries to create, processed in order
+        atomic: If true, no entry is written unless every entry succeeds.
+                Otherwise valid entries are written and failures are reported per item.
+    """
+    entries: List[LedgerEntryCreate] = Field(..., min_length=1, max_length=1000, description="Entries to create")
+    atomic: bool = Field(False, description="Write all entries or none of them")
+
+class LedgerBatchItemResult(BaseModel):
+    """
+    Schema for the outcome of a single entry in a batch.
+    """
+    index: int
+    entry: Optional[LedgerEntryResponse] = None
+    balance: Optional[int] = None
+    error: Optional[str] = None
+
+class LedgerBatchResponse(BaseModel):
+    """
+    Schema for batch ledger operation response.
+    """
+    committed: bool
+    results: List[LedgerBatchItemResult]
+
+class LedgerUsagePoint(BaseModel):
+    """
+    Schema for the usage of one time bucket.
+    """
+    bucket: datetime = Field(..., description="Start of the bucket, in UTC")
+    entries: int
+    amount: int
+
+class LedgerUsageSeries(BaseModel):
+    """
+    Schema for the usage of one app's operation over time.
+    """
+    app_id: str
+    operation: str
+    points: List[LedgerUsagePoint] = Field(..., description="Non-empty buckets in time order")
+
+class LedgerUsageStats(BaseModel):
+    """
+    Schema for usage statistics read from the rollups.
+    """
+    granularity: str
+    since: datetime
+    until: datetime
+    series: List[LedgerUsageSeries]
@@ -0,0 +1,462 @@
+"""
+Archival of cold ledger history into binary segment files.
+
+A segment holds fixed-width entry records sorted by owner, so an owner's
+history is one contiguous slice of the memory-mapped file. Owner IDs,
+app IDs, operations, and nonces are stored once in a string heap and
+referenced by index or offset. Layout, all integers little-endian:
+
+    header      magic, record count, owner count, operation count, heap offset
+    records     id, amount, created_at (epoch microseconds), owner index,
+                operation index, nonce offset and length
+    owners      name offset and length, first record, record count, amount total
+    operations  app ID offset and length, operation offset and length
+    heap        UTF-8 owner IDs, app IDs, operations, and nonces
+"""
+
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.archive import LedgerArchiveSummary
+from ..models.ledger import LedgerEntry
+from ..models.rollup import LedgerRollupWatermark
+
+SEGMENT_MAGIC = b"LEDGSEG2"
+SEGMENT_SUFFIX = ".lseg"
+
+# Entries written per segment file by the archive job
+ARCHIVE_SEGMENT_SIZE = 1_000_000
+
+_HEADER = struct.Struct("<8sQIIQ")
+_RECORD = struct.Struct("<qqqIHIH")
+_OWNER = struct.Struct("<IHQIq")
+_OPERATION = struct.Struct("<IHIH")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class ArchivedEntry(NamedTuple):
+    """
+    Ledger entry read from an archive segment.
+    """
+    id: int
+    owner_id: str
+    operation: str
+    amount: int
+    nonce: str
+    created_at: datetime
+    app_id: str
+
+    @property
+    def updated_at(self) -> datetime:
+        # Entries are never updated
+        return self.created_at
+
+
+class OwnerRange(NamedTuple):
+    """
+    Contiguous records of one owner in a segment, with their amount total.
+    """
+    first: int
+    count: int
+    amount: int
+
+
+def _microseconds(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def write_segment(path: str, entries: Sequence[Any]) -> Dict[str, OwnerRange]:
+    """
+    Write entries to a segment file.
+
+    The file is written under a temporary name, synced, and renamed into
+    place, so a segment at its final path is always complete.
+
+    Args:
+        path: Path of the segment file
+        entries: Rows with id, owner_id, operation, amount, nonce, created_at, and app_id
+
+    Returns:
+        The record range and amount total of each owner in the segment
+    """
+    entries = sorted(entries, key=lambda entry: (entry.owner_id, entry.id))
+    owners = sorted({entry.owner_id for entry in entries})
+    operations = sorted({(entry.app_id, entry.operation) for entry in entries})
+    owner_index = {owner_id: index for index, owner_id in enumerate(owners)}
+    operation_index = {operation: index for index, operation in enumerate(operations)}
+
+    heap = bytearray()
+
+    def intern(value: str) -> Tuple[int, int]:
+        encoded = value.encode()
+        heap.extend(encoded)
+        return len(heap) - len(encoded), len(encoded)
+
+    owner_names = [intern(owner_id) for owner_id in owners]
+    operation_names = [intern(app_id) + intern(operation) for app_id, operation in operations]
+
+    records = bytearray()
+    ranges: Dict[str, OwnerRange] = {}
+    for position, entry in enumerate(entries):
+        nonce_offset, nonce_length = intern(entry.nonce)
+        records += _RECORD.pack(
+            entry.id,
+            entry.amount,
+            _microseconds(entry.created_at),
+            owner_index[entry.owner_id],
+            operation_index[entry.app_id, entry.operation],
+            nonce_offset,
+            nonce_length
+        )
+        current = ranges.get(entry.owner_id)
+        if current is None:
+            ranges[entry.owner_id] = OwnerRange(position, 1, entry.amount)
+        else:
+            ranges[entry.owner_id] = OwnerRange(current.first, current.count + 1, current.amount + entry.amount)
+
+    directory = bytearray()
+    for owner_id, (name_offset, name_length) in zip(owners, owner_names):
+        directory += _OWNER.pack(name_offset, name_length, *ranges[owner_id])
+    for names in operation_names:
+        directory += _OPERATION.pack(*names)
+
+    heap_offset = _HEADER.size + len(records) + len(directory)
+    header = _HEADER.pack(SEGMENT_MAGIC, len(entries), len(owners), len(operations), heap_offset)
+    partial = f"{path}.partial"
+    with open(partial, "wb") as segment:
+        segment.write(header)
+        segment.write(records)
+        segment.write(directory)
+        segment.write(heap)
+        segment.flush()
+        os.fsync(segment.fileno())
+    os.replace(partial, path)
+    return ranges
+
+
+class ArchiveSegment:
+    """
+    Memory-mapped reader of one segment file.
+
+    Opening reads only the owner and operation directories. Records are
+    read in place: owner_records returns a view of the mapped file, and
+    entries are decoded only as they are iterated. Release views from
+    owner_records before closing the segment.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as segment:
+            self._map = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, self.record_count, owner_count, operation_count, self._heap = _HEADER.unpack_from(self._view)
+        if magic != SEGMENT_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a ledger archive segment")
+
+        self._records = _HEADER.size
+        owners_at = self._records + self.record_count * _RECORD.size
+        operations_at = owners_at + owner_count * _OWNER.size
+        self.owners: Dict[str, OwnerRange] = {}
+        self._owner_names: List[str] = []
+        for name_offset, name_length, first, count, amount in _OWNER.iter_unpack(
+            self._view[owners_at:operations_at]
+        ):
+            owner_id = self._string(name_offset, name_length)
+            self.owners[owner_id] = OwnerRange(first, count, amount)
+            self._owner_names.append(owner_id)
+        # (app ID, operation) pairs, by operation index
+        self.operations: List[Tuple[str, str]] = [
+            (self._string(app_offset, app_length), self._string(operation_offset, operation_length))
+            for app_offset, app_length, operation_offset, operation_length in _OPERATION.iter_unpack(
+                self._view[operations_at:operations_at + operation_count * _OPERATION.size]
+            )
+        ]
+
+    def __enter__(self) -> "ArchiveSegment":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._view.release()
+        self._map.close()
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._heap + offset
+        return str(self._view[start:start + length], "utf-8")
+
+    def records(self, start: int = 0, stop: Optional[int] = None) -> memoryview:
+        """Get a zero-copy view of fixed-width records, by record position."""
+        stop = self.record_count if stop is None else min(stop, self.record_count)
+        return self._view[self._records + start * _RECORD.size:self._records + stop * _RECORD.size]
+
+    def owner_records(self, owner_id: str) -> memoryview:
+        """Get a zero-copy view of an owner's records; empty if the owner has none."""
+        owner_range = self.owners.get(owner_id)
+        if owner_range is None:
+            return self.records(0, 0)
+        return self.records(owner_range.first, owner_range.first + owner_range.count)
+
+    def _decode(self, view: memoryview) -> Iterator[ArchivedEntry]:
+        for entry_id, amount, created_at, owner, operation, nonce_offset, nonce_length in _RECORD.iter_unpack(view):
+            app_id, operation_name = self.operations[operation]
+            yield ArchivedEntry(
+                entry_id,
+                self._owner_names[owner],
+                operation_name,
+                amount,
+                self._string(nonce_offset, nonce_length),
+                _EPOCH + timedelta(microseconds=created_at),
+                app_id
+            )
+
+    def history(
+        self,
+        owner_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[ArchivedEntry]:
+        """
+        Get an owner's archived entries in id order.
+
+        Args:
+            owner_id: ID of the owner
+            since: Only return entries created at or after this time
+            until: Only return entries created before this time
+        """
+        with self.owner_records(owner_id) as view:
+            return [
+                entry for entry in self._decode(view)
+                if (since is None or entry.created_at >= since) and (until is None or entry.created_at < until)
+            ]
+
+    def verify(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Recompute each owner's amount total from the records.
+
+        Returns:
+            Owners whose directory total disagrees with their records, as
+            (directory total, record total)
+        """
+        mismatches = {}
+        for owner_id, owner_range in self.owners.items():
+            with self.owner_records(owner_id) as view:
+                total = sum(record[1] for record in _RECORD.iter_unpack(view))
+            if total != owner_range.amount:
+                mismatches[owner_id] = (owner_range.amount, total)
+        return mismatches
+
+
+class LedgerArchive:
+    """
+    Reader over all segment files in an archive directory.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.segments = [
+            ArchiveSegment(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory))
+            if name.endswith(SEGMENT_SUFFIX)
+        ]
+
+    def __enter__(self) -> "LedgerArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for segment in self.segments:
+            segment.close()
+
+    def history(
+        self,
+        owner_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[ArchivedEntry]:
+        """Get an owner's archived entries across segments in id order."""
+        entries = [
+            entry
+            for segment in self.segments
+            if owner_id in segment.owners
+            for entry in segment.history(owner_id, since, until)
+        ]
+        return sorted(entries, key=lambda entry: entry.id)
+
+    def owner_total(self, owner_id: str) -> int:
+        """Get the amount total of an owner's archived entries."""
+        return sum(segment.owners[owner_id].amount for segment in self.segments if owner_id in segment.owners)
+
+    def verify(self) -> Dict[str, Dict[str, Tuple[int, int]]]:
+        """Get the owners whose totals disagree with their records, by segment file name."""
+        mismatches = {}
+        for segment in self.segments:
+            segment_mismatches = segment.verify()
+            if segment_mismatches:
+                mismatches[os.path.basename(segment.path)] = segment_mismatches
+        return mismatches
+
+
+def summarize_entries(segment: str, entries: Iterable[Any]) -> List[Dict[str, Any]]:
+    """
+    Build the summary rows of a segment's entries, one per owner and app.
+
+    Args:
+        segment: File name of the segment
+        entries: Rows with id, owner_id, amount, and app_id
+
+    Returns:
+        Values of the LedgerArchiveSummary rows, in owner and app order
+    """
+    # (owner ID, app ID) -> [entries, amount, first entry ID, last entry ID]
+    totals: Dict[Tuple[str, str], List[int]] = {}
+    for entry in entries:
+        total = totals.get((entry.owner_id, entry.app_id))
+        if total is None:
+            totals[entry.owner_id, entry.app_id] = [1, entry.amount, entry.id, entry.id]
+            continue
+        total[0] += 1
+        total[1] += entry.amount
+        total[2] = min(total[2], entry.id)
+        total[3] = max(total[3], entry.id)
+    return [
+        {
+            "segment": segment,
+            "owner_id": owner_id,
+            "app_id": app_id,
+            "entries": count,
+            "amount": amount,
+            "first_entry_id": first_id,
+            "last_entry_id": last_id,
+        }
+        for (owner_id, app_id), (count, amount, first_id, last_id) in sorted(totals.items())
+    ]
+
+
+async def archive_ledger_entries(
+    session: AsyncSession,
+    directory: str,
+    before: datetime,
+    segment_size: int = ARCHIVE_SEGMENT_SIZE
+) -> List[str]:
+    """
+    Move entries created before a cutoff into segment files.
+
+    Only entries already counted in the usage rollups are moved. Their
+    owner's balance checkpoint also covers them, so balances derived from
+    the ledger stay correct; advance the checkpoints and then the rollups
+    first. Each segment is written, then its entries are deleted and a
+    summary row per owner and app is recorded in one transaction. Nonces stay
+    claimed in the nonce registry.
+
+    Args:
+        session: Database session without an open transaction
+        directory: Directory the segment files are written to
+        before: Archive entries created before this time
+        segment_size: Maximum number of entries per segment
+
+    Returns:
+        Paths of the segments written
+
+    Raises:
+        RuntimeError: If the entries to delete changed after they were
+                      read; the segment is removed and nothing is deleted
+    """
+    os.makedirs(directory, exist_ok=True)
+    covered = (
+        LedgerEntry.created_at < before,
+        exists().where(
+            LedgerRollupWatermark.owner_id == LedgerEntry.owner_id,
+            LedgerRollupWatermark.entry_id >= LedgerEntry.id
+        )
+    )
+    written: List[str] = []
+    while True:
+        rows = (await session.execute(
+            select(
+                LedgerEntry.id,
+                LedgerEntry.owner_id,
+                LedgerEntry.operation,
+                LedgerEntry.amount,
+                LedgerEntry.nonce,
+                LedgerEntry.created_at,
+                LedgerEntry.app_id
+            )
+            .where(*covered)
+            .order_by(LedgerEntry.id)
+            .limit(segment_size)
+        )).all()
+        if not rows:
+            await session.rollback()
+            return written
+
+        first_id, last_id = rows[0].id, rows[-1].id
+        name = f"segment-{first_id:012d}-{last_id:012d}{SEGMENT_SUFFIX}"
+        path = os.path.join(directory, name)
+        write_segment(path, rows)
+        try:
+            deleted = await session.execute(
+                delete(LedgerEntry).where(LedgerEntry.id.between(first_id, last_id), *covered)
+            )
+            if deleted.rowcount != len(rows):
+                raise RuntimeError(
+                    f"{deleted.rowcount} entries matched for deletion, {len(rows)} were archived; retry the archive"
+                )
+            await session.execute(insert(LedgerArchiveSummary), summarize_entries(name, rows))
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            os.remove(path)
+            raise
+        written.append(path)
+
+
+async def rebuild_archive_summaries(session: AsyncSession, directory: str) -> int:
+    """
+    Recompute the summary rows of every segment from its records.
+
+    Summaries recorded before they had an app ID attribute every archived
+    entry to the core app; rebuilding splits them by the app stored with
+    each record. Each segment keeps its original archive time.
+
+    Args:
+        session: Database session without an open transaction
+        directory: Directory holding the segment files
+
+    Returns:
+        Number of segments summarized
+    """
+    with LedgerArchive(directory) as archive:
+        try:
+            for segment in archive.segments:
+                name = os.path.basename(segment.path)
+                archived_at = await session.scalar(
+                    select(func.min(LedgerArchiveSummary.archived_at)).where(LedgerArchiveSummary.segment == name)
+                )
+                summaries = summarize_entries(
+                    name,
+                    (entry for owner_id in segment.owners for entry in segment.history(owner_id))
+                )
+                if archived_at is not None:
+                    for summary in summaries:
+                        summary["archived_at"] = archived_at
+                await session.execute(delete(LedgerArchiveSummary).where(LedgerArchiveSummary.segment == name))
+                await session.execute(insert(LedgerArchiveSummary), summaries)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        return len(archive.segments)
@@ -0,0 +1,224 @@
+"""
+In-process caches, including the balance cache with cross-worker invalidation.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+from sqlalchemy import func, literal
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+# Postgres NOTIFY channel carrying "<instance id>:<owner id>" payloads
+BALANCE_CHANNEL = "ledger_balance"
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters for cache effectiveness.
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class LRUCache:
+    """
+    Bounded LRU cache with a time-to-live.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0) -> None:
+        """
+        Args:
+            max_size: Maximum number of keys to cache; 0 disables the cache
+            ttl: Seconds a cached value stays valid
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Returns:
+            The cached value, or None if absent or expired
+        """
+        cached = self._entries.get(key)
+        if cached is None or cached[1] < time.monotonic():
+            if cached is not None:
+                del self._entries[key]
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return cached[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a value, evicting the least recently used entries."""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached value."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class BalanceCache(LRUCache):
+    """
+    LRU cache of owner balances keyed by owner ID.
+
+    Writes update the cache after they commit. When ``broadcast`` is enabled,
+    writes also emit a NOTIFY so other workers drop their cached balance for
+    the owner; see BalanceCacheListener.
+
+    Balances read from the database are cached with fill, which drops them
+    if the owner's balance was written or invalidated since the read began,
+    so a read racing a write cannot cache the balance from before it.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0) -> None:
+        """
+        Args:
+            max_size: Maximum number of owners to cache; 0 disables the cache
+            ttl: Seconds a cached balance stays valid
+        """
+        super().__init__(max_size, ttl)
+        self.broadcast = False
+        self.instance_id = uuid.uuid4().hex
+        # Generation of the last change to each recently changed owner. Older
+        # changes are forgotten in LRU order, keeping only the newest of them.
+        self._generation = 0
+        self._changes: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._forgotten = 0
+
+    def _changed(self, key: Hashable) -> None:
+        self._generation += 1
+        self._changes[key] = self._generation
+        self._changes.move_to_end(key)
+        while len(self._changes) > self.max_size:
+            self._forgotten = self._changes.popitem(last=False)[1]
+
+    def generation(self) -> int:
+        """Get the current generation, to be taken before reading balances to fill the cache."""
+        return self._generation
+
+    def fill(self, key: Hashable, value: Any, generation: int) -> bool:
+        """
+        Cache a balance read from the database, unless it changed since.
+
+        Args:
+            key: Owner ID
+            value: Balance read
+            generation: Result of generation() taken before the read
+
+        Returns:
+            Whether the balance was cached
+        """
+        if self._changes.get(key, self._forgotten) > generation:
+            return False
+        super().set(key, value)
+        return True
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache a balance written by this worker."""
+        self._changed(key)
+        super().set(key, value)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached balance, and any balance being read for the owner."""
+        self._changed(key)
+        super().invalidate(key)
+
+    def clear(self) -> None:
+        """Drop all cached balances, and any balance being read."""
+        self._generation += 1
+        self._changes.clear()
+        self._forgotten = self._generation
+        super().clear()
+
+    def notification(self, owner_id: Any) -> Optional[Any]:
+        """
+        Build a pg_notify call announcing a balance change to other workers.
+
+        Meant to be added to the RETURNING clause of the balance upsert, so the
+        notification costs no extra round trip and is delivered on commit.
+
+        Args:
+            owner_id: Owner ID value or column of the changed balance
+
+        Returns:
+            The pg_notify expression, or None when broadcasting is disabled
+        """
+        if not self.broadcast:
+            return None
+        return func.pg_notify(BALANCE_CHANNEL, literal(f"{self.instance_id}:").concat(owner_id)).label("notified")
+
+
+class BalanceCacheListener:
+    """
+    Invalidates cached balances when other workers change them.
+
+    Holds a dedicated connection that LISTENs on the balance channel, and
+    enables ``broadcast`` on the cache so local writes notify other workers.
+    """
+
+    def __init__(self, engine: AsyncEngine, cache: Optional[BalanceCache] = None) -> None:
+        """
+        Args:
+            engine: Engine to open the listening connection from
+            cache: Cache to invalidate; defaults to the shared balance cache
+        """
+        self.engine = engine
+        self.cache = cache if cache is not None else balance_cache
+        self._connection: Optional[AsyncConnection] = None
+
+    async def start(self) -> None:
+        """Open the listening connection and start broadcasting local writes."""
+        self._connection = await self.engine.connect()
+        raw_connection = await self._connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        await driver_connection.add_listener(BALANCE_CHANNEL, self._on_notification)
+        driver_connection.add_termination_listener(self._on_termination)
+        self.cache.broadcast = True
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._connection is None:
+            return
+        raw_connection = await self._connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        driver_connection.remove_termination_listener(self._on_termination)
+        await driver_connection.remove_listener(BALANCE_CHANNEL, self._on_notification)
+        await self._connection.close()
+        self._connection = None
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        instance_id, _, owner_id = payload.partition(":")
+        if instance_id != self.cache.instance_id:
+            self.cache.invalidate(owner_id)
+
+    def _on_termination(self, connection: Any) -> None:
+        # Invalidations can no longer be received, so stop serving cached balances
+        self.cache.clear()
+        self.cache.max_size = 0
+
+
+# Shared cache consulted by get_balance and updated by ledger writes
+balance_cache = BalanceCache()
@@ -0,0 +1,227 @@
+"""
+Balance checkpoints bounding the cost of deriving balances from the ledger.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.balance import BalanceCheckpoint, OwnerBalance
+from ..models.ledger import LedgerEntry
+from .dialect import begin_write, insert
+
+logger = logging.getLogger(__name__)
+
+# Owners advanced per transaction by the checkpoint job
+CHECKPOINT_CHUNK_SIZE = 500
+
+
+@dataclass
+class CheckpointReport:
+    """
+    Outcome of one checkpoint job run.
+    """
+    owners: int = 0
+    entries: int = 0
+    # Owners whose materialized balance disagrees with the ledger, as
+    # (materialized balance, ledger balance)
+    drift: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+
+async def get_ledger_balance(
+    session: AsyncSession,
+    owner_id: str
+) -> int:
+    """
+    Derive an owner's balance from the ledger.
+
+    Reads the owner's checkpoint and sums only the entries written after it,
+    in a single statement, so the cost depends on the entries since the last
+    checkpoint job run rather than on the whole history. Used to audit the
+    materialized balance; serve reads with get_balance.
+
+    Args:
+        session: Database session
+        owner_id: ID of the owner
+
+    Returns:
+        The balance according to the ledger entries
+    """
+    checkpoint_entry_id = select(BalanceCheckpoint.entry_id).where(
+        BalanceCheckpoint.owner_id == owner_id
+    ).scalar_subquery()
+    checkpoint_balance = select(BalanceCheckpoint.balance).where(
+        BalanceCheckpoint.owner_id == owner_id
+    ).scalar_subquery()
+    tail = select(func.coalesce(func.sum(LedgerEntry.amount), 0)).where(
+        LedgerEntry.owner_id == owner_id,
+        LedgerEntry.id > func.coalesce(checkpoint_entry_id, 0)
+    ).scalar_subquery()
+    result = await session.execute(select(func.coalesce(checkpoint_balance, 0) + tail))
+    return result.scalar_one()
+
+
+async def _advance_owners(
+    session: AsyncSession,
+    owner_ids: List[str],
+    report: CheckpointReport
+) -> None:
+    # Writers lock the balance row before inserting an entry and hold the lock
+    # until commit. Holding the same locks here means every entry of these
+    # owners is either committed and visible, or not yet assigned an id, so
+    # no entry can later appear below the new checkpoint.
+    await begin_write(session)
+    result = await session.execute(
+        select(OwnerBalance.owner_id, OwnerBalance.balance)
+        .where(OwnerBalance.owner_id.in_(owner_ids))
+        .order_by(OwnerBalance.owner_id)
+        .with_for_update()
+    )
+    materialized = {row.owner_id: row.balance for row in result}
+
+    result = await session.execute(
+        select(
+            LedgerEntry.owner_id,
+            func.max(LedgerEntry.id).label("entry_id"),
+            func.sum(LedgerEntry.amount).label("amount"),
+            func.count().label("entries"),
+            func.coalesce(BalanceCheckpoint.balance, 0).label("checkpoint_balance")
+        )
+        .outerjoin(BalanceCheckpoint, BalanceCheckpoint.owner_id == LedgerEntry.owner_id)
+        .where(
+            LedgerEntry.owner_id.in_(owner_ids),
+            LedgerEntry.id > func.coalesce(BalanceCheckpoint.entry_id, 0)
+        )
+        .group_by(LedgerEntry.owner_id, BalanceCheckpoint.balance)
+    )
+    checkpoints = []
+    for row in result:
+        checkpoints.append({
+            "owner_id": row.owner_id,
+            "entry_id": row.entry_id,
+            "balance": row.checkpoint_balance + row.amount
+        })
+        report.entries += row.entries
+    if not checkpoints:
+        return
+
+    stmt = insert(session, BalanceCheckpoint).values(checkpoints)
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[BalanceCheckpoint.owner_id],
+            set_={
+                "entry_id": stmt.excluded.entry_id,
+                "balance": stmt.excluded.balance,
+                "updated_at": func.now()
+            }
+        )
+    )
+    report.owners += len(checkpoints)
+    for checkpoint in checkpoints:
+        owner_id = checkpoint["owner_id"]
+        if materialized.get(owner_id, 0) != checkpoint["balance"]:
+            report.drift[owner_id] = (materialized.get(owner_id, 0), checkpoint["balance"])
+
+
+async def advance_balance_checkpoints(
+    session: AsyncSession,
+    chunk_size: int = CHECKPOINT_CHUNK_SIZE
+) -> CheckpointReport:
+    """
+    Advance the checkpoints of all owners with entries past their checkpoint.
+
+    Owners are processed in chunks, each in its own short transaction that
+    locks the chunk's balance rows, so the job can run while writes continue.
+    Every advanced checkpoint is compared with the materialized balance and
+    disagreements are reported as drift.
+
+    Args:
+        session: Database session without an open transaction
+        chunk_size: Number of owners advanced per transaction
+
+    Returns:
+        CheckpointReport with the number of owners and entries covered, and any drift
+    """
+    report = CheckpointReport()
+    last_owner_id: Optional[str] = None
+    while True:
+        stale = exists().where(
+            LedgerEntry.owner_id == OwnerBalance.owner_id,
+            LedgerEntry.id > func.coalesce(BalanceCheckpoint.entry_id, 0)
+        )
+        stmt = (
+            select(OwnerBalance.owner_id)
+            .outerjoin(BalanceCheckpoint, BalanceCheckpoint.owner_id == OwnerBalance.owner_id)
+            .where(stale)
+            .order_by(OwnerBalance.owner_id)
+            .limit(chunk_size)
+        )
+        if last_owner_id is not None:
+            stmt = stmt.where(OwnerBalance.owner_id > last_owner_id)
+        owner_ids = list((await session.execute(stmt)).scalars())
+        if not owner_ids:
+            await session.rollback()
+            break
+        try:
+            await _advance_owners(session, owner_ids, report)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        last_owner_id = owner_ids[-1]
+
+    for owner_id, (materialized, ledger) in report.drift.items():
+        logger.warning("Balance drift for %s: materialized %s, ledger %s", owner_id, materialized, ledger)
+    return report
+
+
+class BalanceCheckpointer:
+    """
+    Runs the checkpoint job periodically in the background.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 300.0
+    ) -> None:
+        """
+        Args:
+            session_factory: Factory for the sessions used by the job
+            interval: Seconds between job runs
+        """
+        self.session_factory = session_factory
+        self.interval = interval
+        self.last_report: Optional[CheckpointReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start running the job in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background job, waiting for a running pass to be cancelled."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    self.last_report = await advance_balance_checkpoints(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Balance checkpoint job failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,164 @@
+"""
+Group-commit coalescing of concurrent ledger writes.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple, Type
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..operations.base import BaseLedgerOperations
+from ..schemas.ledger import LedgerEntryCreate, LedgerOperationResponse
+from .ledger import process_ledger_operations_batch
+from .metrics import coalesced_batch_size, coalesced_queue_wait_seconds
+
+_PendingWrite = Tuple[LedgerEntryCreate, "asyncio.Future[LedgerOperationResponse]", float]
+
+
+@dataclass
+class CoalescerMetrics:
+    """
+    Counters describing how well concurrent writes are being coalesced.
+
+    Kept per coalescer; the same observations are exported as histograms
+    on /metrics, see utils.metrics.
+    """
+    batches: int = 0
+    entries: int = 0
+    max_batch_size: int = 0
+    queue_wait_seconds_total: float = 0.0
+    queue_wait_seconds_max: float = 0.0
+
+    def observe(self, batch_size: int, queue_waits: List[float]) -> None:
+        """Record one flushed batch and the time each of its entries waited."""
+        self.batches += 1
+        self.entries += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.queue_wait_seconds_total += sum(queue_waits)
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, *queue_waits)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.entries / self.batches if self.batches else 0.0
+
+
+class LedgerWriteCoalescer:
+    """
+    Collects concurrent ledger writes and commits them in shared transactions.
+
+    Entries submitted within ``flush_interval`` seconds of each other, up to
+    ``max_batch_size`` entries, are written together with
+    process_ledger_operations_batch in best-effort mode. Each caller still
+    receives its own result or error.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_batch_size: int = 100,
+        flush_interval: float = 0.005
+    ) -> None:
+        """
+        Args:
+            session_factory: Factory for the sessions used to write batches
+            max_batch_size: Number of pending entries that triggers an immediate flush
+            flush_interval: Seconds to wait for more entries before flushing
+        """
+        self.session_factory = session_factory
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.metrics = CoalescerMetrics()
+        self._pending: Dict[Type[BaseLedgerOperations], List[_PendingWrite]] = {}
+        self._timers: Dict[Type[BaseLedgerOperations], asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entry: LedgerEntryCreate
+    ) -> LedgerOperationResponse:
+        """
+        Queue an entry and wait for the batch that writes it.
+
+        Args:
+            operations: Operations class containing configuration
+            entry: Entry to process
+
+        Returns:
+            LedgerOperationResponse with operation result
+
+        Raises:
+            ValueError: If operation is invalid
+            InsufficientCreditsError: If user has insufficient credits
+            DuplicateTransactionError: If transaction is a duplicate
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[LedgerOperationResponse] = loop.create_future()
+        pending = self._pending.setdefault(operations, [])
+        pending.append((entry, future, time.monotonic()))
+
+        if len(pending) >= self.max_batch_size:
+            self._schedule_flush(operations)
+        elif operations not in self._timers:
+            self._timers[operations] = loop.call_later(
+                self.flush_interval, self._schedule_flush, operations
+            )
+
+        return await future
+
+    async def close(self) -> None:
+        """Flush all pending entries and wait for in-flight batches."""
+        for operations in list(self._pending):
+            self._schedule_flush(operations)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _schedule_flush(self, operations: Type[BaseLedgerOperations]) -> None:
+        timer = self._timers.pop(operations, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(operations, None)
+        if not batch:
+            return
+        task = asyncio.create_task(self._flush(operations, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(
+        self,
+        operations: Type[BaseLedgerOperations],
+        batch: List[_PendingWrite]
+    ) -> None:
+        started = time.monotonic()
+        queue_waits = [started - enqueued for _, _, enqueued in batch]
+        self.metrics.observe(len(batch), queue_waits)
+        coalesced_batch_size.observe(len(batch), app=operations.APP_ID)
+        for queue_wait in queue_waits:
+            coalesced_queue_wait_seconds.observe(queue_wait, app=operations.APP_ID)
+
+        try:
+            async with self.session_factory() as session:
+                results = await process_ledger_operations_batch(
+                    session,
+                    operations,
+                    [entry for entry, _, _ in batch]
+                )
+            for (_, future, _), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # A flush cancelled during shutdown must not leave its callers
+            # waiting; the batch may or may not have been committed
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Write coalescer stopped before the batch finished"))
@@ -0,0 +1,85 @@
+"""
+Statement helpers for the supported database backends, Postgres and SQLite.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def is_sqlite(session: AsyncSession) -> bool:
+    """Check whether a session writes to an embedded SQLite database."""
+    return session.get_bind().dialect.name == "sqlite"
+
+
+def insert(session: AsyncSession, table: Any) -> Any:
+    """
+    Build an INSERT supporting ON CONFLICT for the session's backend.
+
+    Both dialects' statements offer on_conflict_do_nothing,
+    on_conflict_do_update, excluded, and RETURNING.
+
+    Args:
+        session: Session the statement will run on
+        table: Table or mapped class to insert into
+    """
+    if is_sqlite(session):
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+def expires_at(session: AsyncSession, retention: timedelta) -> Any:
+    """
+    Get the time a record kept for the retention window expires.
+
+    Postgres uses its own clock. SQLite has no interval arithmetic, so the
+    expiry is computed here in UTC, which CURRENT_TIMESTAMP also uses.
+    """
+    if is_sqlite(session):
+        return datetime.now(timezone.utc) + retention
+    return func.now() + retention
+
+
+def utc_hour(session: AsyncSession, column: Any) -> Any:
+    """
+    Truncate a timestamp column to the start of its UTC hour.
+
+    Postgres returns a timestamp with time zone. SQLite returns text in UTC,
+    which as_utc converts.
+    """
+    if is_sqlite(session):
+        return func.strftime("%Y-%m-%d %H:00:00", column)
+    return func.date_trunc("hour", column, "UTC")
+
+
+def as_utc(value: Any) -> datetime:
+    """Convert a timestamp read from either backend to an aware UTC datetime."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+# Connection execution option making SQLite begin with BEGIN IMMEDIATE; see begin_write
+BEGIN_IMMEDIATE_OPTION = "ledger_begin_immediate"
+
+
+async def begin_write(session: AsyncSession) -> None:
+    """
+    Begin the session's transaction as a write transaction.
+
+    On SQLite, takes the database write lock up front, waiting for the
+    busy timeout if another connection holds it. A transaction that reads
+    first and then writes could instead fail right away when it upgrades
+    its lock, as waiting could deadlock. Has no effect on Postgres or when
+    a transaction is already open.
+
+    Args:
+        session: Session about to write
+    """
+    if is_sqlite(session) and not session.in_transaction():
+        await session.connection(execution_options={BEGIN_IMMEDIATE_OPTION: True})
@@ -0,0 +1,188 @@
+"""
+Streaming export of ledger entries.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Optional, Sequence, Union
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.ledger import LedgerEntry
+from .ledger import LedgerStore
+
+# Chunks of exported rows, each row holding the EXPORT_COLUMNS in order
+RowChunks = AsyncIterator[Sequence[Sequence[Any]]]
+
+# app_id comes last so consumers reading columns by position keep working
+EXPORT_COLUMNS = ("id", "owner_id", "operation", "amount", "nonce", "created_at", "updated_at", "app_id")
+
+# Rows fetched from the server-side cursor per chunk
+EXPORT_CHUNK_SIZE = 5000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def build_export_query(
+    owner_id: Optional[str] = None,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None
+) -> Select:
+    """
+    Build the query selecting exported entries in id order.
+
+    Args:
+        owner_id: Only export entries of this owner
+        operation: Only export entries of this operation
+        since: Only export entries created at or after this time
+        until: Only export entries created before this time
+        app_id: Only export entries written by this app
+
+    Returns:
+        Select statement over the export columns
+    """
+    stmt = select(*(getattr(LedgerEntry, column) for column in EXPORT_COLUMNS))
+    if app_id is not None:
+        stmt = stmt.where(LedgerEntry.app_id == app_id)
+    if owner_id is not None:
+        stmt = stmt.where(LedgerEntry.owner_id == owner_id)
+    if operation is not None:
+        stmt = stmt.where(LedgerEntry.operation == operation)
+    if since is not None:
+        stmt = stmt.where(LedgerEntry.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(LedgerEntry.created_at < until)
+    return stmt.order_by(LedgerEntry.id)
+
+
+async def stream_entry_rows(
+    session: AsyncSession,
+    stmt: Select,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream rows of a query in chunks through a server-side cursor.
+
+    Only one chunk is held in memory at a time, whatever the result size.
+    If the session has no transaction yet, the rows are read in a repeatable
+    read transaction, so the export is a consistent snapshot even while
+    writes continue.
+
+    Args:
+        session: Database session
+        stmt: Query to stream
+        chunk_size: Number of rows fetched per chunk
+
+    Yields:
+        Chunks of result rows
+    """
+    owns_transaction = not session.in_transaction()
+    if owns_transaction:
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            yield partition
+    finally:
+        if owns_transaction:
+            await session.rollback()
+
+
+async def stream_store_rows(
+    store: LedgerStore,
+    owner_id: Optional[str] = None,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> RowChunks:
+    """
+    Stream the filtered entries of a LedgerStore in chunks of export rows.
+
+    Yields:
+        Chunks of rows holding the export columns
+    """
+    async for entries in store.iter_entries(owner_id, operation, since, until, app_id, chunk_size):
+        yield [tuple(getattr(entry, column) for column in EXPORT_COLUMNS) for entry in entries]
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def export_ndjson(rows: RowChunks) -> AsyncIterator[str]:
+    """
+    Export rows as newline-delimited JSON.
+
+    Yields:
+        One chunk of NDJSON lines per fetched chunk of rows
+    """
+    async for chunk in rows:
+        yield "".join(
+            json.dumps({column: _jsonable(value) for column, value in zip(EXPORT_COLUMNS, row)}) + "\n"
+            for row in chunk
+        )
+
+
+async def export_csv(rows: RowChunks) -> AsyncIterator[str]:
+    """
+    Export rows as CSV with a header line.
+
+    Yields:
+        The header, then one chunk of CSV lines per fetched chunk of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    async for chunk in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(tuple(_jsonable(value) for value in row) for row in chunk)
+        yield buffer.getvalue()
+
+
+def export_entries(
+    session: Union[AsyncSession, LedgerStore],
+    export_format: str,
+    owner_id: Optional[str] = None,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None
+) -> AsyncIterator[str]:
+    """
+    Export filtered ledger entries in the given format.
+
+    Args:
+        session: Database session, or a LedgerStore to read from
+        export_format: Either "ndjson" or "csv"
+        owner_id: Only export entries of this owner
+        operation: Only export entries of this operation
+        since: Only export entries created at or after this time
+        until: Only export entries created before this time
+        app_id: Only export entries written by this app
+
+    Returns:
+        Async iterator of text chunks
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if isinstance(session, LedgerStore):
+        rows = stream_store_rows(session, owner_id, operation, since, until, app_id)
+    else:
+        rows = stream_entry_rows(session, build_export_query(owner_id, operation, since, until, app_id))
+    return export_ndjson(rows) if export_format == "ndjson" else export_csv(rows)
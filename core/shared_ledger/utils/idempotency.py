@@ -0,0 +1,156 @@
+"""
+Replay of stored results for retried ledger operations.
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, List, Type
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.ledger import LedgerResponse
+from ..operations.base import BaseLedgerOperations
+from ..schemas.ledger import LedgerEntryCreate, LedgerOperationResponse
+from .cache import LRUCache
+from .dialect import expires_at
+
+# Rows deleted per transaction when purging expired responses
+RESPONSE_PURGE_CHUNK_SIZE = 10000
+
+# Front cache of recent results keyed by nonce hash. Results never change, so the
+# TTL only bounds memory; keep it below the shortest retention window.
+response_cache = LRUCache(max_size=10000, ttl=300.0)
+
+
+def matches_request(response: LedgerOperationResponse, entry: LedgerEntryCreate) -> bool:
+    """Check whether a stored result was produced by the same request as an entry."""
+    return (
+        response.entry.owner_id == entry.owner_id
+        and response.entry.operation == entry.operation
+        and (entry.amount is None or response.entry.amount == entry.amount)
+    )
+
+
+async def find_responses(
+    session: AsyncSession,
+    operations: Type[BaseLedgerOperations],
+    entries: List[LedgerEntryCreate]
+) -> Dict[bytes, LedgerOperationResponse]:
+    """
+    Find the stored results of earlier requests with the same nonces.
+
+    Served from the front cache when possible; the rest are read with one
+    primary key lookup query. Results of a different request that reused
+    the nonce are not returned, so such entries stay duplicates.
+
+    Args:
+        session: Database session
+        operations: Operations class the entries are written with
+        entries: Entries whose nonces are already claimed
+
+    Returns:
+        Mapping from nonce hash to the original LedgerOperationResponse
+    """
+    keys = {operations.nonce_hash(entry.owner_id, entry.nonce): entry for entry in entries}
+    responses: Dict[bytes, LedgerOperationResponse] = {}
+    missing: List[bytes] = []
+    for key in keys:
+        cached = response_cache.get(key)
+        if cached is not None:
+            responses[key] = cached
+        else:
+            missing.append(key)
+
+    if missing:
+        result = await session.execute(
+            select(LedgerResponse.nonce_hash, LedgerResponse.response).where(
+                LedgerResponse.nonce_hash.in_(missing),
+                LedgerResponse.expires_at > func.now()
+            )
+        )
+        for row in result:
+            responses[row.nonce_hash] = LedgerOperationResponse.model_validate(row.response)
+            response_cache.set(row.nonce_hash, responses[row.nonce_hash])
+
+    return {
+        key: response
+        for key, response in responses.items()
+        if matches_request(response, keys[key])
+    }
+
+
+def response_values(
+    operations: Type[BaseLedgerOperations],
+    response: LedgerOperationResponse,
+    expiry: Any
+) -> Dict[str, Any]:
+    """Build the stored row for a result kept until the expiry, from dialect.expires_at."""
+    return {
+        "nonce_hash": operations.nonce_hash(response.entry.owner_id, response.entry.nonce),
+        "response": response.model_dump(mode="json"),
+        "expires_at": expiry
+    }
+
+
+async def store_responses(
+    session: AsyncSession,
+    operations: Type[BaseLedgerOperations],
+    responses: List[LedgerOperationResponse],
+    retention: timedelta
+) -> None:
+    """
+    Store results in the current transaction so retries can be replayed.
+
+    Add them to the front cache with remember_responses only after the
+    transaction commits.
+
+    Args:
+        session: Database session
+        operations: Operations class the entries are written with
+        responses: Results of the entries being written
+        retention: How long the results are kept
+    """
+    expiry = expires_at(session, retention)
+    await session.execute(
+        insert(LedgerResponse).values([
+            response_values(operations, response, expiry) for response in responses
+        ])
+    )
+
+
+def remember_responses(
+    operations: Type[BaseLedgerOperations],
+    responses: List[LedgerOperationResponse]
+) -> None:
+    """Add committed results to the front cache."""
+    for response in responses:
+        response_cache.set(operations.nonce_hash(response.entry.owner_id, response.entry.nonce), response)
+
+
+async def purge_expired_responses(
+    session: AsyncSession,
+    chunk_size: int = RESPONSE_PURGE_CHUNK_SIZE
+) -> int:
+    """
+    Delete stored results past their retention window.
+
+    Deletes in chunks, each in its own transaction, to keep locks short.
+    Nonces stay claimed, so expired requests are rejected as duplicates.
+
+    Args:
+        session: Database session without an open transaction
+        chunk_size: Number of rows deleted per transaction
+
+    Returns:
+        Number of results deleted
+    """
+    purged = 0
+    while True:
+        expired = select(LedgerResponse.nonce_hash).where(
+            LedgerResponse.expires_at <= func.now()
+        ).limit(chunk_size)
+        result = await session.execute(delete(LedgerResponse).where(LedgerResponse.nonce_hash.in_(expired)))
+        await session.commit()
+        purged += result.rowcount
+        if result.rowcount < chunk_size:
+            return purged
@@ -1,15 +1,31 @@
+from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Optional, Type, Dict, List
-from sqlalchemy import select, func
+from typing import Any, AsyncIterator, Optional, Type, Dict, List, Set, Tuple, Union
+from sqlalchemy import select, delete, func, exists, literal, true
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..models.ledger import LedgerEntry
-from ..operations.base import BaseLedgerOperations
+from ..models.archive import LedgerArchiveSummary
+from ..models.balance import OwnerBalance
+from ..models.ledger import LedgerEntry, LedgerNonce, LedgerResponse
+from ..operations.base import BaseLedgerOperations, LedgerIsolation, LedgerWriteMode
 from ..schemas.ledger import (
     LedgerEntryCreate,
+    LedgerEntryResponse,
     LedgerBalance,
-    LedgerOperationResponse
+    LedgerOperationResponse,
+    LedgerUsageSeries
 )
+from .cache import balance_cache
+from .dialect import begin_write, insert, is_sqlite
+from .idempotency import find_responses, remember_responses, store_responses
+from .locks import owner_locks
+from .metrics import write_errors_total, write_phase_seconds, writes_total
+from .replicas import is_replica_session
+from .retry import run_with_retries
+
+# Maximum number of owners per balance lookup query
+BALANCE_LOOKUP_CHUNK_SIZE = 1000
 
 class InsufficientCreditsError(Exception):
     """Raised when an operation would result in negative balance."""
@@ -19,34 +35,382 @@ class DuplicateTransactionError(Exception):
     """Raised when attempting to process a duplicate transaction."""
     pass
 
+class BatchAbortedError(Exception):
+    """Raised for valid entries of an atomic batch that was rolled back."""
+    pass
+
+class LedgerBatchResults(List[Union[LedgerOperationResponse, Exception]]):
+    """
+    The per-entry results of a batch, in entry order.
+    
+    committed is true only if the batch wrote at least one new entry;
+    replayed retries are results but were not written by this batch.
+    """
+    
+    def __init__(self, results: List[Union[LedgerOperationResponse, Exception]], committed: bool):
+        super().__init__(results)
+        self.committed = committed
+
+class LedgerStore(ABC):
+    """
+    Storage engine serving the ledger functions in place of a database session.
+    
+    An app chooses one by yielding it from its ``get_db`` dependency. The
+    functions of this module then delegate to it, with the same arguments,
+    results, and errors, so routers work unchanged. See utils.memory.
+    """
+    
+    @abstractmethod
+    async def get_balance(self, owner_id: str) -> LedgerBalance:
+        """Get the current balance of an owner."""
+    
+    @abstractmethod
+    async def get_balances(self, owner_ids: List[str]) -> Dict[str, LedgerBalance]:
+        """Get the current balances of many owners."""
+    
+    @abstractmethod
+    async def get_app_balance(self, owner_id: str, app_id: str) -> LedgerBalance:
+        """Get the part of an owner's balance from the entries of one app."""
+    
+    @abstractmethod
+    async def list_entries(
+        self,
+        owner_id: str,
+        cursor: Optional[int],
+        limit: int,
+        operation: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        app_id: Optional[str]
+    ) -> Tuple[List[Any], Optional[int]]:
+        """List a page of an owner's entries, newest first."""
+    
+    @abstractmethod
+    def iter_entries(
+        self,
+        owner_id: Optional[str],
+        operation: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        app_id: Optional[str],
+        chunk_size: int
+    ) -> AsyncIterator[List[Any]]:
+        """Iterate over the matching entries in id order, in chunks, for exports."""
+    
+    @abstractmethod
+    async def get_usage_stats(
+        self,
+        granularity: str,
+        since: datetime,
+        until: datetime,
+        app_id: Optional[str],
+        operation: Optional[str]
+    ) -> List[LedgerUsageSeries]:
+        """Get usage time series per app and operation in hourly or daily buckets."""
+    
+    @abstractmethod
+    async def process(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entry: LedgerEntryCreate
+    ) -> LedgerOperationResponse:
+        """Write one entry."""
+    
+    @abstractmethod
+    async def process_batch(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entries: List[LedgerEntryCreate],
+        atomic: bool
+    ) -> LedgerBatchResults:
+        """Write several entries."""
+
 async def get_balance(
-    session: AsyncSession,
-    owner_id: str
+    session: Union[AsyncSession, LedgerStore],
+    owner_id: str,
+    use_cache: bool = True
 ) -> LedgerBalance:
     """
     Get the current balance for an owner.
     
+    Served from the in-process balance cache when possible. Otherwise reads
+    the materialized balance row, so the cost is a single primary key lookup
+    no matter how many ledger entries the owner has.
+    
     Args:
-        session: Database session
+        session: Database session, or a LedgerStore to delegate to
         owner_id: ID of the owner
+        use_cache: Whether a cached balance may be returned. Write paths
+                   checking funds must read the database.
         
     Returns:
         LedgerBalance object containing current balance and last update time
     """
+    if isinstance(session, LedgerStore):
+        return await session.get_balance(owner_id)
+    
+    if use_cache:
+        cached = balance_cache.get(owner_id)
+        if cached is not None:
+            return cached
+    generation = balance_cache.generation()
+    
     result = await session.execute(
         select(
-            func.sum(LedgerEntry.amount).label("balance"),
-            func.max(LedgerEntry.created_at).label("last_updated")
-        ).where(LedgerEntry.owner_id == owner_id)
+            OwnerBalance.balance,
+            OwnerBalance.last_updated
+        ).where(OwnerBalance.owner_id == owner_id)
     )
     row = result.first()
     
+    if row is None:
+        balance = LedgerBalance(
+            owner_id=owner_id,
+            balance=0,
+            last_updated=datetime.utcnow()
+        )
+    else:
+        balance = LedgerBalance(
+            owner_id=owner_id,
+            balance=row.balance,
+            last_updated=row.last_updated
+        )
+    # Replicas may lag, and a stale balance must not outlive the lag in the cache
+    if use_cache and not is_replica_session(session):
+        balance_cache.fill(owner_id, balance, generation)
+    
+    return balance
+
+async def get_balances(
+    session: Union[AsyncSession, LedgerStore],
+    owner_ids: List[str]
+) -> Dict[str, LedgerBalance]:
+    """
+    Get the current balances for many owners.
+    
+    Cached balances are served from the balance cache; the rest are read with
+    one primary key lookup query per BALANCE_LOOKUP_CHUNK_SIZE owners.
+    
+    Args:
+        session: Database session, or a LedgerStore to delegate to
+        owner_ids: IDs of the owners
+        
+    Returns:
+        Mapping from each owner ID to its LedgerBalance, with a zero balance
+        for owners that have no ledger entries
+    """
+    if isinstance(session, LedgerStore):
+        return await session.get_balances(owner_ids)
+    
+    balances: Dict[str, LedgerBalance] = {}
+    missing: List[str] = []
+    for owner_id in dict.fromkeys(owner_ids):
+        cached = balance_cache.get(owner_id)
+        if cached is not None:
+            balances[owner_id] = cached
+        else:
+            missing.append(owner_id)
+    
+    for start in range(0, len(missing), BALANCE_LOOKUP_CHUNK_SIZE):
+        chunk = missing[start:start + BALANCE_LOOKUP_CHUNK_SIZE]
+        generation = balance_cache.generation()
+        result = await session.execute(
+            select(
+                OwnerBalance.owner_id,
+                OwnerBalance.balance,
+                OwnerBalance.last_updated
+            ).where(OwnerBalance.owner_id.in_(chunk))
+        )
+        found = {
+            row.owner_id: LedgerBalance(balance=row.balance, last_updated=row.last_updated)
+            for row in result
+        }
+        for owner_id in chunk:
+            balance = found.get(owner_id) or LedgerBalance(balance=0, last_updated=datetime.utcnow())
+            if not is_replica_session(session):
+                balance_cache.fill(owner_id, balance, generation)
+            balances[owner_id] = balance
+    
+    return {owner_id: balances[owner_id] for owner_id in owner_ids}
+
+async def get_app_balance(
+    session: Union[AsyncSession, LedgerStore],
+    owner_id: str,
+    app_id: str
+) -> LedgerBalance:
+    """
+    Get the part of an owner's balance from the entries of one app.
+    
+    Summed from the (app_id, owner_id) range of the entries index, which
+    carries the amounts, so no other app's entries are read, plus the
+    summaries of the app's entries moved to the archive; see utils.archive.
+    
+    Args:
+        session: Database session, or a LedgerStore to delegate to
+        owner_id: ID of the owner
+        app_id: APP_ID of the app
+        
+    Returns:
+        LedgerBalance with the app's total and the time of its last entry
+    """
+    if isinstance(session, LedgerStore):
+        return await session.get_app_balance(owner_id, app_id)
+    
+    # One statement, so entries being archived are counted exactly once
+    archived = (
+        select(func.sum(LedgerArchiveSummary.amount))
+        .where(LedgerArchiveSummary.owner_id == owner_id, LedgerArchiveSummary.app_id == app_id)
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        select(
+            func.sum(LedgerEntry.amount).label("balance"),
+            func.max(LedgerEntry.created_at).label("last_updated"),
+            archived.label("archived")
+        ).where(LedgerEntry.app_id == app_id, LedgerEntry.owner_id == owner_id)
+    )
+    row = result.one()
     return LedgerBalance(
-        owner_id=owner_id,
-        balance=row.balance or 0,
+        balance=(row.balance or 0) + (row.archived or 0),
         last_updated=row.last_updated or datetime.utcnow()
     )
 
+async def list_entries(
+    session: Union[AsyncSession, LedgerStore],
+    owner_id: str,
+    cursor: Optional[int] = None,
+    limit: int = 50,
+    operation: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    app_id: Optional[str] = None
+) -> Tuple[List[LedgerEntry], Optional[int]]:
+    """
+    List an owner's ledger entries, newest first, using keyset pagination.
+    
+    Pages are read from the (owner_id, id) index starting below the cursor,
+    or from the (app_id, owner_id, id) index when filtering by app, so the
+    cost of a page does not depend on how deep into history it is.
+    
+    Args:
+        session: Database session, or a LedgerStore to delegate to
+        owner_id: ID of the owner
+        cursor: Cursor returned with the previous page, if any
+        limit: Maximum number of entries to return
+        operation: Only return entries of this operation
+        since: Only return entries created at or after this time
+        until: Only return entries created before this time
+        app_id: Only return entries written by this app
+        
+    Returns:
+        The page of entries and the cursor of the next page, or None on the last page
+    """
+    if isinstance(session, LedgerStore):
+        return await session.list_entries(owner_id, cursor, limit, operation, since, until, app_id)
+    
+    stmt = select(LedgerEntry).where(LedgerEntry.owner_id == owner_id)
+    if app_id is not None:
+        stmt = stmt.where(LedgerEntry.app_id == app_id)
+    if cursor is not None:
+        stmt = stmt.where(LedgerEntry.id < cursor)
+    if operation is not None:
+        stmt = stmt.where(LedgerEntry.operation == operation)
+    if since is not None:
+        stmt = stmt.where(LedgerEntry.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(LedgerEntry.created_at < until)
+    
+    # Fetch one extra row to learn whether another page exists
+    result = await session.scalars(stmt.order_by(LedgerEntry.id.desc()).limit(limit + 1))
+    entries = list(result)
+    if len(entries) > limit:
+        entries = entries[:limit]
+        return entries, entries[-1].id
+    
+    return entries, None
+
+async def apply_balance_delta(
+    session: AsyncSession,
+    owner_id: str,
+    amount: int
+) -> LedgerBalance:
+    """
+    Add an amount to the materialized balance of an owner.
+    
+    Must run in the same transaction as the ledger entry insert it accounts
+    for, so the balance row never drifts from the ledger.
+    
+    Args:
+        session: Database session
+        owner_id: ID of the owner
+        amount: Signed amount to add to the balance
+        
+    Returns:
+        LedgerBalance object containing the balance after applying the amount
+    """
+    stmt = insert(session, OwnerBalance).values(owner_id=owner_id, balance=amount)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[OwnerBalance.owner_id],
+        set_={
+            "balance": OwnerBalance.balance + stmt.excluded.balance,
+            "last_updated": func.now(),
+        }
+    ).returning(OwnerBalance.balance, OwnerBalance.last_updated)
+    notification = balance_cache.notification(OwnerBalance.owner_id)
+    if notification is not None:
+        stmt = stmt.returning(notification)
+    row = (await session.execute(stmt)).one()
+    return LedgerBalance(balance=row.balance, last_updated=row.last_updated)
+
+async def lock_balance(
+    session: AsyncSession,
+    owner_id: str
+) -> int:
+    """
+    Read an owner's balance and lock its row until the transaction ends.
+    
+    Args:
+        session: Database session
+        owner_id: ID of the owner
+        
+    Returns:
+        The current balance; 0 for owners without a balance row, who have
+        nothing to spend
+    """
+    result = await session.execute(
+        select(OwnerBalance.balance)
+        .where(OwnerBalance.owner_id == owner_id)
+        .with_for_update()
+    )
+    return result.scalar() or 0
+
+async def claim_nonces(
+    session: AsyncSession,
+    nonce_hashes: List[bytes]
+) -> Set[bytes]:
+    """
+    Claim transaction nonces in the nonce registry.
+    
+    Claims become permanent when the transaction commits and are released if
+    it rolls back. A nonce being claimed by a concurrent transaction blocks
+    until that transaction finishes, so each nonce is claimed at most once.
+    
+    Args:
+        session: Database session
+        nonce_hashes: Distinct nonce hashes to claim, from BaseLedgerOperations.nonce_hash
+        
+    Returns:
+        The nonce hashes that were claimed; the others are already in use
+    """
+    result = await session.execute(
+        insert(session, LedgerNonce)
+        # Sorted so concurrent claims of overlapping nonces cannot deadlock
+        .values([{"nonce_hash": nonce_hash} for nonce_hash in sorted(nonce_hashes)])
+        .on_conflict_do_nothing()
+        .returning(LedgerNonce.nonce_hash)
+    )
+    return set(result.scalars())
+
 async def validate_operation(
     session: AsyncSession,
     operations: Type[BaseLedgerOperations],
@@ -66,36 +430,198 @@ async def validate_operation(
         DuplicateTransactionError: If transaction is a duplicate
     """
     # Validate operation exists in configuration
-    operation_config = operations.get_operation_config()
+    operation_config = operations.operation_table()
     if entry.operation not in operation_config:
         raise ValueError(f"Invalid operation: {entry.operation}")
     
     # Check for duplicate nonce
     result = await session.execute(
-        select(LedgerEntry).where(LedgerEntry.nonce == entry.nonce)
+        select(LedgerNonce).where(
+            LedgerNonce.nonce_hash == operations.nonce_hash(entry.owner_id, entry.nonce)
+        )
     )
     if result.first() is not None:
         raise DuplicateTransactionError(f"Duplicate transaction: {entry.nonce}")
     
     # For debit operations, check sufficient balance
     if operation_config.get(entry.operation, 0) < 0:
-        balance = await get_balance(session, entry.owner_id)
+        balance = await get_balance(session, entry.owner_id, use_cache=False)
         if balance.balance + entry.amount < 0:
             raise InsufficientCreditsError(
                 f"Insufficient credits. Required: {abs(entry.amount)}, "
                 f"Available: {balance.balance}"
             )
 
-async def process_ledger_operation(
+def resolve_operation_amount(
+    operations: Type[BaseLedgerOperations],
+    entry: LedgerEntryCreate
+) -> int:
+    """
+    Resolve the amount to record for an entry.
+    
+    Args:
+        operations: Operations class containing configuration
+        entry: Entry to resolve the amount for
+        
+    Returns:
+        The entry amount if given, otherwise the configured operation amount
+        
+    Raises:
+        ValueError: If operation is invalid
+    """
+    operation_config = operations.operation_table()
+    if entry.operation not in operation_config:
+        raise ValueError(f"Invalid operation: {entry.operation}")
+    return entry.amount if entry.amount is not None else operation_config[entry.operation]
+
+async def _process_in_single_statement(
     session: AsyncSession,
     operations: Type[BaseLedgerOperations],
+    entry: LedgerEntryCreate,
+    operation_amount: int
+) -> LedgerOperationResponse:
+    """
+    Write a ledger entry with one statement followed by the commit.
+    
+    The nonce is claimed first. The balance upsert only runs for a claimed
+    nonce and only applies when the owner can afford the amount; the funds
+    guard is re-evaluated against the locked balance row, so concurrent
+    debits cannot overdraw. The entry is inserted after the balance row is
+    locked, and the outcome of every step is read back in the same round
+    trip. A failed step rolls the whole statement back.
+    
+    Args:
+        session: Database session
+        operations: Operations class containing configuration
+        entry: Entry to process
+        operation_amount: Resolved amount for the entry
+        
+    Returns:
+        LedgerOperationResponse with operation result
+        
+    Raises:
+        InsufficientCreditsError: If user has insufficient credits
+        DuplicateTransactionError: If transaction is a duplicate
+    """
+    balances = OwnerBalance.__table__
+    entries = LedgerEntry.__table__
+    nonces = LedgerNonce.__table__
+    nonce_hash = operations.nonce_hash(entry.owner_id, entry.nonce)
+    retention = operations.RESPONSE_RETENTION
+    
+    claimed = postgresql.insert(nonces).values(
+        nonce_hash=nonce_hash
+    ).on_conflict_do_nothing().returning(nonces.c.nonce_hash).cte("claimed_nonce")
+    
+    funds_guard = true()
+    if operation_amount < 0:
+        # Owners without a balance row have nothing to spend
+        funds_guard = exists().where(balances.c.owner_id == entry.owner_id)
+    balance_stmt = postgresql.insert(balances).from_select(
+        ["owner_id", "balance"],
+        select(literal(entry.owner_id), literal(operation_amount)).select_from(claimed).where(funds_guard)
+    )
+    balance_stmt = balance_stmt.on_conflict_do_update(
+        index_elements=[balances.c.owner_id],
+        set_={
+            "balance": balances.c.balance + balance_stmt.excluded.balance,
+            "last_updated": func.now(),
+        },
+        where=(balances.c.balance + balance_stmt.excluded.balance >= 0) if operation_amount < 0 else None
+    )
+    balance_stmt = balance_stmt.returning(balances.c.owner_id, balances.c.balance, balances.c.last_updated)
+    notification = balance_cache.notification(balances.c.owner_id)
+    if notification is not None:
+        balance_stmt = balance_stmt.returning(notification)
+    updated = balance_stmt.cte("updated_balance")
+    
+    inserted = postgresql.insert(entries).from_select(
+        ["app_id", "operation", "owner_id", "amount", "nonce"],
+        select(
+            literal(operations.APP_ID),
+            literal(entry.operation),
+            updated.c.owner_id,
+            literal(operation_amount),
+            literal(entry.nonce)
+        )
+    ).returning(*entries.c).cte("inserted_entry")
+    
+    anchor = select(literal(1).label("anchor")).subquery("anchor")
+    stmt = select(
+        *inserted.c,
+        updated.c.balance,
+        updated.c.last_updated.label("balance_updated"),
+        select(balances.c.balance).where(
+            balances.c.owner_id == entry.owner_id
+        ).scalar_subquery().label("available"),
+        claimed.c.nonce_hash.label("claimed")
+    ).select_from(
+        anchor.outerjoin(claimed, true()).outerjoin(updated, true()).outerjoin(inserted, true())
+    )
+    if retention is not None:
+        # Serialize the result in the database so storing it needs no extra round trip
+        stored = postgresql.insert(LedgerResponse.__table__).from_select(
+            ["nonce_hash", "response", "expires_at"],
+            select(
+                literal(nonce_hash),
+                func.json_build_object(
+                    "entry", func.json_build_object(
+                        *(part for column in LedgerEntryResponse.model_fields for part in (column, inserted.c[column]))
+                    ),
+                    "balance", updated.c.balance
+                ),
+                func.now() + retention
+            ).select_from(inserted.join(updated, true()))
+        ).returning(LedgerResponse.__table__.c.nonce_hash).cte("stored_response")
+        stmt = stmt.add_columns(stored.c.nonce_hash.label("stored")).outerjoin(stored, true())
+    with write_phase_seconds.time(phase="statement"):
+        row = (await session.execute(stmt)).one()
+    
+    if row.claimed is None:
+        raise DuplicateTransactionError(f"Transaction with nonce {entry.nonce} already exists")
+    if row.balance is None:
+        raise InsufficientCreditsError(
+            f"Insufficient credits: {row.available or 0} available, {abs(operation_amount)} needed"
+        )
+    
+    response = LedgerOperationResponse(
+        entry=LedgerEntryResponse.model_validate(row, from_attributes=True),
+        balance=row.balance
+    )
+    with write_phase_seconds.time(phase="commit"):
+        await session.commit()
+    balance_cache.set(entry.owner_id, LedgerBalance(balance=row.balance, last_updated=row.balance_updated))
+    if retention is not None:
+        remember_responses(operations, [response])
+    writes_total.inc(app=operations.APP_ID, operation=entry.operation)
+    
+    return response
+
+async def process_ledger_operation(
+    session: Union[AsyncSession, LedgerStore],
+    operations: Type[BaseLedgerOperations],
     entry: LedgerEntryCreate
 ) -> LedgerOperationResponse:
     """
     Process a ledger operation.
     
+    With the default ``LedgerIsolation.LOCKING``, writes for the same owner
+    are serialized: within the worker by the owner's striped lock, and across
+    workers by the balance row lock. With ``REPEATABLE_READ`` or
+    ``SERIALIZABLE`` no locks are taken; the transaction runs at that
+    isolation level and is retried with jittered backoff when it conflicts,
+    up to ``operations.MAX_WRITE_ATTEMPTS`` times. The write strategy is
+    taken from ``operations.WRITE_MODE``. When
+    ``operations.RESPONSE_RETENTION`` is set, the result is stored and a
+    retry of the same request with the same nonce returns it again instead
+    of raising DuplicateTransactionError.
+    
+    On SQLite every write takes the locking path in the standard write
+    mode: the database admits one writer at a time, which the nonce claim
+    that opens each write transaction waits for.
+    
     Args:
-        session: Database session
+        session: Database session, or a LedgerStore to delegate to
         operations: Operations class containing configuration
         entry: Entry to process
         
@@ -106,47 +632,277 @@ async def process_ledger_operation(
         ValueError: If operation is invalid
         InsufficientCreditsError: If user has insufficient credits
         DuplicateTransactionError: If transaction is a duplicate
+        DBAPIError: If an optimistic write still conflicts after the last attempt
+        RuntimeError: If an optimistic write is given a session with an open transaction
     """
+    if isinstance(session, LedgerStore):
+        return await session.process(operations, entry)
+    
+    if operations.ISOLATION == LedgerIsolation.LOCKING or is_sqlite(session):
+        async with owner_locks.hold(entry.owner_id):
+            return await _write_ledger_operation(session, operations, entry)
+    
+    return await run_with_retries(
+        session,
+        operations.ISOLATION.value,
+        lambda: _write_ledger_operation(session, operations, entry),
+        max_attempts=operations.MAX_WRITE_ATTEMPTS,
+        backoff=operations.RETRY_BACKOFF
+    )
+
+async def _write_ledger_operation(
+    session: AsyncSession,
+    operations: Type[BaseLedgerOperations],
+    entry: LedgerEntryCreate
+) -> LedgerOperationResponse:
+    """Write one ledger operation in a single transaction; see process_ledger_operation."""
+    retention = operations.RESPONSE_RETENTION
     try:
-        # Check for duplicate transaction
-        stmt = select(LedgerEntry).where(LedgerEntry.nonce == entry.nonce)
-        result = await session.execute(stmt)
-        if result.first() is not None:
+        await begin_write(session)
+        # SQLite cannot write from common table expressions
+        if operations.WRITE_MODE == LedgerWriteMode.SINGLE_STATEMENT and not is_sqlite(session):
+            operation_amount = resolve_operation_amount(operations, entry)
+            return await _process_in_single_statement(session, operations, entry, operation_amount)
+        
+        # Claim the nonce, rejecting duplicate transactions
+        with write_phase_seconds.time(phase="dedup"):
+            claimed = await claim_nonces(session, [operations.nonce_hash(entry.owner_id, entry.nonce)])
+        if not claimed:
             raise DuplicateTransactionError(f"Transaction with nonce {entry.nonce} already exists")
         
         # Get operation amount from configuration or entry
-        operation_config = operations.get_operation_config()
-        if entry.operation not in operation_config:
-            raise ValueError(f"Invalid operation: {entry.operation}")
-        operation_amount = entry.amount if entry.amount is not None else operation_config[entry.operation]
+        operation_amount = resolve_operation_amount(operations, entry)
         
         # Create new entry with configured amount
         db_entry = LedgerEntry(
+            app_id=operations.APP_ID,
             operation=entry.operation,
             owner_id=entry.owner_id,
             amount=operation_amount,
             nonce=entry.nonce
         )
         
-        # Check if operation would result in negative balance
+        # Check if operation would result in negative balance. When locking,
+        # hold the balance row lock until commit so concurrent debits wait
+        # here; otherwise the isolation level detects them and we retry.
         if operation_amount < 0:
-            current_balance = await get_balance(session, entry.owner_id)
-            if current_balance.balance + operation_amount < 0:
+            with write_phase_seconds.time(phase="balance_check"):
+                if operations.ISOLATION == LedgerIsolation.LOCKING or is_sqlite(session):
+                    available = await lock_balance(session, entry.owner_id)
+                else:
+                    available = (await get_balance(session, entry.owner_id, use_cache=False)).balance
+            if available + operation_amount < 0:
                 raise InsufficientCreditsError(
-                    f"Insufficient credits: {current_balance.balance} available, {abs(operation_amount)} needed"
+                    f"Insufficient credits: {available} available, {abs(operation_amount)} needed"
                 )
         
-        # Save entry and get updated balance
-        session.add(db_entry)
-        await session.commit()
-        await session.refresh(db_entry)
-        
-        current_balance = await get_balance(session, entry.owner_id)
+        # Update the materialized balance and save entry in one transaction
+        with write_phase_seconds.time(phase="post_balance"):
+            new_balance = await apply_balance_delta(session, entry.owner_id, operation_amount)
+        with write_phase_seconds.time(phase="insert"):
+            session.add(db_entry)
+            await session.flush()
         
-        return LedgerOperationResponse(
+        response = LedgerOperationResponse(
             entry=db_entry,
-            balance=current_balance.balance
+            balance=new_balance.balance
         )
-    except (ValueError, InsufficientCreditsError, DuplicateTransactionError) as e:
+        with write_phase_seconds.time(phase="commit"):
+            if retention is not None:
+                await store_responses(session, operations, [response], retention)
+            await session.commit()
+        balance_cache.set(entry.owner_id, new_balance)
+        if retention is not None:
+            remember_responses(operations, [response])
+        writes_total.inc(app=operations.APP_ID, operation=entry.operation)
+        
+        return response
+    except DuplicateTransactionError:
+        # Answer a retry of an earlier request with its original result
+        replay = None
+        if retention is not None:
+            replay = (await find_responses(session, operations, [entry])).get(
+                operations.nonce_hash(entry.owner_id, entry.nonce)
+            )
+        await session.rollback()
+        if replay is not None:
+            return replay
+        write_errors_total.inc(error=DuplicateTransactionError.__name__)
+        raise
+    except (ValueError, InsufficientCreditsError) as e:
         await session.rollback()
-        raise 
\ No newline at end of file
+        write_errors_total.inc(error=type(e).__name__)
+        raise
+
+async def process_ledger_operations_batch(
+    session: Union[AsyncSession, LedgerStore],
+    operations: Type[BaseLedgerOperations],
+    entries: List[LedgerEntryCreate],
+    atomic: bool = False
+) -> LedgerBatchResults:
+    """
+    Process several ledger operations in one transaction.
+    
+    Entries are validated in order against a single multi-row nonce claim and
+    a single locked read of the affected balances, then written with one
+    multi-row balance upsert and one multi-row entry insert. The striped
+    locks of all owners in the batch are held throughout.
+    
+    Args:
+        session: Database session, or a LedgerStore to delegate to
+        operations: Operations class containing configuration
+        entries: Entries to process, in order
+        atomic: If true, write nothing unless every entry is valid
+        
+    Returns:
+        LedgerBatchResults with one item per entry: the
+        LedgerOperationResponse for written entries and for retries replayed
+        as in process_ledger_operation, otherwise the ValueError,
+        InsufficientCreditsError, DuplicateTransactionError, or
+        BatchAbortedError explaining why the entry was not written. Its
+        committed flag tells whether any entry was written.
+    """
+    if isinstance(session, LedgerStore):
+        return await session.process_batch(operations, entries, atomic)
+    
+    retention = operations.RESPONSE_RETENTION
+    results: List[Union[LedgerOperationResponse, Exception, None]] = [None] * len(entries)
+    amounts: Dict[int, int] = {}
+    
+    nonce_hashes = [operations.nonce_hash(entry.owner_id, entry.nonce) for entry in entries]
+    
+    # Resolve amounts and reject nonces repeated within the batch
+    seen_nonces = set()
+    for index, entry in enumerate(entries):
+        try:
+            amounts[index] = resolve_operation_amount(operations, entry)
+        except ValueError as e:
+            results[index] = e
+            continue
+        if nonce_hashes[index] in seen_nonces:
+            results[index] = DuplicateTransactionError(f"Transaction with nonce {entry.nonce} already exists")
+            del amounts[index]
+        seen_nonces.add(nonce_hashes[index])
+    
+    async with owner_locks.hold(*(entry.owner_id for entry in entries)):
+        try:
+            await begin_write(session)
+            
+            # Claim the nonces, replaying retries and rejecting other reused nonces
+            if amounts:
+                claimed_nonces = await claim_nonces(session, [nonce_hashes[index] for index in amounts])
+                reused = [index for index in amounts if nonce_hashes[index] not in claimed_nonces]
+                replays = {}
+                if reused and retention is not None:
+                    replays = await find_responses(session, operations, [entries[index] for index in reused])
+                for index in reused:
+                    results[index] = replays.get(nonce_hashes[index]) or DuplicateTransactionError(
+                        f"Transaction with nonce {entries[index].nonce} already exists"
+                    )
+                    del amounts[index]
+            
+            # Lock the affected balances in a fixed order and apply entries in sequence
+            owner_ids = sorted({entries[index].owner_id for index in amounts})
+            balances: Dict[str, int] = dict.fromkeys(owner_ids, 0)
+            if owner_ids:
+                result = await session.execute(
+                    select(OwnerBalance.owner_id, OwnerBalance.balance)
+                    .where(OwnerBalance.owner_id.in_(owner_ids))
+                    .order_by(OwnerBalance.owner_id)
+                    .with_for_update()
+                )
+                balances.update({row.owner_id: row.balance for row in result})
+            unfunded_nonces: List[bytes] = []
+            for index in sorted(amounts):
+                owner_id = entries[index].owner_id
+                if amounts[index] < 0 and balances[owner_id] + amounts[index] < 0:
+                    results[index] = InsufficientCreditsError(
+                        f"Insufficient credits: {balances[owner_id]} available, {abs(amounts[index])} needed"
+                    )
+                    unfunded_nonces.append(nonce_hashes[index])
+                    del amounts[index]
+                    continue
+                balances[owner_id] += amounts[index]
+            
+            failed = any(isinstance(result, Exception) for result in results)
+            if not amounts or (atomic and failed):
+                await session.rollback()
+                results = [
+                    result if result is not None else BatchAbortedError("Batch rolled back: another entry failed")
+                    for result in results
+                ]
+                _count_batch_errors(results)
+                return LedgerBatchResults(results, committed=False)
+            
+            # Release the nonces of entries that will not be written
+            if unfunded_nonces:
+                await session.execute(delete(LedgerNonce).where(LedgerNonce.nonce_hash.in_(unfunded_nonces)))
+            
+            # Write the per-owner deltas first, then the entries
+            deltas: Dict[str, int] = {}
+            for index in amounts:
+                owner_id = entries[index].owner_id
+                deltas[owner_id] = deltas.get(owner_id, 0) + amounts[index]
+            stmt = insert(session, OwnerBalance).values([
+                {"owner_id": owner_id, "balance": deltas[owner_id]}
+                for owner_id in sorted(deltas)
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[OwnerBalance.owner_id],
+                set_={
+                    "balance": OwnerBalance.balance + stmt.excluded.balance,
+                    "last_updated": func.now(),
+                }
+            ).returning(OwnerBalance.owner_id, OwnerBalance.balance, OwnerBalance.last_updated)
+            notification = balance_cache.notification(OwnerBalance.owner_id)
+            if notification is not None:
+                stmt = stmt.returning(notification)
+            final_balances = {
+                row.owner_id: LedgerBalance(balance=row.balance, last_updated=row.last_updated)
+                for row in await session.execute(stmt)
+            }
+            
+            written = await session.scalars(
+                insert(session, LedgerEntry).returning(LedgerEntry, sort_by_parameter_order=True),
+                [
+                    {
+                        "app_id": operations.APP_ID,
+                        "operation": entries[index].operation,
+                        "owner_id": entries[index].owner_id,
+                        "amount": amounts[index],
+                        "nonce": entries[index].nonce,
+                    }
+                    for index in sorted(amounts)
+                ]
+            )
+            
+            # Walk backwards from each owner's final balance to the balance after each entry
+            running = {owner_id: balance.balance for owner_id, balance in final_balances.items()}
+            for index, db_entry in reversed(list(zip(sorted(amounts), written.all()))):
+                results[index] = LedgerOperationResponse(
+                    entry=db_entry,
+                    balance=running[db_entry.owner_id]
+                )
+                running[db_entry.owner_id] -= db_entry.amount
+            written_responses = [results[index] for index in sorted(amounts)]
+            if retention is not None:
+                await store_responses(session, operations, written_responses, retention)
+            await session.commit()
+            for owner_id, balance in final_balances.items():
+                balance_cache.set(owner_id, balance)
+            if retention is not None:
+                remember_responses(operations, written_responses)
+        except Exception:
+            await session.rollback()
+            raise
+    
+    for index in amounts:
+        writes_total.inc(app=operations.APP_ID, operation=entries[index].operation)
+    _count_batch_errors(results)
+    return LedgerBatchResults(results, committed=True)
+
+def _count_batch_errors(results: List[Union[LedgerOperationResponse, Exception, None]]) -> None:
+    """Count the entries of a batch that were not written, by error type."""
+    for result in results:
+        if isinstance(result, Exception):
+            write_errors_total.inc(error=type(result).__name__)
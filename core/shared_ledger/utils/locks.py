@@ -0,0 +1,55 @@
+"""
+In-process locks serializing ledger writes per owner.
+"""
+
+import asyncio
+import zlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
+
+
+class StripedLock:
+    """
+    Fixed set of asyncio locks shared by keys hashing to the same stripe.
+
+    Serializes concurrent writes for the same owner inside one worker, so they
+    queue here instead of on a database row lock. Writes for different owners
+    only wait for each other when their owners share a stripe.
+    """
+
+    def __init__(self, stripes: int = 1024) -> None:
+        """
+        Args:
+            stripes: Number of locks; more stripes mean fewer false conflicts
+        """
+        self._locks: List[asyncio.Lock] = [asyncio.Lock() for _ in range(stripes)]
+        self.contended = 0
+
+    def stripe(self, key: str) -> int:
+        """Get the index of the stripe guarding a key."""
+        return zlib.crc32(key.encode()) % len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, *keys: str) -> AsyncIterator[None]:
+        """
+        Hold the stripes of all keys.
+
+        Stripes are acquired in index order, so callers holding several keys
+        cannot deadlock each other.
+        """
+        acquired: List[asyncio.Lock] = []
+        try:
+            for index in sorted({self.stripe(key) for key in keys}):
+                lock = self._locks[index]
+                if lock.locked():
+                    self.contended += 1
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+# Shared per-owner write locks used by the ledger write paths
+owner_locks = StripedLock()
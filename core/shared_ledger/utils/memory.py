@@ -0,0 +1,460 @@
+"""
+In-memory ledger engine persisted to an append-only journal.
+
+For simulations and internal accounting where every entry fits in memory.
+Entries live in slotted objects indexed per owner, claimed nonces in a hash
+map, and balances are running totals, so every operation is a few
+dictionary lookups. Each committed write is appended to the journal before
+it is applied; on startup the journal is replayed through a memory map.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type, Union
+
+from ..operations.base import BaseLedgerOperations
+from ..schemas.ledger import (
+    LedgerBalance,
+    LedgerEntryCreate,
+    LedgerEntryResponse,
+    LedgerOperationResponse,
+    LedgerUsagePoint,
+    LedgerUsageSeries
+)
+from .idempotency import matches_request
+from .ledger import (
+    BatchAbortedError,
+    DuplicateTransactionError,
+    InsufficientCreditsError,
+    LedgerBatchResults,
+    LedgerStore,
+    resolve_operation_amount
+)
+from .metrics import write_errors_total, writes_total
+
+# First bytes of every journal file
+JOURNAL_MAGIC = b"LEDGJRN2"
+
+# Journal record: nonce hash, amount, creation time in epoch seconds, and the
+# UTF-8 lengths of the app ID, owner ID, operation, and nonce that follow it
+_RECORD = struct.Struct("<16sqdHHHH")
+
+
+class MemoryEntry:
+    """
+    Ledger entry held by MemoryLedger, with the owner's balance after it.
+    """
+    __slots__ = ("id", "app_id", "owner_id", "operation", "amount", "nonce", "timestamp", "balance")
+
+    def __init__(
+        self,
+        id: int,
+        app_id: str,
+        owner_id: str,
+        operation: str,
+        amount: int,
+        nonce: str,
+        timestamp: float,
+        balance: int
+    ) -> None:
+        self.id = id
+        self.app_id = app_id
+        self.owner_id = owner_id
+        self.operation = operation
+        self.amount = amount
+        self.nonce = nonce
+        self.timestamp = timestamp
+        self.balance = balance
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp, timezone.utc)
+
+    @property
+    def updated_at(self) -> datetime:
+        # Entries are never updated
+        return self.created_at
+
+    def __repr__(self) -> str:
+        return f"<MemoryEntry(id={self.id}, owner_id='{self.owner_id}', operation='{self.operation}', amount={self.amount})>"
+
+
+# Write accepted by MemoryLedger: nonce hash, app ID, owner ID, operation, amount, and nonce
+_Write = Tuple[bytes, str, str, str, int, str]
+
+
+class MemoryLedger(LedgerStore):
+    """
+    Ledger kept entirely in memory, optionally persisted to a journal file.
+
+    Serve it from an app's ``get_db`` dependency in place of a database
+    session. Writes are applied without awaiting in between, so each one is
+    atomic within the event loop. A journal file must only be open in one
+    process at a time. Nonces are claimed for good, so a request retried
+    after the retention window is rejected as a duplicate.
+    """
+
+    def __init__(self, journal_path: Optional[str] = None, fsync: bool = False) -> None:
+        """
+        Args:
+            journal_path: File the ledger is replayed from and appended to;
+                          None keeps the ledger in memory only
+            fsync: Whether every write waits for the journal to reach disk.
+                   Otherwise writes survive a process crash but not a power loss.
+        """
+        self.fsync = fsync
+        self._entries: List[MemoryEntry] = []
+        # Claimed nonce hash -> index of the entry, so retries can be replayed
+        self._nonces: Dict[bytes, int] = {}
+        # Owner ID -> ids of the owner's entries in ascending order
+        self._owner_entries: Dict[str, array] = {}
+        self._balances: Dict[str, int] = {}
+        # (app ID, owner ID) -> index of the app's last entry for the owner, and its total
+        self._app_balances: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        # (start of the UTC hour in epoch seconds, app ID, operation) -> [entries, amount]
+        self._hourly_usage: Dict[Tuple[int, str, str], List[int]] = {}
+        self._journal = None
+        if journal_path is not None:
+            self._replay(journal_path)
+            self._journal = open(journal_path, "ab")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """Close the journal file; the ledger stays readable."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _replay(self, path: str) -> None:
+        # Create the journal, or apply its records and drop a partial last
+        # record left by a crash during an append
+        with open(path, "a+b") as journal:
+            size = os.fstat(journal.fileno()).st_size
+            if size == 0:
+                journal.write(JOURNAL_MAGIC)
+                return
+            offset = len(JOURNAL_MAGIC)
+            with mmap.mmap(journal.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                if view[:offset] != JOURNAL_MAGIC:
+                    raise ValueError(f"{path} is not a ledger journal")
+                while offset + _RECORD.size <= size:
+                    nonce_hash, amount, timestamp, *lengths = _RECORD.unpack_from(view, offset)
+                    start = offset + _RECORD.size
+                    end = start + sum(lengths)
+                    if end > size:
+                        break
+                    strings = []
+                    for length in lengths:
+                        strings.append(view[start:start + length].decode())
+                        start += length
+                    app_id, owner_id, operation, nonce = strings
+                    self._apply(nonce_hash, app_id, owner_id, operation, amount, nonce, timestamp)
+                    offset = end
+            if offset < size:
+                journal.truncate(offset)
+
+    def _apply(
+        self,
+        nonce_hash: bytes,
+        app_id: str,
+        owner_id: str,
+        operation: str,
+        amount: int,
+        nonce: str,
+        timestamp: float
+    ) -> MemoryEntry:
+        # App IDs, owner IDs, and operations repeat across entries; share one string each
+        app_id = sys.intern(app_id)
+        owner_id = sys.intern(owner_id)
+        balance = self._balances.get(owner_id, 0) + amount
+        entry = MemoryEntry(
+            len(self._entries) + 1,
+            app_id,
+            owner_id,
+            sys.intern(operation),
+            amount,
+            nonce,
+            timestamp,
+            balance
+        )
+        self._nonces[nonce_hash] = len(self._entries)
+        self._entries.append(entry)
+        self._balances[owner_id] = balance
+        app_balance = self._app_balances.get((app_id, owner_id), (0, 0))[1] + amount
+        self._app_balances[app_id, owner_id] = (len(self._entries) - 1, app_balance)
+        owner_entries = self._owner_entries.get(owner_id)
+        if owner_entries is None:
+            owner_entries = self._owner_entries[owner_id] = array("q")
+        owner_entries.append(entry.id)
+        hour = (int(timestamp) // 3600 * 3600, app_id, entry.operation)
+        usage = self._hourly_usage.get(hour)
+        if usage is None:
+            usage = self._hourly_usage[hour] = [0, 0]
+        usage[0] += 1
+        usage[1] += amount
+        return entry
+
+    def _write(self, writes: List[_Write]) -> List[MemoryEntry]:
+        """Journal writes with a single append, then apply them in order."""
+        timestamp = time.time()
+        if self._journal is not None:
+            records = []
+            for nonce_hash, app_id, owner_id, operation, amount, nonce in writes:
+                strings = [app_id.encode(), owner_id.encode(), operation.encode(), nonce.encode()]
+                records.append(_RECORD.pack(nonce_hash, amount, timestamp, *(len(part) for part in strings)))
+                records.extend(strings)
+            self._journal.write(b"".join(records))
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+        return [self._apply(*write, timestamp) for write in writes]
+
+    def _response(self, entry: MemoryEntry) -> LedgerOperationResponse:
+        return LedgerOperationResponse(
+            entry=LedgerEntryResponse.model_validate(entry, from_attributes=True),
+            balance=entry.balance
+        )
+
+    def _replay_response(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entry: LedgerEntryCreate,
+        index: int
+    ) -> Optional[LedgerOperationResponse]:
+        """Get the original result of a retried request within the retention window."""
+        retention = operations.RESPONSE_RETENTION
+        written = self._entries[index]
+        if retention is None or written.timestamp + retention.total_seconds() <= time.time():
+            return None
+        response = self._response(written)
+        return response if matches_request(response, entry) else None
+
+    async def get_balance(self, owner_id: str) -> LedgerBalance:
+        owner_entries = self._owner_entries.get(owner_id)
+        if not owner_entries:
+            return LedgerBalance(balance=0, last_updated=datetime.now(timezone.utc))
+        return LedgerBalance(
+            balance=self._balances[owner_id],
+            last_updated=self._entries[owner_entries[-1] - 1].created_at
+        )
+
+    async def get_balances(self, owner_ids: List[str]) -> Dict[str, LedgerBalance]:
+        return {owner_id: await self.get_balance(owner_id) for owner_id in owner_ids}
+
+    async def get_app_balance(self, owner_id: str, app_id: str) -> LedgerBalance:
+        app_balance = self._app_balances.get((app_id, owner_id))
+        if app_balance is None:
+            return LedgerBalance(balance=0, last_updated=datetime.now(timezone.utc))
+        index, balance = app_balance
+        return LedgerBalance(balance=balance, last_updated=self._entries[index].created_at)
+
+    async def list_entries(
+        self,
+        owner_id: str,
+        cursor: Optional[int],
+        limit: int,
+        operation: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        app_id: Optional[str]
+    ) -> Tuple[List[MemoryEntry], Optional[int]]:
+        owner_entries = self._owner_entries.get(owner_id, array("q"))
+        position = len(owner_entries) if cursor is None else bisect.bisect_left(owner_entries, cursor)
+        since_timestamp = since.timestamp() if since is not None else None
+        until_timestamp = until.timestamp() if until is not None else None
+        entries: List[MemoryEntry] = []
+        # Walk the owner's entries newest first, one past the page to learn whether another exists
+        for position in range(position - 1, -1, -1):
+            entry = self._entries[owner_entries[position] - 1]
+            if operation is not None and entry.operation != operation:
+                continue
+            if app_id is not None and entry.app_id != app_id:
+                continue
+            if since_timestamp is not None and entry.timestamp < since_timestamp:
+                continue
+            if until_timestamp is not None and entry.timestamp >= until_timestamp:
+                continue
+            entries.append(entry)
+            if len(entries) > limit:
+                entries = entries[:limit]
+                return entries, entries[-1].id
+        return entries, None
+
+    async def iter_entries(
+        self,
+        owner_id: Optional[str],
+        operation: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        app_id: Optional[str],
+        chunk_size: int
+    ) -> AsyncIterator[List[MemoryEntry]]:
+        # Entries are never changed, so stopping at the last entry written
+        # before the export began makes it a consistent snapshot
+        last_id = len(self._entries)
+        if owner_id is not None:
+            owner_entries = self._owner_entries.get(owner_id, array("q"))
+            ids = owner_entries[:bisect.bisect_right(owner_entries, last_id)]
+        else:
+            ids = range(1, last_id + 1)
+        since_timestamp = since.timestamp() if since is not None else None
+        until_timestamp = until.timestamp() if until is not None else None
+        chunk: List[MemoryEntry] = []
+        for entry_id in ids:
+            entry = self._entries[entry_id - 1]
+            if operation is not None and entry.operation != operation:
+                continue
+            if app_id is not None and entry.app_id != app_id:
+                continue
+            if since_timestamp is not None and entry.timestamp < since_timestamp:
+                continue
+            if until_timestamp is not None and entry.timestamp >= until_timestamp:
+                continue
+            chunk.append(entry)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def get_usage_stats(
+        self,
+        granularity: str,
+        since: datetime,
+        until: datetime,
+        app_id: Optional[str],
+        operation: Optional[str]
+    ) -> List[LedgerUsageSeries]:
+        # Hourly totals are kept as entries are applied, so unlike the
+        # database rollups they include the latest entries
+        bucket_seconds = 86400 if granularity == "day" else 3600
+        since_timestamp = since.timestamp()
+        until_timestamp = until.timestamp()
+        buckets: Dict[Tuple[str, str], Dict[int, List[int]]] = {}
+        for (hour, entry_app_id, entry_operation), (entries, amount) in self._hourly_usage.items():
+            if app_id is not None and entry_app_id != app_id:
+                continue
+            if operation is not None and entry_operation != operation:
+                continue
+            bucket = hour - hour % bucket_seconds
+            if not since_timestamp <= bucket < until_timestamp:
+                continue
+            usage = buckets.setdefault((entry_app_id, entry_operation), {}).setdefault(bucket, [0, 0])
+            usage[0] += entries
+            usage[1] += amount
+        return [
+            LedgerUsageSeries(app_id=series_app_id, operation=series_operation, points=[
+                LedgerUsagePoint(
+                    bucket=datetime.fromtimestamp(bucket, timezone.utc),
+                    entries=points[bucket][0],
+                    amount=points[bucket][1]
+                )
+                for bucket in sorted(points)
+            ])
+            for (series_app_id, series_operation), points in sorted(buckets.items())
+        ]
+
+    async def process(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entry: LedgerEntryCreate
+    ) -> LedgerOperationResponse:
+        nonce_hash = operations.nonce_hash(entry.owner_id, entry.nonce)
+        try:
+            index = self._nonces.get(nonce_hash)
+            if index is not None:
+                replay = self._replay_response(operations, entry, index)
+                if replay is not None:
+                    return replay
+                raise DuplicateTransactionError(f"Transaction with nonce {entry.nonce} already exists")
+            amount = resolve_operation_amount(operations, entry)
+            available = self._balances.get(entry.owner_id, 0)
+            if amount < 0 and available + amount < 0:
+                raise InsufficientCreditsError(
+                    f"Insufficient credits: {available} available, {abs(amount)} needed"
+                )
+        except (ValueError, InsufficientCreditsError, DuplicateTransactionError) as e:
+            write_errors_total.inc(error=type(e).__name__)
+            raise
+
+        written = self._write([(nonce_hash, operations.APP_ID, entry.owner_id, entry.operation, amount, entry.nonce)])[0]
+        writes_total.inc(app=operations.APP_ID, operation=entry.operation)
+        return self._response(written)
+
+    async def process_batch(
+        self,
+        operations: Type[BaseLedgerOperations],
+        entries: List[LedgerEntryCreate],
+        atomic: bool
+    ) -> LedgerBatchResults:
+        results: List[Union[LedgerOperationResponse, Exception, None]] = [None] * len(entries)
+        amounts: Dict[int, int] = {}
+        nonce_hashes = [operations.nonce_hash(entry.owner_id, entry.nonce) for entry in entries]
+
+        # Resolve amounts, then reject nonces repeated within the batch or claimed before
+        seen_nonces = set()
+        for index, entry in enumerate(entries):
+            try:
+                amount = resolve_operation_amount(operations, entry)
+            except ValueError as e:
+                results[index] = e
+                continue
+            nonce_hash = nonce_hashes[index]
+            claimed = self._nonces.get(nonce_hash)
+            if nonce_hash in seen_nonces or claimed is not None:
+                replay = self._replay_response(operations, entry, claimed) if claimed is not None else None
+                results[index] = replay or DuplicateTransactionError(
+                    f"Transaction with nonce {entry.nonce} already exists"
+                )
+            else:
+                amounts[index] = amount
+            seen_nonces.add(nonce_hash)
+
+        # Apply entries in sequence against running balances
+        balances: Dict[str, int] = {}
+        for index in sorted(amounts):
+            owner_id = entries[index].owner_id
+            available = balances.get(owner_id, self._balances.get(owner_id, 0))
+            if amounts[index] < 0 and available + amounts[index] < 0:
+                results[index] = InsufficientCreditsError(
+                    f"Insufficient credits: {available} available, {abs(amounts[index])} needed"
+                )
+                del amounts[index]
+                continue
+            balances[owner_id] = available + amounts[index]
+
+        failed = any(isinstance(result, Exception) for result in results)
+        committed = bool(amounts) and not (atomic and failed)
+        if committed:
+            written = self._write([
+                (
+                    nonce_hashes[index],
+                    operations.APP_ID,
+                    entries[index].owner_id,
+                    entries[index].operation,
+                    amounts[index],
+                    entries[index].nonce
+                )
+                for index in sorted(amounts)
+            ])
+            for index, entry in zip(sorted(amounts), written):
+                results[index] = self._response(entry)
+                writes_total.inc(app=operations.APP_ID, operation=entry.operation)
+        else:
+            results = [
+                result if result is not None else BatchAbortedError("Batch rolled back: another entry failed")
+                for result in results
+            ]
+
+        for result in results:
+            if isinstance(result, Exception):
+                write_errors_total.inc(error=type(result).__name__)
+        return LedgerBatchResults(results, committed)
@@ -0,0 +1,361 @@
+"""
+Prometheus metrics for the ledger hot paths.
+
+Metrics are kept in process and rendered in the Prometheus text exposition
+format, so scraping needs no client library. Each worker process exposes
+its own values; Prometheus aggregates them across scrape targets. Workers
+sharing a port, as with ``uvicorn --workers N``, answer scrapes in turn,
+so each worker must be scraped as a target of its own: run one worker per
+process and port, or per container.
+"""
+
+import bisect
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from .cache import balance_cache
+from .idempotency import response_cache
+from .locks import owner_locks
+from .replicas import ReplicaRouter
+from .retry import write_retry_metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from single statements to slow requests
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """
+    Base class of metrics with a fixed set of label names.
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        """Get the exposition lines of the metric, including HELP and TYPE."""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Get the sample lines of the metric."""
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count per label set.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets per label set.
+    """
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: count in each bucket (last one is +Inf), sum, and count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(series[1][1]) if series else 0
+
+    def _render_samples(self) -> List[str]:
+        lines = []
+        for key, (counts, (total, count)) in self._series.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {int(count)}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    Gauge or counter whose samples are read from elsewhere at scrape time.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        callback: Callable[[], Iterable[Sample]],
+        type: str = "gauge"
+    ) -> None:
+        super().__init__(name, help)
+        self.type = type
+        self.callback = callback
+
+    def _render_samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in self.callback()
+        ]
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    """
+    Named set of metrics rendered together.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """Add a metric, replacing an earlier one with the same name."""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry rendered by the /metrics endpoint
+metrics_registry = MetricsRegistry()
+
+request_duration_seconds = metrics_registry.register(Histogram(
+    "ledger_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route", "status")
+))
+
+write_phase_seconds = metrics_registry.register(Histogram(
+    "ledger_write_phase_duration_seconds",
+    "Time spent in each phase of process_ledger_operation.",
+    ("phase",)
+))
+
+writes_total = metrics_registry.register(Counter(
+    "ledger_writes_total",
+    "Ledger entries written, by app and operation.",
+    ("app", "operation")
+))
+
+write_errors_total = metrics_registry.register(Counter(
+    "ledger_write_errors_total",
+    "Ledger entries rejected, by error type.",
+    ("error",)
+))
+
+coalesced_batch_size = metrics_registry.register(Histogram(
+    "ledger_coalesced_batch_size",
+    "Entries per batch written by the write coalescer, by app.",
+    ("app",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+))
+
+coalesced_queue_wait_seconds = metrics_registry.register(Histogram(
+    "ledger_coalesced_queue_wait_seconds",
+    "Time an entry waited in the write coalescer before its batch was flushed, by app.",
+    ("app",)
+))
+
+for _name, _help, _stats in (
+    ("ledger_balance_cache", "balance cache", balance_cache.stats),
+    ("ledger_response_cache", "replay response cache", response_cache.stats),
+):
+    metrics_registry.register(CallbackMetric(
+        f"{_name}_requests_total",
+        f"Lookups in the {_help}, by result.",
+        lambda stats=_stats: [({"result": "hit"}, stats.hits), ({"result": "miss"}, stats.misses)],
+        type="counter"
+    ))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_owner_lock_contended_total",
+    "Acquisitions of a per-owner striped lock that had to wait.",
+    lambda: [({}, owner_locks.contended)],
+    type="counter"
+))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_write_retries_total",
+    "Optimistic write attempts that conflicted, by cause.",
+    lambda: [
+        ({"cause": "serialization_failure"}, write_retry_metrics.serialization_failures),
+        ({"cause": "deadlock"}, write_retry_metrics.deadlocks),
+    ],
+    type="counter"
+))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_write_retries_exhausted_total",
+    "Optimistic writes that still conflicted on their last attempt.",
+    lambda: [({}, write_retry_metrics.exhausted)],
+    type="counter"
+))
+
+
+# Engines whose connection pools are reported, by pool label
+_pools: Dict[str, AsyncEngine] = {}
+
+
+def register_pool_metrics(engine: AsyncEngine, pool: str = "primary") -> None:
+    """
+    Report an engine's connection pool usage.
+
+    Args:
+        engine: Engine whose pool to report; it must use a queue pool
+        pool: Label distinguishing the engine, e.g. primary or a replica
+    """
+    _pools[pool] = engine
+
+
+def _pool_samples(read: Callable[[QueuePool], int]) -> List[Sample]:
+    return [
+        ({"pool": name}, read(engine.sync_engine.pool))
+        for name, engine in _pools.items()
+        if isinstance(engine.sync_engine.pool, QueuePool)
+    ]
+
+
+metrics_registry.register(CallbackMetric(
+    "ledger_db_pool_checked_out",
+    "Connections currently checked out of the pool.",
+    lambda: _pool_samples(lambda pool: pool.checkedout())
+))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_db_pool_overflow",
+    "Connections open beyond the pool size; negative while the pool is not full.",
+    lambda: _pool_samples(lambda pool: pool.overflow())
+))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_db_pool_size",
+    "Configured size of the pool.",
+    lambda: _pool_samples(lambda pool: pool.size())
+))
+
+
+# Replica routers whose read routing is reported, by router label
+_replica_routers: Dict[str, ReplicaRouter] = {}
+
+
+def register_replica_metrics(router: ReplicaRouter, name: str = "default") -> None:
+    """
+    Report how a replica router routes reads.
+
+    Args:
+        router: Router whose counters to report
+        name: Label distinguishing the router
+    """
+    _replica_routers[name] = router
+
+
+metrics_registry.register(CallbackMetric(
+    "ledger_replica_reads_total",
+    "Read sessions handed out by the replica router, by target.",
+    lambda: [
+        sample
+        for name, router in _replica_routers.items()
+        for sample in (
+            ({"router": name, "target": "replica"}, router.metrics.replica_reads),
+            ({"router": name, "target": "primary"}, router.metrics.primary_reads),
+        )
+    ],
+    type="counter"
+))
+
+metrics_registry.register(CallbackMetric(
+    "ledger_replica_fallbacks_total",
+    "Reads sent to the primary because their replica was unreachable or had not replayed their write in time.",
+    lambda: [({"router": name}, router.metrics.fallbacks) for name, router in _replica_routers.items()],
+    type="counter"
+))
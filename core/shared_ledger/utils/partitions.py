@@ -0,0 +1,299 @@
+"""
+Maintenance of the monthly partitions of the ledger entries table.
+
+Monthly partitions can themselves be list-partitioned by app, so an app's
+entries of a month are stored, scanned, and vacuumed on their own.
+"""
+
+import asyncio
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+LEDGER_TABLE = "ledger_entries"
+
+# Months of partitions kept ready ahead of the current one
+PARTITION_MONTHS_AHEAD = 3
+
+# Schema that detached partitions are moved into
+ARCHIVE_SCHEMA = "ledger_archive"
+
+# App IDs that can name an app partition
+_APP_PARTITION_ID = re.compile(r"[a-z0-9_]{1,32}")
+
+
+def month_start(value: datetime) -> datetime:
+    """Get the first instant of the UTC month containing a timestamp."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift the first instant of a month by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime, table: str = LEDGER_TABLE) -> str:
+    """Get the name of the partition holding a month, e.g. ledger_entries_p202610."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def create_partition_sql(month: datetime, table: str = LEDGER_TABLE, by_app: bool = False) -> str:
+    """
+    Build the DDL creating the partition of a month.
+
+    Args:
+        month: First instant of the month
+        table: Partitioned parent table
+        by_app: Whether the partition is itself list-partitioned by app_id
+
+    Returns:
+        CREATE TABLE statement for the partition
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month, table)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        + (" PARTITION BY LIST (app_id)" if by_app else "")
+    )
+
+
+def check_app_partition_id(app_id: str) -> None:
+    """Raise ValueError if an app ID cannot be used in a partition name."""
+    if not _APP_PARTITION_ID.fullmatch(app_id) or app_id == "default":
+        raise ValueError(f"App ID {app_id!r} cannot name a partition; use lowercase letters, digits, and underscores")
+
+
+def create_app_partition_sql(month_partition: str, app_id: Optional[str]) -> str:
+    """
+    Build the DDL creating the partition of one app within a month.
+
+    Args:
+        month_partition: Name of the list-partitioned partition of the month
+        app_id: ID of the app, or None for the default partition holding
+                every app without a partition of its own
+
+    Returns:
+        CREATE TABLE statement for the partition
+
+    Raises:
+        ValueError: If the app ID cannot be used in a partition name
+    """
+    if app_id is None:
+        return f"CREATE TABLE IF NOT EXISTS {month_partition}_default PARTITION OF {month_partition} DEFAULT"
+    check_app_partition_id(app_id)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {month_partition}_{app_id} PARTITION OF {month_partition} "
+        f"FOR VALUES IN ('{app_id}')"
+    )
+
+
+async def is_partitioned(conn: AsyncConnection, table: str = LEDGER_TABLE) -> bool:
+    """Check whether a table is partitioned."""
+    result = await conn.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"),
+        {"table": table}
+    )
+    return bool(result.scalar())
+
+
+async def list_partitions(conn: AsyncConnection, table: str = LEDGER_TABLE) -> List[Tuple[str, datetime]]:
+    """
+    List the monthly partitions attached to a table.
+
+    Partitions not following the monthly naming scheme are ignored.
+
+    Returns:
+        (partition name, first instant of its month) pairs in month order
+    """
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = to_regclass(:table)"
+        ),
+        {"table": table}
+    )
+    prefix = f"{table}_p"
+    partitions = []
+    for name in result.scalars():
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            partitions.append((name, datetime(int(suffix[:4]), int(suffix[4:]), 1, tzinfo=timezone.utc)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+async def ensure_ledger_partitions(
+    conn: AsyncConnection,
+    months_ahead: int = PARTITION_MONTHS_AHEAD,
+    now: Optional[datetime] = None,
+    table: str = LEDGER_TABLE,
+    app_ids: Optional[Sequence[str]] = None
+) -> List[str]:
+    """
+    Create the partitions of the current month and the months ahead.
+
+    Entries whose month has no partition cannot be written, so this runs on
+    startup and periodically, from PartitionMaintainer or a cron job. Does
+    nothing when the table is not partitioned.
+
+    With app_ids, months created from now on are list-partitioned by app:
+    each listed app gets a partition, and other apps share a default one.
+    Apps added to the list later get partitions from the next month on,
+    since rows of the current month may already be in its default partition.
+    Months created without app_ids stay unpartitioned.
+
+    Args:
+        conn: Database connection
+        months_ahead: Number of months after the current one to prepare
+        now: Reference time; defaults to the current time
+        table: Partitioned table
+        app_ids: Apps to give partitions of their own
+
+    Returns:
+        Names of the partitions created, months before their app partitions
+    """
+    for app_id in app_ids or []:
+        check_app_partition_id(app_id)
+    if not await is_partitioned(conn, table):
+        return []
+    existing = {name for name, _ in await list_partitions(conn, table)}
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month, table)
+        if name not in existing:
+            await conn.execute(text(create_partition_sql(month, table, by_app=bool(app_ids))))
+            created.append(name)
+        elif not app_ids or offset == 0 or not await is_partitioned(conn, name):
+            # The current month's default partition may hold rows of a newly listed app
+            continue
+        if app_ids:
+            for app_id in [*app_ids, None]:
+                created.extend(await _ensure_app_partition(conn, name, app_id))
+    return created
+
+
+class PartitionMaintainer:
+    """
+    Creates future partitions periodically in the background.
+
+    Keeps a long-running process from reaching a month without a partition.
+    Workers running it at the same time take turns through an advisory lock.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval: float = 3600.0,
+        months_ahead: int = PARTITION_MONTHS_AHEAD,
+        app_ids: Optional[Sequence[str]] = None,
+        table: str = LEDGER_TABLE
+    ) -> None:
+        """
+        Args:
+            engine: Engine to open the job's connections from
+            interval: Seconds between job runs
+            months_ahead: Number of months after the current one to prepare
+            app_ids: Apps to give partitions of their own
+            table: Partitioned table
+        """
+        self.engine = engine
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.app_ids = app_ids
+        self.table = table
+        self.last_created: Optional[List[str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start running the job in the background, first after one interval."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background job, waiting for a running pass to be cancelled."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def run_once(self) -> List[str]:
+        """Create the missing partitions in one transaction."""
+        async with self.engine.begin() as conn:
+            await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": self.table})
+            return await ensure_ledger_partitions(
+                conn,
+                months_ahead=self.months_ahead,
+                app_ids=self.app_ids,
+                table=self.table
+            )
+
+    async def _run(self) -> None:
+        while True:
+            # Startup already created the partitions, so wait before the first run
+            await asyncio.sleep(self.interval)
+            try:
+                self.last_created = await self.run_once()
+                if self.last_created:
+                    logger.info("Created ledger partitions %s", ", ".join(self.last_created))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Partition maintenance job failed")
+
+
+async def _ensure_app_partition(conn: AsyncConnection, month_partition: str, app_id: Optional[str]) -> List[str]:
+    """Create the partition of an app within a month if it does not exist yet."""
+    name = f"{month_partition}_{app_id or 'default'}"
+    exists = await conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+    if exists.scalar():
+        return []
+    await conn.execute(text(create_app_partition_sql(month_partition, app_id)))
+    return [name]
+
+
+async def detach_ledger_partitions(
+    conn: AsyncConnection,
+    before: datetime,
+    archive_schema: str = ARCHIVE_SCHEMA,
+    table: str = LEDGER_TABLE
+) -> List[str]:
+    """
+    Detach the partitions of months ending before a cutoff into an archive schema.
+
+    Detaching is a metadata change, so old entries leave the hot table
+    without a bulk delete. Balances are unaffected, and nonces stay claimed
+    in the nonce registry.
+
+    Args:
+        conn: Database connection
+        before: Detach months that end at or before this time
+        archive_schema: Schema the detached partitions are moved into
+        table: Partitioned table
+
+    Returns:
+        Names of the partitions detached
+    """
+    cutoff = month_start(before)
+    detached = []
+    for name, month in await list_partitions(conn, table):
+        if add_months(month, 1) > cutoff:
+            break
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+        detached.append(name)
+    return detached
@@ -0,0 +1,104 @@
+"""
+Loading operation prices from the database into the operation registry.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.operation import OperationPrice
+from ..operations.registry import OperationRegistry, operation_registry
+
+logger = logging.getLogger(__name__)
+
+
+async def load_operation_prices(session: AsyncSession) -> Dict[str, Dict[str, int]]:
+    """
+    Read all price overrides.
+
+    Returns:
+        Amounts by app id and operation name
+    """
+    prices: Dict[str, Dict[str, int]] = {}
+    result = await session.execute(
+        select(OperationPrice.app_id, OperationPrice.operation, OperationPrice.amount)
+    )
+    for row in result:
+        prices.setdefault(row.app_id, {})[row.operation] = row.amount
+    return prices
+
+
+async def reload_operation_prices(
+    session: AsyncSession,
+    registry: OperationRegistry = operation_registry
+) -> bool:
+    """
+    Load the price overrides into the registry if they changed.
+
+    Args:
+        session: Database session
+        registry: Registry to update
+
+    Returns:
+        Whether the prices changed
+
+    Raises:
+        ValueError: If a recompiled table is missing required operations
+    """
+    changed = registry.set_prices(await load_operation_prices(session))
+    if changed:
+        logger.info("Loaded operation prices, registry version %d", registry.version)
+    return changed
+
+
+class OperationPriceReloader:
+    """
+    Reloads operation prices periodically in the background.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 30.0,
+        registry: OperationRegistry = operation_registry
+    ) -> None:
+        """
+        Args:
+            session_factory: Factory for the sessions used to read prices
+            interval: Seconds between reloads
+            registry: Registry to update
+        """
+        self.session_factory = session_factory
+        self.interval = interval
+        self.registry = registry
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start reloading in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop reloading, waiting for a running reload to be cancelled."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with self.session_factory() as session:
+                    await reload_operation_prices(session, self.registry)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Operation price reload failed")
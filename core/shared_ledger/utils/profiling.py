@@ -0,0 +1,113 @@
+"""
+Per-request SQL profiling built on SQLAlchemy engine events.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Connection.info key holding the start times of executing statements
+_STARTED_KEY = "ledger_query_started"
+
+
+@dataclass
+class QueryProfile:
+    """
+    Statements issued while a profile was active, with their durations.
+    """
+    statements: List[Tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(duration for _, duration in self.statements)
+
+    def describe(self, limit: int = 10) -> str:
+        """Summarize the slowest statements for logs."""
+        slowest = sorted(self.statements, key=lambda statement: statement[1], reverse=True)[:limit]
+        return "\n".join(f"{duration * 1000:8.2f} ms  {' '.join(sql.split())[:200]}" for sql, duration in slowest)
+
+
+_current_profile: ContextVar[Optional[QueryProfile]] = ContextVar("ledger_query_profile", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by query_budget when a block issues more statements than allowed."""
+    pass
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """
+    Record the statements issued by the current task and tasks it starts.
+
+    Only engines passed to install_query_profiler are recorded.
+    """
+    profile = QueryProfile()
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int) -> Iterator[QueryProfile]:
+    """
+    Fail if the block issues more than ``max_queries`` statements.
+
+    Meant for tests pinning the query count of hot paths.
+
+    Raises:
+        QueryBudgetExceeded: If the budget is exceeded
+    """
+    with profile_queries() as profile:
+        yield profile
+    if profile.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{profile.count} queries issued, budget is {max_queries}:\n{profile.describe(limit=profile.count)}"
+        )
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    if _current_profile.get() is not None:
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+    profile = _current_profile.get()
+    started = conn.info.get(_STARTED_KEY)
+    if profile is not None and started:
+        profile.statements.append((statement, time.perf_counter() - started.pop()))
+
+
+def _handle_error(context: Any) -> None:
+    # Failed statements never reach after_cursor_execute; record them here
+    profile = _current_profile.get()
+    started = context.connection.info.get(_STARTED_KEY) if context.connection is not None else None
+    if started:
+        duration = time.perf_counter() - started.pop()
+        if profile is not None:
+            profile.statements.append((context.statement or "", duration))
+
+
+def install_query_profiler(engine: AsyncEngine) -> None:
+    """
+    Record the statements of an engine in active profiles.
+
+    Statements issued outside profile_queries cost one context variable
+    lookup. Installing twice has no further effect.
+    """
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "handle_error", _handle_error)
@@ -0,0 +1,150 @@
+"""
+Routing ledger reads to read replicas with read-your-writes tokens.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from sqlalchemy import String, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Header carrying the WAL position of a write, echoed by follow-up reads
+LSN_HEADER = "X-Ledger-LSN"
+
+# Session.info key marking sessions bound to a replica
+REPLICA_SESSION_KEY = "ledger_replica"
+
+
+def parse_lsn(token: str) -> int:
+    """
+    Parse a Postgres LSN such as ``16/B374D848`` into a comparable integer.
+
+    Raises:
+        ValueError: If the token is not an LSN
+    """
+    high, _, low = token.strip().partition("/")
+    if not low:
+        raise ValueError(f"Invalid LSN: {token}")
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """
+    Check whether a session reads from a replica.
+
+    Reads from replicas may lag behind the primary, so they must not
+    populate caches that writes keep current.
+    """
+    return session.info.get(REPLICA_SESSION_KEY, False)
+
+
+@dataclass
+class ReplicaMetrics:
+    """
+    Counters describing how reads were routed.
+    """
+    replica_reads: int = 0
+    primary_reads: int = 0
+    # Reads sent to the primary because their replica was unreachable or
+    # had not replayed their token in time
+    fallbacks: int = 0
+
+
+class ReplicaRouter:
+    """
+    Hands out sessions for reads, preferring replicas over the primary.
+
+    Replicas are used round robin. A read carrying the LSN token of an
+    earlier write waits up to ``wait_timeout`` seconds for the chosen
+    replica to replay that position, and otherwise falls back to the
+    primary, so a client never sees a balance older than its own write.
+    Reads also fall back to the primary when the chosen replica cannot be
+    reached.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker[AsyncSession],
+        replicas: Sequence[async_sessionmaker[AsyncSession]],
+        wait_timeout: float = 0.2,
+        poll_interval: float = 0.01
+    ) -> None:
+        """
+        Args:
+            primary: Session factory of the primary
+            replicas: Session factories of the replicas
+            wait_timeout: Seconds a read waits for a lagging replica
+            poll_interval: Seconds between replay position checks
+        """
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.metrics = ReplicaMetrics()
+        self._next_replica = itertools.cycle(self.replicas)
+
+    async def write_token(self, session: AsyncSession) -> str:
+        """
+        Get the primary's current WAL position as a token for follow-up reads.
+
+        Call after the write has committed.
+
+        Args:
+            session: Session on the primary
+        """
+        return await session.scalar(select(func.pg_current_wal_lsn().cast(String)))
+
+    async def read_session(self, token: Optional[str] = None) -> AsyncSession:
+        """
+        Open a session for reads.
+
+        Args:
+            token: LSN token of a write the read must observe
+
+        Returns:
+            A replica session, or a primary session when there are no
+            replicas, the chosen replica is unreachable, or it did not
+            catch up with the token in time
+        """
+        if not self.replicas:
+            self.metrics.primary_reads += 1
+            return self.primary()
+
+        lsn = parse_lsn(token) if token is not None else None
+        session = next(self._next_replica)(info={REPLICA_SESSION_KEY: True})
+        try:
+            # Connect now so an unreachable replica fails here, not in the handler
+            await session.connection()
+            if lsn is None or await self._wait_for_replay(session, lsn):
+                self.metrics.replica_reads += 1
+                return session
+            logger.debug("Replica behind %s, reading from the primary", token)
+        except (DBAPIError, OSError) as e:
+            logger.warning("Replica unreachable, reading from the primary: %s", e)
+
+        await session.close()
+        self.metrics.fallbacks += 1
+        self.metrics.primary_reads += 1
+        return self.primary()
+
+    async def _wait_for_replay(self, session: AsyncSession, lsn: int) -> bool:
+        # Outside recovery pg_last_wal_replay_lsn is NULL and the server is current
+        position = select(
+            func.coalesce(func.pg_last_wal_replay_lsn(), func.pg_current_wal_lsn()).cast(String)
+        )
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            replayed = await session.scalar(position)
+            await session.rollback()
+            if parse_lsn(replayed) >= lsn:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,102 @@
+"""
+Retrying optimistic transactions on serialization failures and deadlocks.
+"""
+
+import asyncio
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+T = TypeVar("T")
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+
+
+@dataclass
+class RetryMetrics:
+    """
+    Counters describing how often optimistic transactions had to be retried.
+    """
+    attempts: int = 0
+    retries: int = 0
+    serialization_failures: int = 0
+    deadlocks: int = 0
+    exhausted: int = 0
+
+
+# Shared counters for ledger write retries
+write_retry_metrics = RetryMetrics()
+
+
+def retryable_sqlstate(error: DBAPIError) -> Optional[str]:
+    """
+    Get the SQLSTATE of a database error if retrying the transaction may succeed.
+
+    Returns:
+        The SQLSTATE for serialization failures and deadlocks, otherwise None
+    """
+    sqlstate = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+    return sqlstate if sqlstate in (SERIALIZATION_FAILURE, DEADLOCK_DETECTED) else None
+
+
+async def run_with_retries(
+    session: AsyncSession,
+    isolation_level: str,
+    attempt: Callable[[], Awaitable[T]],
+    max_attempts: int = 5,
+    backoff: float = 0.005,
+    metrics: RetryMetrics = write_retry_metrics
+) -> T:
+    """
+    Run a transaction at an isolation level, retrying it when it conflicts.
+
+    Each attempt starts a new transaction at the given isolation level and
+    must commit it. After a serialization failure or deadlock the
+    transaction is rolled back and retried after a random delay of up to
+    ``backoff * 2 ** (attempt - 1)`` seconds.
+
+    Args:
+        session: Database session without an open transaction
+        isolation_level: Isolation level of each attempt, e.g. "SERIALIZABLE"
+        attempt: Runs the transaction once
+        max_attempts: Maximum number of attempts
+        backoff: Base delay in seconds between attempts
+        metrics: Counters to update
+
+    Returns:
+        The result of the successful attempt
+
+    Raises:
+        RuntimeError: If the session already has an open transaction, whose
+            isolation level could no longer be changed
+        DBAPIError: If the last attempt conflicted, or on any other database error
+    """
+    if session.in_transaction():
+        raise RuntimeError(
+            f"Cannot run a {isolation_level} transaction on a session with an open transaction; "
+            "commit or roll it back first"
+        )
+    for attempt_number in range(1, max_attempts + 1):
+        metrics.attempts += 1
+        await session.connection(execution_options={"isolation_level": isolation_level})
+        try:
+            return await attempt()
+        except DBAPIError as e:
+            await session.rollback()
+            sqlstate = retryable_sqlstate(e)
+            if sqlstate is None:
+                raise
+            if sqlstate == SERIALIZATION_FAILURE:
+                metrics.serialization_failures += 1
+            else:
+                metrics.deadlocks += 1
+            if attempt_number == max_attempts:
+                metrics.exhausted += 1
+                raise
+            metrics.retries += 1
+            await asyncio.sleep(random.uniform(0, backoff * 2 ** (attempt_number - 1)))
+    raise ValueError("max_attempts must be at least 1")
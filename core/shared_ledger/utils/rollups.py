@@ -0,0 +1,278 @@
+"""
+Hourly and daily usage rollups maintained incrementally from the ledger.
+
+Each owner has a watermark: the last of its entries counted in the rollups.
+A job run counts each owner's entries between its watermark and its balance
+checkpoint, then moves the watermark to the checkpoint. No entry can still
+appear below a checkpoint, so every entry is counted exactly once, without
+rescanning the ledger. The rollups trail the checkpoints; see
+checkpoints.advance_balance_checkpoints.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Literal, Optional, Tuple, Type, Union
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ..models.balance import BalanceCheckpoint
+from ..models.ledger import LedgerEntry
+from ..models.rollup import LedgerRollupWatermark, LedgerUsageDaily, LedgerUsageHourly, LedgerUsageRollup
+from ..schemas.ledger import LedgerUsagePoint, LedgerUsageSeries
+from .dialect import as_utc, begin_write, insert, utc_hour
+from .ledger import LedgerStore
+
+logger = logging.getLogger(__name__)
+
+# Owners rolled up per transaction by the rollup job
+ROLLUP_CHUNK_SIZE = 500
+
+Granularity = Literal["hour", "day"]
+
+ROLLUP_TABLES: Dict[str, Type[LedgerUsageRollup]] = {
+    "hour": LedgerUsageHourly,
+    "day": LedgerUsageDaily,
+}
+
+# Range of buckets returned when a stats request gives no start
+STATS_DEFAULT_WINDOWS: Dict[str, timedelta] = {
+    "hour": timedelta(days=1),
+    "day": timedelta(days=30),
+}
+
+
+@dataclass
+class RollupReport:
+    """
+    Outcome of one rollup job run.
+    """
+    owners: int = 0
+    entries: int = 0
+
+
+async def _add_usage(
+    session: AsyncSession,
+    table: Type[LedgerUsageRollup],
+    usage: Dict[Tuple[datetime, str, str], List[int]]
+) -> None:
+    # Upsert in key order, so concurrent runs lock shared buckets in the same order
+    stmt = insert(session, table).values([
+        {"bucket": bucket, "app_id": app_id, "operation": operation, "entries": entries, "amount": amount}
+        for (bucket, app_id, operation), (entries, amount) in sorted(usage.items())
+    ])
+    await session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[table.bucket, table.app_id, table.operation],
+            set_={
+                "entries": table.entries + stmt.excluded.entries,
+                "amount": table.amount + stmt.excluded.amount
+            }
+        )
+    )
+
+
+async def _roll_up_owners(
+    session: AsyncSession,
+    owner_ids: List[str],
+    report: RollupReport
+) -> None:
+    await begin_write(session)
+    await session.execute(
+        insert(session, LedgerRollupWatermark)
+        .values([{"owner_id": owner_id, "entry_id": 0} for owner_id in owner_ids])
+        .on_conflict_do_nothing(index_elements=[LedgerRollupWatermark.owner_id])
+    )
+    # Locking the watermarks keeps concurrent runs from counting entries
+    # twice; locking the checkpoints keeps them from moving until commit
+    result = await session.execute(
+        select(LedgerRollupWatermark.owner_id, BalanceCheckpoint.entry_id)
+        .join(BalanceCheckpoint, BalanceCheckpoint.owner_id == LedgerRollupWatermark.owner_id)
+        .where(
+            LedgerRollupWatermark.owner_id.in_(owner_ids),
+            BalanceCheckpoint.entry_id > LedgerRollupWatermark.entry_id
+        )
+        .order_by(LedgerRollupWatermark.owner_id)
+        .with_for_update()
+    )
+    watermarks = {row.owner_id: row.entry_id for row in result}
+    if not watermarks:
+        return
+
+    bucket = utc_hour(session, LedgerEntry.created_at).label("bucket")
+    result = await session.execute(
+        select(
+            bucket,
+            LedgerEntry.app_id,
+            LedgerEntry.operation,
+            func.count().label("entries"),
+            func.sum(LedgerEntry.amount).label("amount")
+        )
+        .join(LedgerRollupWatermark, LedgerRollupWatermark.owner_id == LedgerEntry.owner_id)
+        .join(BalanceCheckpoint, BalanceCheckpoint.owner_id == LedgerEntry.owner_id)
+        .where(
+            LedgerEntry.owner_id.in_(list(watermarks)),
+            LedgerEntry.id > LedgerRollupWatermark.entry_id,
+            LedgerEntry.id <= BalanceCheckpoint.entry_id
+        )
+        .group_by(bucket, LedgerEntry.app_id, LedgerEntry.operation)
+    )
+    hourly: Dict[Tuple[datetime, str, str], List[int]] = {}
+    daily: Dict[Tuple[datetime, str, str], List[int]] = defaultdict(lambda: [0, 0])
+    for row in result:
+        hour = as_utc(row.bucket)
+        hourly[hour, row.app_id, row.operation] = [row.entries, row.amount]
+        day = daily[hour.replace(hour=0), row.app_id, row.operation]
+        day[0] += row.entries
+        day[1] += row.amount
+        report.entries += row.entries
+    if hourly:
+        await _add_usage(session, LedgerUsageHourly, hourly)
+        await _add_usage(session, LedgerUsageDaily, daily)
+
+    now = datetime.now(timezone.utc)
+    await session.execute(update(LedgerRollupWatermark), [
+        {"owner_id": owner_id, "entry_id": entry_id, "updated_at": now}
+        for owner_id, entry_id in watermarks.items()
+    ])
+    report.owners += len(watermarks)
+
+
+async def advance_usage_rollups(
+    session: AsyncSession,
+    chunk_size: int = ROLLUP_CHUNK_SIZE
+) -> RollupReport:
+    """
+    Count the entries of all owners whose checkpoint passed their watermark.
+
+    Owners are processed in chunks, each in its own short transaction, so
+    the job can run while writes continue. Only checkpoints and watermarks
+    are scanned to find them.
+
+    Args:
+        session: Database session without an open transaction
+        chunk_size: Number of owners rolled up per transaction
+
+    Returns:
+        RollupReport with the number of owners and entries counted
+    """
+    report = RollupReport()
+    last_owner_id: Optional[str] = None
+    while True:
+        stmt = (
+            select(BalanceCheckpoint.owner_id)
+            .outerjoin(LedgerRollupWatermark, LedgerRollupWatermark.owner_id == BalanceCheckpoint.owner_id)
+            .where(BalanceCheckpoint.entry_id > func.coalesce(LedgerRollupWatermark.entry_id, 0))
+            .order_by(BalanceCheckpoint.owner_id)
+            .limit(chunk_size)
+        )
+        if last_owner_id is not None:
+            stmt = stmt.where(BalanceCheckpoint.owner_id > last_owner_id)
+        owner_ids = list((await session.execute(stmt)).scalars())
+        if not owner_ids:
+            await session.rollback()
+            return report
+        try:
+            await _roll_up_owners(session, owner_ids, report)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        last_owner_id = owner_ids[-1]
+
+
+async def get_usage_stats(
+    session: Union[AsyncSession, LedgerStore],
+    granularity: Granularity,
+    since: datetime,
+    until: datetime,
+    app_id: Optional[str] = None,
+    operation: Optional[str] = None
+) -> List[LedgerUsageSeries]:
+    """
+    Read usage time series from the rollups, never from the ledger.
+
+    Args:
+        session: Database session, or a LedgerStore to delegate to
+        granularity: Bucket size, hour or day
+        since: Only include buckets starting at or after this time
+        until: Only include buckets starting before this time
+        app_id: Only include this app
+        operation: Only include this operation
+
+    Returns:
+        A series per app and operation, each with its non-empty buckets in time order
+    """
+    if isinstance(session, LedgerStore):
+        return await session.get_usage_stats(granularity, since, until, app_id, operation)
+
+    table = ROLLUP_TABLES[granularity]
+    stmt = (
+        select(table.app_id, table.operation, table.bucket, table.entries, table.amount)
+        .where(table.bucket >= since, table.bucket < until)
+        .order_by(table.app_id, table.operation, table.bucket)
+    )
+    if app_id is not None:
+        stmt = stmt.where(table.app_id == app_id)
+    if operation is not None:
+        stmt = stmt.where(table.operation == operation)
+    series: Dict[Tuple[str, str], LedgerUsageSeries] = {}
+    for row in await session.execute(stmt):
+        key = (row.app_id, row.operation)
+        if key not in series:
+            series[key] = LedgerUsageSeries(app_id=row.app_id, operation=row.operation, points=[])
+        series[key].points.append(
+            LedgerUsagePoint(bucket=as_utc(row.bucket), entries=row.entries, amount=row.amount)
+        )
+    return list(series.values())
+
+
+class UsageRollupUpdater:
+    """
+    Runs the rollup job periodically in the background.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float = 300.0
+    ) -> None:
+        """
+        Args:
+            session_factory: Factory for the sessions used by the job
+            interval: Seconds between job runs
+        """
+        self.session_factory = session_factory
+        self.interval = interval
+        self.last_report: Optional[RollupReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start running the job in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background job, waiting for a running pass to be cancelled."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self.session_factory() as session:
+                    self.last_report = await advance_usage_rollups(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Usage rollup job failed")
+            await asyncio.sleep(self.interval)
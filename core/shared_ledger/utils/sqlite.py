@@ -0,0 +1,113 @@
+"""
+Embedded SQLite backend for single-node installs and local test runs.
+
+Connections run in WAL mode, so readers never wait for the writer, with
+pragmas trading a little durability on power loss for commit latency.
+Transactions are begun explicitly instead of by the driver's implicit
+BEGIN, which it only issues before data-modifying statements; write paths
+begin theirs with dialect.begin_write.
+"""
+
+from typing import Any, Dict
+
+from sqlalchemy import PrimaryKeyConstraint, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+from ..config import Settings
+from ..models.base import Base
+from ..models.ledger import LedgerEntry
+from .dialect import BEGIN_IMMEDIATE_OPTION
+
+
+def is_sqlite_url(url: str) -> bool:
+    """Check whether a database URL points to SQLite."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_memory_url(url: str) -> bool:
+    """Check whether a SQLite URL points to a private in-memory database."""
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def sqlite_pragmas(settings: Settings) -> Dict[str, Any]:
+    """
+    Build the pragmas applied to each new SQLite connection, in order.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Mapping from pragma name to value
+    """
+    return {
+        # Set first, so switching to WAL waits for other connections too
+        "busy_timeout": int(settings.SQLITE_BUSY_TIMEOUT * 1000),
+        "journal_mode": "WAL",
+        # In WAL mode, NORMAL only syncs at checkpoints; commits stay atomic
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        # Negative sizes are in KiB
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": "MEMORY",
+    }
+
+
+def configure_sqlite_engine(engine: AsyncEngine, pragmas: Dict[str, Any]) -> None:
+    """
+    Apply pragmas to new connections and begin transactions explicitly.
+
+    Args:
+        engine: Engine connecting to a SQLite database
+        pragmas: Pragmas from sqlite_pragmas
+    """
+    @event.listens_for(engine.sync_engine, "connect")
+    def _connect(dbapi_connection: Any, connection_record: Any) -> None:
+        # Disable the driver's own transaction handling; see _begin
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def _begin(conn: Any) -> None:
+        if conn.get_execution_options().get(BEGIN_IMMEDIATE_OPTION):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+
+# ledger_entries' primary key includes the Postgres partition key, but SQLite
+# only assigns ids to a single-column INTEGER PRIMARY KEY. Key the table by
+# id alone; AUTOINCREMENT keeps ids increasing, as checkpoints rely on.
+@compiles(CreateColumn, "sqlite")
+def _compile_column(element: CreateColumn, compiler: Any, **kw: Any) -> str:
+    column = element.element
+    if column is LedgerEntry.__table__.c.id:
+        return f"{compiler.preparer.format_column(column)} INTEGER PRIMARY KEY AUTOINCREMENT"
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _compile_primary_key(constraint: PrimaryKeyConstraint, compiler: Any, **kw: Any) -> Any:
+    if constraint.table is LedgerEntry.__table__:
+        return None
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+async def create_sqlite_schema(conn: AsyncConnection) -> None:
+    """
+    Create the ledger tables that do not exist yet.
+
+    SQLite databases are not managed by the Alembic migrations, which
+    target Postgres; call this at startup instead.
+
+    Args:
+        conn: Connection to the SQLite database
+    """
+    await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,48 @@
+"""owner balances
+
+Revision ID: 5b1e7c2d9a40
+Revises: 24fd18eb18dd
+Create Date: 2026-10-17 09:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1e7c2d9a40"
+down_revision: Union[str, None] = "24fd18eb18dd"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "owner_balances",
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("balance", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "last_updated",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+
+    # Backfill balances from the existing ledger history
+    op.execute(
+        """
+        INSERT INTO owner_balances (owner_id, balance, last_updated)
+        SELECT owner_id, SUM(amount), MAX(created_at)
+        FROM ledger_entries
+        GROUP BY owner_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("owner_balances")
@@ -0,0 +1,44 @@
+"""owner entry keyset index
+
+Revision ID: 8c3f0a6e1b27
+Revises: 5b1e7c2d9a40
+Create Date: 2026-10-17 09:30:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c3f0a6e1b27"
+down_revision: Union[str, None] = "5b1e7c2d9a40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_ledger_entries_owner_id_id",
+        "ledger_entries",
+        ["owner_id", "id"],
+        unique=False,
+    )
+    # Owner lookups are served by the composite index
+    op.drop_index(
+        op.f("ix_ledger_entries_owner_id"), table_name="ledger_entries"
+    )
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_ledger_entries_owner_id"),
+        "ledger_entries",
+        ["owner_id"],
+        unique=False,
+    )
+    op.drop_index(
+        "ix_ledger_entries_owner_id_id", table_name="ledger_entries"
+    )
@@ -0,0 +1,55 @@
+"""ledger nonces
+
+Revision ID: 4a091f9bd28b
+Revises: 8c3f0a6e1b27
+Create Date: 2026-10-17 10:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4a091f9bd28b"
+down_revision: Union[str, None] = "8c3f0a6e1b27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_nonces",
+        sa.Column("nonce", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("nonce"),
+    )
+
+    # Claim the nonces already used by the ledger history
+    op.execute(
+        """
+        INSERT INTO ledger_nonces (nonce, created_at)
+        SELECT nonce, created_at
+        FROM ledger_entries
+        """
+    )
+
+    # Uniqueness is now enforced by the nonce registry
+    op.drop_index(op.f("ix_ledger_entries_nonce"), table_name="ledger_entries")
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_ledger_entries_nonce"),
+        "ledger_entries",
+        ["nonce"],
+        unique=True,
+    )
+    op.drop_table("ledger_nonces")
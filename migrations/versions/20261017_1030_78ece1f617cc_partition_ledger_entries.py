@@ -0,0 +1,146 @@
+"""partition ledger entries
+
+Revision ID: 78ece1f617cc
+Revises: 4a091f9bd28b
+Create Date: 2026-10-17 10:30:00.000000+00:00
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "78ece1f617cc"
+down_revision: Union[str, None] = "4a091f9bd28b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, operation, amount, nonce, owner_id, created_at, updated_at"
+
+# Months past the current one to create partitions for
+MONTHS_AHEAD = 3
+
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc) if value.tzinfo is not None else value
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_partition(month: datetime) -> None:
+    op.execute(
+        f"CREATE TABLE IF NOT EXISTS ledger_entries_p{month:%Y%m} PARTITION OF ledger_entries "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+    )
+
+
+def _ledger_columns():
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('ledger_entries_id_seq'::regclass)"),
+            nullable=False,
+        ),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column("nonce", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        op.f("ix_ledger_entries_operation"),
+        "ledger_entries",
+        ["operation"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_ledger_entries_owner_operation",
+        "ledger_entries",
+        ["owner_id", "operation"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_ledger_entries_owner_id_id",
+        "ledger_entries",
+        ["owner_id", "id"],
+        unique=False,
+    )
+
+
+def _retire_ledger_table() -> None:
+    # Free the table, constraint and index names for the replacement table
+    op.rename_table("ledger_entries", "ledger_entries_old")
+    op.execute(
+        "ALTER TABLE ledger_entries_old "
+        "RENAME CONSTRAINT ledger_entries_pkey TO ledger_entries_old_pkey"
+    )
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_operation")
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_owner_operation")
+    op.execute("DROP INDEX IF EXISTS ix_ledger_entries_owner_id_id")
+
+
+def _replace_ledger_table() -> None:
+    op.execute(
+        f"INSERT INTO ledger_entries ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM ledger_entries_old"
+    )
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE ledger_entries_id_seq OWNED BY ledger_entries.id")
+    op.drop_table("ledger_entries_old")
+    _create_indexes()
+
+
+def upgrade() -> None:
+    _retire_ledger_table()
+    op.create_table(
+        "ledger_entries",
+        *_ledger_columns(),
+        sa.PrimaryKeyConstraint("id", "created_at"),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+
+    # Monthly partitions from the oldest entry to the months ahead
+    now = datetime.now(timezone.utc)
+    oldest = op.get_bind().execute(
+        sa.text("SELECT MIN(created_at) FROM ledger_entries_old")
+    ).scalar()
+    month = _month_start(oldest or now)
+    last = _add_months(_month_start(now), MONTHS_AHEAD)
+    while month <= last:
+        _create_partition(month)
+        month = _add_months(month, 1)
+
+    _replace_ledger_table()
+
+
+def downgrade() -> None:
+    _retire_ledger_table()
+    op.create_table(
+        "ledger_entries",
+        *_ledger_columns(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _replace_ledger_table()
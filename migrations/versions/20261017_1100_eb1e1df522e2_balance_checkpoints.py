@@ -0,0 +1,40 @@
+"""balance checkpoints
+
+Revision ID: eb1e1df522e2
+Revises: 78ece1f617cc
+Create Date: 2026-10-17 11:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "eb1e1df522e2"
+down_revision: Union[str, None] = "78ece1f617cc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the checkpoint job on its first run
+    op.create_table(
+        "balance_checkpoints",
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("entry_id", sa.Integer(), nullable=False),
+        sa.Column("balance", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("balance_checkpoints")
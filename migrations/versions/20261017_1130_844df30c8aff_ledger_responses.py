@@ -0,0 +1,42 @@
+"""ledger responses
+
+Revision ID: 844df30c8aff
+Revises: eb1e1df522e2
+Create Date: 2026-10-17 11:30:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "844df30c8aff"
+down_revision: Union[str, None] = "eb1e1df522e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_responses",
+        sa.Column("nonce", sa.String(), nullable=False),
+        sa.Column("response", sa.JSON(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("nonce"),
+    )
+    op.create_index(
+        op.f("ix_ledger_responses_expires_at"),
+        "ledger_responses",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_ledger_responses_expires_at"), table_name="ledger_responses"
+    )
+    op.drop_table("ledger_responses")
@@ -0,0 +1,117 @@
+"""hashed nonces
+
+Revision ID: b327c435adff
+Revises: 844df30c8aff
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b327c435adff"
+down_revision: Union[str, None] = "844df30c8aff"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace_table(table: str, key: sa.Column, columns, fill: str) -> None:
+    # Rebuilding writes each row once, unlike an UPDATE of every row
+    op.rename_table(table, f"{table}_old")
+    op.execute(
+        f"ALTER TABLE {table}_old RENAME CONSTRAINT {table}_pkey TO {table}_old_pkey"
+    )
+    op.create_table(table, key, *columns, sa.PrimaryKeyConstraint(key.name))
+    op.execute(fill)
+    op.drop_table(f"{table}_old")
+
+
+def _nonce_columns():
+    return [
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    ]
+
+
+def _response_columns():
+    return [
+        sa.Column("response", sa.JSON(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    # Existing nonces are global, whose hash is the MD5 of the bare nonce
+    _replace_table(
+        "ledger_nonces",
+        sa.Column("nonce_hash", sa.LargeBinary(16), nullable=False),
+        _nonce_columns(),
+        """
+        INSERT INTO ledger_nonces (nonce_hash, created_at)
+        SELECT decode(md5(nonce), 'hex'), created_at
+        FROM ledger_nonces_old
+        """,
+    )
+    op.drop_index(
+        op.f("ix_ledger_responses_expires_at"), table_name="ledger_responses"
+    )
+    _replace_table(
+        "ledger_responses",
+        sa.Column("nonce_hash", sa.LargeBinary(16), nullable=False),
+        _response_columns(),
+        """
+        INSERT INTO ledger_responses (nonce_hash, response, expires_at)
+        SELECT decode(md5(nonce), 'hex'), response, expires_at
+        FROM ledger_responses_old
+        """,
+    )
+    op.create_index(
+        op.f("ix_ledger_responses_expires_at"),
+        "ledger_responses",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    # Hashes cannot be reversed, so nonces are recovered from the entries
+    _replace_table(
+        "ledger_nonces",
+        sa.Column("nonce", sa.String(), nullable=False),
+        _nonce_columns(),
+        """
+        INSERT INTO ledger_nonces (nonce, created_at)
+        SELECT nonce, MIN(created_at)
+        FROM ledger_entries
+        GROUP BY nonce
+        """,
+    )
+    op.drop_index(
+        op.f("ix_ledger_responses_expires_at"), table_name="ledger_responses"
+    )
+    _replace_table(
+        "ledger_responses",
+        sa.Column("nonce", sa.String(), nullable=False),
+        _response_columns(),
+        """
+        INSERT INTO ledger_responses (nonce, response, expires_at)
+        SELECT DISTINCT ON (response->'entry'->>'nonce')
+            response->'entry'->>'nonce', response, expires_at
+        FROM ledger_responses_old
+        ORDER BY response->'entry'->>'nonce', expires_at DESC
+        """,
+    )
+    op.create_index(
+        op.f("ix_ledger_responses_expires_at"),
+        "ledger_responses",
+        ["expires_at"],
+        unique=False,
+    )
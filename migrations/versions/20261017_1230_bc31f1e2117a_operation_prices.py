@@ -0,0 +1,40 @@
+"""operation prices
+
+Revision ID: bc31f1e2117a
+Revises: b327c435adff
+Create Date: 2026-10-17 12:30:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bc31f1e2117a"
+down_revision: Union[str, None] = "b327c435adff"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty until prices are overridden; amounts in code apply otherwise
+    op.create_table(
+        "operation_prices",
+        sa.Column("app_id", sa.String(), nullable=False),
+        sa.Column("operation", sa.String(), nullable=False),
+        sa.Column("amount", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("app_id", "operation"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("operation_prices")
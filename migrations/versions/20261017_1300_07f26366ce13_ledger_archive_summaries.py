@@ -0,0 +1,50 @@
+"""ledger archive summaries
+
+Revision ID: 07f26366ce13
+Revises: bc31f1e2117a
+Create Date: 2026-10-17 13:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "07f26366ce13"
+down_revision: Union[str, None] = "bc31f1e2117a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the archive job as entries move into segment files
+    op.create_table(
+        "ledger_archive_summaries",
+        sa.Column("segment", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("entries", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.BigInteger(), nullable=False),
+        sa.Column("first_entry_id", sa.Integer(), nullable=False),
+        sa.Column("last_entry_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("segment", "owner_id"),
+    )
+    op.create_index(
+        op.f("ix_ledger_archive_summaries_owner_id"),
+        "ledger_archive_summaries",
+        ["owner_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_ledger_archive_summaries_owner_id"), table_name="ledger_archive_summaries")
+    op.drop_table("ledger_archive_summaries")
@@ -0,0 +1,51 @@
+"""ledger usage rollups
+
+Revision ID: 5a9e4c2d7b18
+Revises: 07f26366ce13
+Create Date: 2026-10-17 13:30:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9e4c2d7b18"
+down_revision: Union[str, None] = "07f26366ce13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by the rollup job from entries covered by balance checkpoints
+    for table in ("ledger_usage_hourly", "ledger_usage_daily"):
+        op.create_table(
+            table,
+            sa.Column("bucket", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("app_id", sa.String(), nullable=False),
+            sa.Column("operation", sa.String(), nullable=False),
+            sa.Column("entries", sa.BigInteger(), nullable=False),
+            sa.Column("amount", sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint("bucket", "app_id", "operation"),
+        )
+    op.create_table(
+        "ledger_rollup_watermarks",
+        sa.Column("owner_id", sa.String(), nullable=False),
+        sa.Column("entry_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("owner_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ledger_rollup_watermarks")
+    op.drop_table("ledger_usage_daily")
+    op.drop_table("ledger_usage_hourly")
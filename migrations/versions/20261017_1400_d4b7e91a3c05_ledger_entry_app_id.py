@@ -0,0 +1,50 @@
+"""ledger entry app id
+
+Revision ID: d4b7e91a3c05
+Revises: 5a9e4c2d7b18
+Create Date: 2026-10-17 14:00:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4b7e91a3c05"
+down_revision: Union[str, None] = "5a9e4c2d7b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing entries do not record their app and are attributed to the core app
+    op.add_column(
+        "ledger_entries",
+        sa.Column("app_id", sa.String(), server_default="core", nullable=False),
+    )
+    op.create_index(
+        "ix_ledger_entries_app_owner_id",
+        "ledger_entries",
+        ["app_id", "owner_id", "id"],
+        unique=False,
+        postgresql_include=["amount", "created_at"],
+    )
+    op.create_index(
+        "ix_ledger_entries_app_owner_operation",
+        "ledger_entries",
+        ["app_id", "owner_id", "operation"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_ledger_entries_app_owner_operation", table_name="ledger_entries"
+    )
+    op.drop_index(
+        "ix_ledger_entries_app_owner_id", table_name="ledger_entries"
+    )
+    op.drop_column("ledger_entries", "app_id")
@@ -0,0 +1,75 @@
+"""archive summary app id
+
+Revision ID: 9e2c6a4f1d87
+Revises: d4b7e91a3c05
+Create Date: 2026-10-17 14:30:00.000000+00:00
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2c6a4f1d87"
+down_revision: Union[str, None] = "d4b7e91a3c05"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing summaries are attributed to the core app, like the entries
+    # written before app_id existed. Segments archived since then may hold
+    # other apps; `archive summarize` splits their summaries by app.
+    op.add_column(
+        "ledger_archive_summaries",
+        sa.Column("app_id", sa.String(), server_default="core", nullable=False),
+    )
+    op.drop_constraint("ledger_archive_summaries_pkey", "ledger_archive_summaries", type_="primary")
+    op.create_primary_key(
+        "ledger_archive_summaries_pkey",
+        "ledger_archive_summaries",
+        ["segment", "owner_id", "app_id"],
+    )
+
+
+def downgrade() -> None:
+    # Merge each owner's summaries of a segment back into one row
+    op.execute(
+        """
+        UPDATE ledger_archive_summaries AS summary
+        SET entries = merged.entries,
+            amount = merged.amount,
+            first_entry_id = merged.first_entry_id,
+            last_entry_id = merged.last_entry_id,
+            archived_at = merged.archived_at
+        FROM (
+            SELECT segment, owner_id, min(app_id) AS app_id, sum(entries) AS entries,
+                   sum(amount) AS amount, min(first_entry_id) AS first_entry_id,
+                   max(last_entry_id) AS last_entry_id, min(archived_at) AS archived_at
+            FROM ledger_archive_summaries
+            GROUP BY segment, owner_id
+        ) AS merged
+        WHERE summary.segment = merged.segment
+          AND summary.owner_id = merged.owner_id
+          AND summary.app_id = merged.app_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM ledger_archive_summaries AS summary
+        USING ledger_archive_summaries AS kept
+        WHERE summary.segment = kept.segment
+          AND summary.owner_id = kept.owner_id
+          AND summary.app_id > kept.app_id
+        """
+    )
+    op.drop_constraint("ledger_archive_summaries_pkey", "ledger_archive_summaries", type_="primary")
+    op.drop_column("ledger_archive_summaries", "app_id")
+    op.create_primary_key(
+        "ledger_archive_summaries_pkey",
+        "ledger_archive_summaries",
+        ["segment", "owner_id"],
+    )
@@ -13,10 +13,14 @@ setup(
         "asyncpg>=0.29.0",
     ],
     extras_require={
+        "sqlite": [
+            "aiosqlite>=0.19.0",
+        ],
         "test": [
             "pytest>=7.0.0",
             "pytest-asyncio>=0.21.0",
             "httpx>=0.24.0",
+            "aiosqlite>=0.19.0",
         ],
     },
 ) 
\ No newline at end of file
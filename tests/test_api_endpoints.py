@@ -1,3 +1,4 @@
+import json
 import pytest
 from httpx import AsyncClient
 import uuid
@@ -109,4 +110,109 @@ async def test_duplicate_transaction_api(
     # Second request with same nonce should fail
     response2 = await test_client.post("/ledger/entry", json=payload)
     assert response2.status_code == 400
-    assert "already exists" in response2.json()["detail"] 
\ No newline at end of file
+    assert "already exists" in response2.json()["detail"] 
+
+@pytest.mark.asyncio
+async def test_create_ledger_entries_batch(
+    test_client: AsyncClient
+):
+    """Test the batch entry endpoint."""
+    owner_id = "batch_api_user"
+    payload = {
+        "entries": [
+            {
+                "operation": LedgerOperationType.CREDIT_ADD.value,
+                "owner_id": owner_id,
+                "nonce": str(uuid.uuid4())
+            },
+            {
+                "operation": LedgerOperationType.CREDIT_SPEND.value,
+                "owner_id": owner_id,
+                "nonce": str(uuid.uuid4()),
+                "amount": -50
+            }
+        ]
+    }
+    
+    response = await test_client.post("/ledger/entries/batch", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["committed"] is True
+    assert data["results"][0]["balance"] == 10
+    assert "Insufficient credits" in data["results"][1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_get_balances(
+    test_client: AsyncClient
+):
+    """Test the bulk balance endpoint."""
+    owner_id = "bulk_balance_api_user"
+    payload = {
+        "operation": LedgerOperationType.CREDIT_ADD.value,
+        "owner_id": owner_id,
+        "nonce": str(uuid.uuid4())
+    }
+    await test_client.post("/ledger/entry", json=payload)
+    
+    response = await test_client.post(
+        "/ledger/balances",
+        json={"owner_ids": [owner_id, "bulk_balance_api_unknown_user"]}
+    )
+    assert response.status_code == 200
+    balances = response.json()["balances"]
+    assert balances[owner_id]["balance"] == 10
+    assert balances["bulk_balance_api_unknown_user"]["balance"] == 0
+
+@pytest.mark.asyncio
+async def test_list_owner_entries(
+    test_client: AsyncClient
+):
+    """Test paging through an owner's entries with cursors."""
+    owner_id = "history_api_user"
+    for operation in (LedgerOperationType.CREDIT_ADD, LedgerOperationType.DAILY_REWARD, LedgerOperationType.CREDIT_ADD):
+        payload = {
+            "operation": operation.value,
+            "owner_id": owner_id,
+            "nonce": str(uuid.uuid4())
+        }
+        await test_client.post("/ledger/entry", json=payload)
+    
+    first_page = (await test_client.get(f"/ledger/{owner_id}/entries?limit=2")).json()
+    assert [entry["operation"] for entry in first_page["entries"]] == ["CREDIT_ADD", "DAILY_REWARD"]
+    assert first_page["next_cursor"] == first_page["entries"][-1]["id"]
+    
+    second_page = (await test_client.get(
+        f"/ledger/{owner_id}/entries?limit=2&cursor={first_page['next_cursor']}"
+    )).json()
+    assert [entry["operation"] for entry in second_page["entries"]] == ["CREDIT_ADD"]
+    assert second_page["next_cursor"] is None
+    
+    filtered = (await test_client.get(f"/ledger/{owner_id}/entries?operation=DAILY_REWARD")).json()
+    assert [entry["amount"] for entry in filtered["entries"]] == [1]
+
+@pytest.mark.asyncio
+async def test_export_entries(
+    test_client: AsyncClient
+):
+    """Test streaming an owner's entries as NDJSON and CSV."""
+    owner_id = "export_api_user"
+    for _ in range(2):
+        payload = {
+            "operation": LedgerOperationType.CREDIT_ADD.value,
+            "owner_id": owner_id,
+            "nonce": str(uuid.uuid4())
+        }
+        await test_client.post("/ledger/entry", json=payload)
+    
+    response = await test_client.get(f"/ledger/export?owner_id={owner_id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["amount"] for row in rows] == [10, 10]
+    assert rows[0]["id"] < rows[1]["id"]
+    
+    response = await test_client.get(f"/ledger/export?owner_id={owner_id}&format=csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,owner_id,operation,amount,nonce,created_at,updated_at,app_id"
+    assert len(lines) == 3
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+import uuid
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.schemas.ledger import LedgerBalance, LedgerEntryCreate
+from core.shared_ledger.utils.cache import BalanceCache, BalanceCacheListener, balance_cache
+from core.shared_ledger.utils.ledger import get_balance, process_ledger_operation
+
+def test_cache_lru_and_ttl():
+    """Test eviction of least recently used entries, expiry, and counters."""
+    cache = BalanceCache(max_size=2, ttl=60)
+    cache.set("a", LedgerBalance(balance=1))
+    cache.set("b", LedgerBalance(balance=2))
+    assert cache.get("a").balance == 1
+    cache.set("c", LedgerBalance(balance=3))
+
+    assert cache.get("b") is None
+    assert cache.get("c").balance == 3
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 1, 1)
+
+    cache.ttl = -1
+    cache.set("a", LedgerBalance(balance=1))
+    assert cache.get("a") is None
+
+def test_fill_skips_balances_changed_during_the_read():
+    """Test that a balance read before a write or invalidation is not cached."""
+    cache = BalanceCache(max_size=2, ttl=60)
+    generation = cache.generation()
+    cache.set("a", LedgerBalance(balance=10))
+    cache.invalidate("b")
+    assert not cache.fill("a", LedgerBalance(balance=0), generation)
+    assert not cache.fill("b", LedgerBalance(balance=0), generation)
+    assert cache.get("a").balance == 10
+    assert cache.get("b") is None
+
+    # Owners whose change was forgotten are treated as changed
+    cache.invalidate("c")
+    assert not cache.fill("a", LedgerBalance(balance=0), generation)
+    assert cache.fill("c", LedgerBalance(balance=0), cache.generation())
+
+@pytest.mark.asyncio
+async def test_read_racing_invalidation_is_not_cached(
+    test_session: AsyncSession
+):
+    """Test that an invalidation arriving during a balance read keeps the read out of the cache."""
+    owner_id = f"racing_balance_user_{uuid.uuid4().hex[:8]}"
+    balance_cache.invalidate(owner_id)
+    read = asyncio.create_task(get_balance(test_session, owner_id))
+    # Let the read take its generation and wait on the database
+    await asyncio.sleep(0)
+    balance_cache.invalidate(owner_id)
+
+    assert (await read).balance == 0
+    assert balance_cache.get(owner_id) is None
+
+@pytest.mark.asyncio
+async def test_writes_update_cache(
+    test_session: AsyncSession
+):
+    """Test that a committed write refreshes the cached balance."""
+    owner_id = "cached_balance_user"
+    assert (await get_balance(test_session, owner_id)).balance == 0
+
+    entry = LedgerEntryCreate(
+        operation=LedgerOperationType.CREDIT_ADD.value,
+        owner_id=owner_id,
+        nonce=str(uuid.uuid4())
+    )
+    await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+
+    hits = balance_cache.stats.hits
+    assert (await get_balance(test_session, owner_id)).balance == 10
+    assert balance_cache.stats.hits == hits + 1
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_other_workers(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession
+):
+    """Test that a write notifies other workers to drop their cached balance."""
+    owner_id = "invalidated_balance_user"
+    other_worker_cache = BalanceCache()
+    other_worker_cache.set(owner_id, LedgerBalance(balance=0))
+    listener = BalanceCacheListener(test_engine, other_worker_cache)
+    await listener.start()
+    balance_cache.broadcast = True
+    try:
+        entry = LedgerEntryCreate(
+            operation=LedgerOperationType.CREDIT_ADD.value,
+            owner_id=owner_id,
+            nonce=str(uuid.uuid4())
+        )
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+        for _ in range(50):
+            if other_worker_cache.get(owner_id) is None:
+                break
+            await asyncio.sleep(0.01)
+        assert other_worker_cache.get(owner_id) is None
+    finally:
+        balance_cache.broadcast = False
+        await listener.stop()
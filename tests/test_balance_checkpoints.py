@@ -0,0 +1,65 @@
+import pytest
+import uuid
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.shared_ledger.models.balance import BalanceCheckpoint, OwnerBalance
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.checkpoints import advance_balance_checkpoints, get_ledger_balance
+from core.shared_ledger.utils.ledger import process_ledger_operation
+
+async def _write(session: AsyncSession, owner_id: str, operation: LedgerOperationType) -> None:
+    entry = LedgerEntryCreate(
+        operation=operation.value,
+        owner_id=owner_id,
+        nonce=str(uuid.uuid4())
+    )
+    await process_ledger_operation(session, BaseLedgerOperations, entry)
+
+@pytest.mark.asyncio
+async def test_checkpoints_bound_ledger_balance(
+    test_session: AsyncSession
+):
+    """Test that checkpoints advance incrementally and agree with the ledger."""
+    owner_id = "checkpoint_user"
+    await _write(test_session, owner_id, LedgerOperationType.CREDIT_ADD)
+    await _write(test_session, owner_id, LedgerOperationType.CREDIT_SPEND)
+    assert await get_ledger_balance(test_session, owner_id) == 9
+
+    report = await advance_balance_checkpoints(test_session)
+    assert owner_id not in report.drift
+    checkpoint = await test_session.get(BalanceCheckpoint, owner_id)
+    assert checkpoint.balance == 9
+    first_entry_id = checkpoint.entry_id
+
+    await _write(test_session, owner_id, LedgerOperationType.CREDIT_ADD)
+    assert await get_ledger_balance(test_session, owner_id) == 19
+
+    report = await advance_balance_checkpoints(test_session)
+    assert report.entries == 1
+    result = await test_session.execute(
+        select(BalanceCheckpoint.entry_id, BalanceCheckpoint.balance).where(BalanceCheckpoint.owner_id == owner_id)
+    )
+    entry_id, balance = result.one()
+    assert entry_id > first_entry_id
+    assert balance == 19
+    assert await get_ledger_balance(test_session, owner_id) == 19
+
+    report = await advance_balance_checkpoints(test_session)
+    assert report.owners == 0
+
+@pytest.mark.asyncio
+async def test_checkpoints_report_drift(
+    test_session: AsyncSession
+):
+    """Test that a materialized balance disagreeing with the ledger is reported."""
+    owner_id = "drifted_checkpoint_user"
+    await _write(test_session, owner_id, LedgerOperationType.CREDIT_ADD)
+    await test_session.execute(
+        update(OwnerBalance).where(OwnerBalance.owner_id == owner_id).values(balance=7)
+    )
+    await test_session.commit()
+
+    report = await advance_balance_checkpoints(test_session, chunk_size=1)
+    assert report.drift[owner_id] == (7, 10)
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.shared_ledger.config import Settings
+from core.shared_ledger.database import WARMUP_OWNER_ID, create_ledger_engine, engine_options, warm_up_engine
+from core.shared_ledger.models.balance import OwnerBalance
+
+def _settings(**overrides) -> Settings:
+    return Settings(SECRET_KEY="test", **overrides)
+
+def test_engine_options():
+    """Test that pool and prepared statement settings reach the engine."""
+    options = engine_options(_settings(DB_POOL_SIZE=3, DB_STATEMENT_CACHE_SIZE=50))
+    assert options["pool_size"] == 3
+    assert options["connect_args"] == {"prepared_statement_cache_size": 50}
+
+    pgbouncer = engine_options(_settings(DB_PGBOUNCER=True))["connect_args"]
+    assert pgbouncer["prepared_statement_cache_size"] == 0
+    assert pgbouncer["statement_cache_size"] == 0
+    assert pgbouncer["prepared_statement_name_func"]() != pgbouncer["prepared_statement_name_func"]()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pgbouncer", [False, True])
+async def test_warm_up_engine(test_engine: AsyncEngine, pgbouncer: bool):
+    """Test that warmup fills the pool without leaving any rows behind."""
+    engine = create_ledger_engine(_settings(
+        DATABASE_URL=test_engine.url.render_as_string(hide_password=False),
+        DB_POOL_SIZE=3,
+        DB_PGBOUNCER=pgbouncer
+    ))
+    try:
+        await warm_up_engine(engine, 3)
+        assert engine.pool.checkedin() == 3
+
+        async with engine.connect() as conn:
+            warmup_balances = await conn.scalar(
+                select(func.count()).select_from(OwnerBalance).where(OwnerBalance.owner_id == WARMUP_OWNER_ID)
+            )
+        assert warmup_balances == 0
+    finally:
+        await engine.dispose()
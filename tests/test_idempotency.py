@@ -0,0 +1,90 @@
+import pytest
+from datetime import timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType, LedgerWriteMode
+from core.shared_ledger.schemas.ledger import LedgerOperationResponse
+from core.shared_ledger.utils.idempotency import purge_expired_responses, response_cache
+from core.shared_ledger.utils.ledger import (
+    process_ledger_operation,
+    process_ledger_operations_batch,
+    DuplicateTransactionError
+)
+from conftest import make_entry
+
+class ReplayingOperations(BaseLedgerOperations):
+    RESPONSE_RETENTION = timedelta(hours=1)
+
+class SingleStatementReplayingOperations(ReplayingOperations):
+    WRITE_MODE = LedgerWriteMode.SINGLE_STATEMENT
+
+class ExpiringOperations(BaseLedgerOperations):
+    RESPONSE_RETENTION = timedelta(seconds=-1)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("operations", [ReplayingOperations, SingleStatementReplayingOperations])
+async def test_retry_replays_original_result(
+    test_session: AsyncSession,
+    operations
+):
+    """Test that a retried request returns the stored result without writing again."""
+    owner_id = f"replay_user_{operations.WRITE_MODE.value}"
+    entry = make_entry(owner_id, LedgerOperationType.CREDIT_ADD)
+    original = await process_ledger_operation(test_session, operations, entry)
+
+    response_cache.clear()
+    replayed = await process_ledger_operation(test_session, operations, entry)
+    assert replayed == original
+
+    hits = response_cache.stats.hits
+    assert await process_ledger_operation(test_session, operations, entry) == original
+    assert response_cache.stats.hits == hits + 1
+
+    # Only the original write changed the balance
+    later = await process_ledger_operation(test_session, operations, make_entry(owner_id, LedgerOperationType.CREDIT_ADD))
+    assert later.balance == original.balance + 10
+
+    # A different request reusing the nonce is still a duplicate
+    reused = entry.model_copy(update={"operation": LedgerOperationType.DAILY_REWARD.value})
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(test_session, operations, reused)
+
+@pytest.mark.asyncio
+async def test_batch_replays_retried_entries(
+    test_session: AsyncSession
+):
+    """Test that retried entries in a batch are replayed and do not abort an atomic batch."""
+    owner_id = "batch_replay_user"
+    first = make_entry(owner_id, LedgerOperationType.CREDIT_ADD)
+    [original] = await process_ledger_operations_batch(test_session, ReplayingOperations, [first])
+    response_cache.clear()
+
+    second = make_entry(owner_id, LedgerOperationType.CREDIT_ADD)
+    results = await process_ledger_operations_batch(
+        test_session,
+        ReplayingOperations,
+        [first, second],
+        atomic=True
+    )
+    assert results[0] == original
+    assert isinstance(results[1], LedgerOperationResponse)
+    assert results[1].balance == original.balance + 10
+    assert results.committed
+
+    # A batch of retries only replays results and writes nothing
+    replayed = await process_ledger_operations_batch(test_session, ReplayingOperations, [first, second])
+    assert replayed == results
+    assert not replayed.committed
+
+@pytest.mark.asyncio
+async def test_expired_results_are_purged(
+    test_session: AsyncSession
+):
+    """Test that results past their retention are purged and no longer replayed."""
+    entry = make_entry("expired_replay_user", LedgerOperationType.CREDIT_ADD)
+    await process_ledger_operation(test_session, ExpiringOperations, entry)
+    response_cache.clear()
+
+    assert await purge_expired_responses(test_session) >= 1
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(test_session, ExpiringOperations, entry)
@@ -0,0 +1,104 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.shared_ledger.models.archive import LedgerArchiveSummary
+from core.shared_ledger.models.ledger import LedgerEntry
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.archive import (
+    ArchiveSegment,
+    ArchivedEntry,
+    LedgerArchive,
+    archive_ledger_entries,
+    rebuild_archive_summaries,
+    write_segment
+)
+from core.shared_ledger.utils.checkpoints import advance_balance_checkpoints, get_ledger_balance
+from core.shared_ledger.utils.ledger import get_app_balance, process_ledger_operation
+from core.shared_ledger.utils.rollups import advance_usage_rollups
+
+class OtherAppOperations(BaseLedgerOperations):
+    APP_ID = "archive_other_app"
+
+def test_segment_groups_records_by_owner(tmp_path):
+    """Test that a segment reads back each owner's entries and totals."""
+    created_at = datetime(2025, 1, 1, 12, 30, tzinfo=timezone.utc)
+    rows = [
+        ArchivedEntry(1, "bob", "CREDIT_ADD", 10, "n1", created_at, "core"),
+        ArchivedEntry(2, "alice", "CREDIT_ADD", 10, "n2", created_at, "example_app"),
+        ArchivedEntry(3, "bob", "CREDIT_SPEND", -1, "n3", created_at + timedelta(microseconds=5), "example_app"),
+    ]
+    path = str(tmp_path / "segment.lseg")
+    write_segment(path, rows)
+
+    with ArchiveSegment(path) as segment:
+        assert segment.record_count == 3
+        assert segment.owners["bob"].amount == 9
+        assert segment.history("bob") == [rows[0], rows[2]]
+        assert segment.history("bob", since=created_at + timedelta(microseconds=1)) == [rows[2]]
+        assert segment.history("carol") == []
+        assert segment.verify() == {}
+
+@pytest.mark.asyncio
+async def test_archive_moves_checkpointed_entries(
+    test_session: AsyncSession,
+    tmp_path
+):
+    """Test that archiving keeps balances and the history of archived entries."""
+    owner_id = f"archive_user_{uuid.uuid4().hex[:8]}"
+    for operation in (LedgerOperationType.CREDIT_ADD, LedgerOperationType.CREDIT_SPEND):
+        entry = LedgerEntryCreate(operation=operation.value, owner_id=owner_id, nonce=str(uuid.uuid4()))
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+    entry = LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=str(uuid.uuid4()))
+    await process_ledger_operation(test_session, OtherAppOperations, entry)
+    await advance_balance_checkpoints(test_session)
+    await advance_usage_rollups(test_session)
+    result = await test_session.execute(
+        select(LedgerEntry.id, LedgerEntry.amount).where(LedgerEntry.owner_id == owner_id).order_by(LedgerEntry.id)
+    )
+    entries = result.all()
+    await test_session.rollback()
+
+    directory = str(tmp_path / "archive")
+    written = await archive_ledger_entries(
+        test_session,
+        directory,
+        datetime.now(timezone.utc) + timedelta(minutes=1),
+        segment_size=2
+    )
+    assert written
+
+    remaining = await test_session.scalar(select(func.count()).where(LedgerEntry.owner_id == owner_id))
+    assert remaining == 0
+    assert await get_ledger_balance(test_session, owner_id) == 19
+    assert (await get_app_balance(test_session, owner_id, BaseLedgerOperations.APP_ID)).balance == 9
+    assert (await get_app_balance(test_session, owner_id, OtherAppOperations.APP_ID)).balance == 10
+    summaries = select(
+        LedgerArchiveSummary.app_id,
+        func.sum(LedgerArchiveSummary.entries).label("entries"),
+        func.sum(LedgerArchiveSummary.amount).label("amount")
+    ).where(LedgerArchiveSummary.owner_id == owner_id).group_by(LedgerArchiveSummary.app_id)
+    expected = {BaseLedgerOperations.APP_ID: (2, 9), OtherAppOperations.APP_ID: (1, 10)}
+    assert {row.app_id: (row.entries, row.amount) for row in await test_session.execute(summaries)} == expected
+    await test_session.rollback()
+
+    # Summaries recorded before they had an app ID are rebuilt from the segments
+    await test_session.execute(
+        LedgerArchiveSummary.__table__.update()
+        .where(LedgerArchiveSummary.owner_id == owner_id)
+        .values(app_id=func.concat("core_", LedgerArchiveSummary.app_id))
+    )
+    await test_session.commit()
+    assert await rebuild_archive_summaries(test_session, str(tmp_path / "archive")) == len(written)
+    assert {row.app_id: (row.entries, row.amount) for row in await test_session.execute(summaries)} == expected
+    await test_session.rollback()
+
+    with LedgerArchive(directory) as archive:
+        history = archive.history(owner_id)
+        assert [(entry.id, entry.amount) for entry in history] == [tuple(row) for row in entries]
+        assert [entry.app_id for entry in history] == [BaseLedgerOperations.APP_ID] * 2 + [OtherAppOperations.APP_ID]
+        assert archive.owner_total(owner_id) == 19
+        assert archive.verify() == {}
@@ -1,12 +1,25 @@
 import pytest
 import uuid
+from sqlalchemy import select, func, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.models.ledger import LedgerEntry
+from core.shared_ledger.operations.base import (
+    BaseLedgerOperations,
+    LedgerOperationType,
+    LedgerWriteMode,
+    NonceScope
+)
 from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.cache import balance_cache
 from core.shared_ledger.utils.ledger import (
+    get_app_balance,
     get_balance,
+    get_balances,
+    list_entries,
     process_ledger_operation,
+    process_ledger_operations_batch,
+    BatchAbortedError,
     InsufficientCreditsError,
     DuplicateTransactionError
 )
@@ -94,4 +107,223 @@ async def test_invalid_operation(
         nonce=str(uuid.uuid4())
     )
     with pytest.raises(ValueError, match="Invalid operation: INVALID_OPERATION"):
-        await process_ledger_operation(test_session, BaseLedgerOperations, entry) 
\ No newline at end of file
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+
+@pytest.mark.asyncio
+async def test_balance_matches_ledger_history(
+    test_session: AsyncSession
+):
+    """Test that the materialized balance tracks the sum of ledger entries."""
+    owner_id = "materialized_balance_user"
+    for amount in (50, -20, 5):
+        operation = LedgerOperationType.CREDIT_ADD if amount > 0 else LedgerOperationType.CREDIT_SPEND
+        entry = LedgerEntryCreate(
+            operation=operation.value,
+            amount=amount,
+            owner_id=owner_id,
+            nonce=str(uuid.uuid4())
+        )
+        result = await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+    
+    history = await test_session.execute(
+        select(func.sum(LedgerEntry.amount)).where(LedgerEntry.owner_id == owner_id)
+    )
+    balance = await get_balance(test_session, owner_id)
+    assert result.balance == 35
+    assert balance.balance == history.scalar_one() == 35
+
+class SingleStatementOperations(BaseLedgerOperations):
+    """Base operations written with a single statement per entry."""
+    WRITE_MODE = LedgerWriteMode.SINGLE_STATEMENT
+
+@pytest.mark.asyncio
+async def test_single_statement_write(
+    test_session: AsyncSession
+):
+    """Test crediting and debiting through the single statement write path."""
+    owner_id = "single_statement_user"
+    credit = LedgerEntryCreate(
+        operation=LedgerOperationType.CREDIT_ADD.value,
+        owner_id=owner_id,
+        nonce=str(uuid.uuid4())
+    )
+    result = await process_ledger_operation(test_session, SingleStatementOperations, credit)
+    assert result.entry.amount == 10
+    assert result.entry.created_at is not None
+    assert result.balance == 10
+    
+    debit = LedgerEntryCreate(
+        operation=LedgerOperationType.CREDIT_SPEND.value,
+        amount=-4,
+        owner_id=owner_id,
+        nonce=str(uuid.uuid4())
+    )
+    result = await process_ledger_operation(test_session, SingleStatementOperations, debit)
+    assert result.balance == 6
+    assert (await get_balance(test_session, owner_id)).balance == 6
+
+@pytest.mark.asyncio
+async def test_single_statement_errors(
+    test_session: AsyncSession
+):
+    """Test duplicate and insufficient credit handling in single statement mode."""
+    owner_id = "single_statement_errors_user"
+    credit = LedgerEntryCreate(
+        operation=LedgerOperationType.CREDIT_ADD.value,
+        owner_id=owner_id,
+        nonce=str(uuid.uuid4())
+    )
+    await process_ledger_operation(test_session, SingleStatementOperations, credit)
+    
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(test_session, SingleStatementOperations, credit)
+    
+    for debit_owner in (owner_id, "single_statement_unknown_user"):
+        debit = LedgerEntryCreate(
+            operation=LedgerOperationType.CREDIT_SPEND.value,
+            amount=-1000,
+            owner_id=debit_owner,
+            nonce=str(uuid.uuid4())
+        )
+        with pytest.raises(InsufficientCreditsError):
+            await process_ledger_operation(test_session, SingleStatementOperations, debit)
+    
+    assert (await get_balance(test_session, owner_id)).balance == 10
+
+@pytest.mark.asyncio
+async def test_batch_best_effort(
+    test_session: AsyncSession
+):
+    """Test that a best-effort batch writes valid entries and reports failures."""
+    owner_id = "batch_best_effort_user"
+    nonce = str(uuid.uuid4())
+    entries = [
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=nonce),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_SPEND.value, amount=-4, owner_id=owner_id, nonce=str(uuid.uuid4())),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=nonce),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_SPEND.value, amount=-100, owner_id=owner_id, nonce=str(uuid.uuid4())),
+        LedgerEntryCreate(operation="INVALID_OPERATION", owner_id=owner_id, nonce=str(uuid.uuid4())),
+    ]
+    results = await process_ledger_operations_batch(test_session, BaseLedgerOperations, entries)
+    
+    assert [result.balance for result in results[:2]] == [10, 6]
+    assert results[1].entry.amount == -4
+    assert isinstance(results[2], DuplicateTransactionError)
+    assert isinstance(results[3], InsufficientCreditsError)
+    assert isinstance(results[4], ValueError)
+    assert (await get_balance(test_session, owner_id)).balance == 6
+
+@pytest.mark.asyncio
+async def test_batch_atomic(
+    test_session: AsyncSession
+):
+    """Test that an atomic batch writes nothing when one entry fails."""
+    owner_id = "batch_atomic_user"
+    entries = [
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=str(uuid.uuid4())),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_SPEND.value, amount=-100, owner_id=owner_id, nonce=str(uuid.uuid4())),
+    ]
+    results = await process_ledger_operations_batch(test_session, BaseLedgerOperations, entries, atomic=True)
+    
+    assert isinstance(results[0], BatchAbortedError)
+    assert isinstance(results[1], InsufficientCreditsError)
+    assert (await get_balance(test_session, owner_id)).balance == 0
+
+@pytest.mark.asyncio
+async def test_get_balances(
+    test_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch
+):
+    """Test looking up many balances across lookup chunks."""
+    monkeypatch.setattr("core.shared_ledger.utils.ledger.BALANCE_LOOKUP_CHUNK_SIZE", 2)
+    owner_ids = [f"bulk_balance_user_{index}" for index in range(3)]
+    for amount, owner_id in enumerate(owner_ids, start=1):
+        entry = LedgerEntryCreate(
+            operation=LedgerOperationType.CREDIT_ADD.value,
+            amount=amount,
+            owner_id=owner_id,
+            nonce=str(uuid.uuid4())
+        )
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+    balance_cache.clear()
+    
+    balances = await get_balances(test_session, owner_ids + ["bulk_balance_unknown_user"])
+    assert {owner_id: balance.balance for owner_id, balance in balances.items()} == {
+        "bulk_balance_user_0": 1,
+        "bulk_balance_user_1": 2,
+        "bulk_balance_user_2": 3,
+        "bulk_balance_unknown_user": 0,
+    }
+
+class OwnerScopedOperations(BaseLedgerOperations):
+    """Base operations with nonces unique per owner."""
+    APP_ID = "owner_scoped_app"
+    NONCE_SCOPE = NonceScope.OWNER
+
+@pytest.mark.asyncio
+async def test_nonce_hash_matches_database_md5(
+    test_session: AsyncSession
+):
+    """Test that global nonce hashes match the MD5 used to migrate existing nonces."""
+    nonce = f"access_content_owner_{uuid.uuid4()}"
+    result = await test_session.execute(select(func.decode(func.md5(literal(nonce)), "hex")))
+    assert result.scalar_one() == BaseLedgerOperations.nonce_hash("any_owner", nonce)
+    assert len(OwnerScopedOperations.nonce_hash("any_owner", nonce)) == 16
+
+@pytest.mark.asyncio
+async def test_owner_scoped_nonces(
+    test_session: AsyncSession
+):
+    """Test that owner scoped nonces may repeat across owners but not for one owner."""
+    nonce = str(uuid.uuid4())
+    for owner_id in ("scoped_nonce_user_a", "scoped_nonce_user_b"):
+        entry = LedgerEntryCreate(
+            operation=LedgerOperationType.CREDIT_ADD.value,
+            owner_id=owner_id,
+            nonce=nonce
+        )
+        await process_ledger_operation(test_session, OwnerScopedOperations, entry)
+    
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(test_session, OwnerScopedOperations, entry)
+    
+    # The same nonce is still free in the global scope
+    await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+
+class ReportingAppOperations(BaseLedgerOperations):
+    """Base operations written on behalf of a separate app."""
+    APP_ID = "reporting_app"
+
+class SingleStatementAppOperations(SingleStatementOperations):
+    """Single statement operations written on behalf of a separate app."""
+    APP_ID = "single_statement_app"
+
+@pytest.mark.asyncio
+async def test_entries_record_app(
+    test_session: AsyncSession
+):
+    """Test that every write path records the app of the operations class."""
+    owner_id = f"multi_app_user_{uuid.uuid4().hex[:8]}"
+    def credit() -> LedgerEntryCreate:
+        return LedgerEntryCreate(
+            operation=LedgerOperationType.CREDIT_ADD.value,
+            owner_id=owner_id,
+            nonce=str(uuid.uuid4())
+        )
+    await process_ledger_operation(test_session, BaseLedgerOperations, credit())
+    await process_ledger_operation(test_session, SingleStatementAppOperations, credit())
+    await process_ledger_operations_batch(test_session, ReportingAppOperations, [credit(), credit()])
+    
+    result = await test_session.execute(
+        select(LedgerEntry.app_id, func.count()).where(LedgerEntry.owner_id == owner_id).group_by(LedgerEntry.app_id)
+    )
+    assert dict(result.all()) == {"core": 1, "single_statement_app": 1, "reporting_app": 2}
+    await test_session.rollback()
+    
+    entries, _ = await list_entries(test_session, owner_id, app_id=ReportingAppOperations.APP_ID)
+    assert len(entries) == 2 and all(entry.app_id == "reporting_app" for entry in entries)
+    assert (await get_app_balance(test_session, owner_id, ReportingAppOperations.APP_ID)).balance == 20
+    assert (await get_app_balance(test_session, owner_id, "unknown_app")).balance == 0
+    assert (await get_balance(test_session, owner_id)).balance == 40
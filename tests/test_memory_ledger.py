@@ -0,0 +1,134 @@
+import json
+import pytest
+import uuid
+from datetime import timedelta
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from core.shared_ledger.api.router import get_db, router as ledger_router
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.utils.ledger import (
+    DuplicateTransactionError,
+    InsufficientCreditsError,
+    LedgerStore,
+    get_app_balance,
+    get_balance,
+    list_entries,
+    process_ledger_operation,
+    process_ledger_operations_batch
+)
+from core.shared_ledger.utils.memory import MemoryLedger
+from conftest import make_entry
+
+class RetainingOperations(BaseLedgerOperations):
+    RESPONSE_RETENTION = timedelta(hours=1)
+
+@pytest.mark.asyncio
+async def test_memory_ledger_journal_replay(tmp_path):
+    """Test that writes survive a restart and a torn final journal record is dropped."""
+    journal_path = tmp_path / "ledger.journal"
+    ledger = MemoryLedger(str(journal_path))
+    debit = make_entry("memory_user", LedgerOperationType.CREDIT_SPEND, -4)
+    await process_ledger_operation(ledger, RetainingOperations, make_entry("memory_user", LedgerOperationType.CREDIT_ADD, 10))
+    written = await process_ledger_operation(ledger, RetainingOperations, debit)
+    assert written.balance == 6
+    assert await process_ledger_operation(ledger, RetainingOperations, debit) == written
+    with pytest.raises(InsufficientCreditsError):
+        await process_ledger_operation(ledger, RetainingOperations, make_entry("memory_user", LedgerOperationType.CREDIT_SPEND, -7))
+    results = await process_ledger_operations_batch(ledger, RetainingOperations, [
+        make_entry("memory_user", LedgerOperationType.CREDIT_SPEND, -6),
+        make_entry("other_user", LedgerOperationType.CREDIT_SPEND, -1),
+        make_entry("other_user", LedgerOperationType.CREDIT_ADD, 3)
+    ], atomic=False)
+    assert results[0].balance == 0
+    assert isinstance(results[1], InsufficientCreditsError)
+    assert results[2].balance == 3
+    assert results.committed
+    replayed = await process_ledger_operations_batch(ledger, RetainingOperations, [debit])
+    assert replayed == [written] and not replayed.committed
+    ledger.close()
+
+    # Simulate a crash in the middle of an append
+    size = journal_path.stat().st_size
+    with open(journal_path, "ab") as journal:
+        journal.write(b"\x01" * 20)
+
+    restarted = MemoryLedger(str(journal_path))
+    assert journal_path.stat().st_size == size
+    assert len(restarted) == 4
+    assert (await get_balance(restarted, "memory_user")).balance == 0
+    assert (await get_balance(restarted, "other_user")).balance == 3
+    entries, next_cursor = await list_entries(restarted, "memory_user", limit=2)
+    assert [entry.amount for entry in entries] == [-6, -4] and next_cursor == entries[-1].id
+    entries, next_cursor = await list_entries(restarted, "memory_user", cursor=next_cursor, limit=2)
+    assert [entry.amount for entry in entries] == [10] and next_cursor is None
+    assert entries[0].app_id == RetainingOperations.APP_ID
+    assert (await get_app_balance(restarted, "other_user", RetainingOperations.APP_ID)).balance == 3
+    assert (await list_entries(restarted, "other_user", app_id="other_app"))[0] == []
+    with pytest.raises(DuplicateTransactionError):
+        await process_ledger_operation(restarted, BaseLedgerOperations, debit)
+    restarted.close()
+
+@pytest.mark.asyncio
+async def test_memory_ledger_behind_core_router():
+    """Test that the core router serves a memory ledger through its get_db dependency."""
+    ledger = MemoryLedger()
+    app = FastAPI()
+    app.include_router(ledger_router)
+
+    async def override_get_db():
+        yield ledger
+
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        nonce = str(uuid.uuid4())
+        response = await client.post("/ledger/entry", json={
+            "operation": LedgerOperationType.CREDIT_ADD.value,
+            "owner_id": "memory_api_user",
+            "nonce": nonce
+        })
+        assert response.status_code == 200
+        assert response.json()["entry"]["id"] == 1
+        duplicate = await client.post("/ledger/entry", json={
+            "operation": LedgerOperationType.CREDIT_ADD.value,
+            "owner_id": "memory_api_user",
+            "nonce": nonce
+        })
+        assert duplicate.status_code == 400
+
+        balance = await client.get("/ledger/memory_api_user/balance")
+        assert balance.json()["balance"] == response.json()["balance"]
+        page = await client.get("/ledger/memory_api_user/entries")
+        assert [entry["nonce"] for entry in page.json()["entries"]] == [nonce]
+
+        await client.post("/ledger/entry", json={
+            "operation": LedgerOperationType.CREDIT_ADD.value,
+            "owner_id": "other_memory_api_user",
+            "nonce": str(uuid.uuid4())
+        })
+        exported = await client.get("/ledger/export?owner_id=memory_api_user")
+        assert exported.status_code == 200
+        rows = [json.loads(line) for line in exported.text.splitlines()]
+        assert [(row["id"], row["nonce"], row["app_id"]) for row in rows] == [(1, nonce, BaseLedgerOperations.APP_ID)]
+        exported = await client.get("/ledger/export?format=csv")
+        assert len(exported.text.splitlines()) == 3
+
+        stats = await client.get("/ledger/stats?granularity=hour")
+        assert stats.status_code == 200
+        series = stats.json()["series"]
+        assert [(item["app_id"], item["operation"]) for item in series] == [
+            (BaseLedgerOperations.APP_ID, LedgerOperationType.CREDIT_ADD.value)
+        ]
+        points = series[0]["points"]
+        assert (sum(point["entries"] for point in points), sum(point["amount"] for point in points)) == (2, 20)
+        daily = await client.get("/ledger/stats", params={"app_id": "other_app"})
+        assert daily.json()["series"] == []
+
+def test_ledger_store_requires_every_method():
+    """Test that a store missing part of the interface cannot be created."""
+    class PartialStore(LedgerStore):
+        async def get_balance(self, owner_id):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialStore()
@@ -0,0 +1,82 @@
+import pytest
+import uuid
+from httpx import AsyncClient
+
+from core.shared_ledger.operations.base import LedgerOperationType
+from core.shared_ledger.utils.metrics import (
+    Counter,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+    metrics_registry,
+    register_replica_metrics,
+    write_errors_total
+)
+from core.shared_ledger.utils.replicas import ReplicaRouter
+from core.shared_ledger.utils.retry import write_retry_metrics
+
+def test_exposition_format():
+    """Test that counters and histograms render in the Prometheus text format."""
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("writes_total", "Writes.", ("operation",)))
+    histogram = registry.register(Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0)))
+    counter.inc(operation='say "hi"')
+    histogram.observe(0.1, route="/a")
+    histogram.observe(3, route="/a")
+
+    assert registry.render().splitlines() == [
+        "# HELP writes_total Writes.",
+        "# TYPE writes_total counter",
+        'writes_total{operation="say \\"hi\\""} 1',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 1',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 2',
+        'latency_seconds_sum{route="/a"} 3.1',
+        'latency_seconds_count{route="/a"} 2',
+    ]
+    with pytest.raises(ValueError):
+        counter.inc(route="/a")
+    with pytest.raises(TypeError):
+        Metric("untyped", "Metric without samples.")
+
+def test_replica_router_metrics():
+    """Test that registered replica routers report their read routing."""
+    router = ReplicaRouter(primary=None, replicas=[])
+    router.metrics.replica_reads, router.metrics.primary_reads, router.metrics.fallbacks = 5, 2, 1
+    register_replica_metrics(router, name="test_router")
+
+    body = metrics_registry.render()
+    assert 'ledger_replica_reads_total{router="test_router",target="replica"} 5' in body
+    assert 'ledger_replica_reads_total{router="test_router",target="primary"} 2' in body
+    assert 'ledger_replica_fallbacks_total{router="test_router"} 1' in body
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(
+    test_client: AsyncClient
+):
+    """Test that writes, errors, phases, and route latency show up on /metrics."""
+    owner_id = f"metrics_user_{uuid.uuid4()}"
+    rejected = write_errors_total.value(error="InsufficientCreditsError")
+    for operation in (LedgerOperationType.CREDIT_ADD, LedgerOperationType.CREDIT_SPEND):
+        await test_client.post("/ledger/entry", json={
+            "operation": operation.value,
+            "owner_id": owner_id,
+            "amount": -100 if operation == LedgerOperationType.CREDIT_SPEND else None,
+            "nonce": str(uuid.uuid4())
+        })
+    assert write_errors_total.value(error="InsufficientCreditsError") == rejected + 1
+
+    response = await test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'ledger_http_request_duration_seconds_count{method="POST",route="/ledger/entry",status="200"}' in body
+    assert 'ledger_http_request_duration_seconds_count{method="POST",route="/ledger/entry",status="400"}' in body
+    for phase in ("dedup", "balance_check", "post_balance", "insert", "commit"):
+        assert f'ledger_write_phase_duration_seconds_count{{phase="{phase}"}}' in body
+    assert 'ledger_writes_total{app="core",operation="CREDIT_ADD"}' in body
+    assert 'ledger_db_pool_size{pool="primary"}' in body
+    assert 'cause="exhausted"' not in body
+    assert f"ledger_write_retries_exhausted_total {write_retry_metrics.exhausted}" in body
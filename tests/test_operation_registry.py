@@ -0,0 +1,68 @@
+import pytest
+import uuid
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.shared_ledger.models.operation import OperationPrice
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.operations.registry import OperationRegistry, operation_registry
+from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.ledger import process_ledger_operation
+from core.shared_ledger.utils.prices import reload_operation_prices
+
+class PricedOperations(BaseLedgerOperations):
+    APP_ID = "priced_app"
+
+class IncompleteOperations(BaseLedgerOperations):
+    BASE_CONFIG = {LedgerOperationType.CREDIT_ADD.value: 10}
+
+def test_operation_table_is_compiled_once():
+    """Test that the table is built once, read-only, and validated."""
+    registry = OperationRegistry()
+    table = registry.table(PricedOperations)
+    assert registry.table(PricedOperations) is table
+    assert table[LedgerOperationType.CREDIT_ADD.value] == 10
+    with pytest.raises(TypeError):
+        table[LedgerOperationType.CREDIT_ADD.value] = 20
+
+    with pytest.raises(ValueError, match="Missing required operations"):
+        registry.table(IncompleteOperations)
+
+def test_invalid_prices_are_not_applied():
+    """Test that prices are swapped in only when every table still compiles."""
+    registry = OperationRegistry()
+    table = registry.table(PricedOperations)
+    registry.table(BaseLedgerOperations)
+
+    assert registry.set_prices({"priced_app": {LedgerOperationType.CREDIT_ADD.value: 25, "UNKNOWN": 1}})
+    assert registry.version == 1
+    assert registry.table(PricedOperations)[LedgerOperationType.CREDIT_ADD.value] == 25
+    assert "UNKNOWN" not in registry.table(PricedOperations)
+    assert registry.table(BaseLedgerOperations)[LedgerOperationType.CREDIT_ADD.value] == 10
+    assert table[LedgerOperationType.CREDIT_ADD.value] == 10
+
+    assert not registry.set_prices({"priced_app": {LedgerOperationType.CREDIT_ADD.value: 25, "UNKNOWN": 1}})
+    assert registry.version == 1
+
+@pytest.mark.asyncio
+async def test_prices_reload_from_database(
+    test_session: AsyncSession
+):
+    """Test that price changes in the database apply to later writes after a reload."""
+    entry = LedgerEntryCreate(
+        operation=LedgerOperationType.CREDIT_ADD.value,
+        owner_id="priced_user",
+        nonce=str(uuid.uuid4())
+    )
+    test_session.add(OperationPrice(app_id="priced_app", operation=LedgerOperationType.CREDIT_ADD.value, amount=40))
+    await test_session.commit()
+    try:
+        assert await reload_operation_prices(test_session)
+        assert not await reload_operation_prices(test_session)
+        response = await process_ledger_operation(test_session, PricedOperations, entry)
+        assert response.entry.amount == 40
+    finally:
+        await test_session.execute(delete(OperationPrice).where(OperationPrice.app_id == "priced_app"))
+        await test_session.commit()
+        await reload_operation_prices(test_session)
+    assert operation_registry.table(PricedOperations)[LedgerOperationType.CREDIT_ADD.value] == 10
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.utils.cache import balance_cache
+from core.shared_ledger.utils.ledger import (
+    get_balance,
+    process_ledger_operation,
+    InsufficientCreditsError
+)
+from core.shared_ledger.utils.locks import StripedLock, owner_locks
+from conftest import make_entry
+
+class WorkerLocks:
+    """Gives each write its own locks, as if every write ran in another worker."""
+    @asynccontextmanager
+    async def hold(self, *keys: str):
+        yield
+
+async def _concurrent_debits(engine: AsyncEngine, owner_id: str, count: int) -> list:
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    sessions = [session_factory() for _ in range(count)]
+    # Connect up front so the debits overlap instead of waiting on connection setup
+    await asyncio.gather(*(session.connection() for session in sessions))
+
+    async def debit(session: AsyncSession) -> object:
+        try:
+            return await process_ledger_operation(
+                session,
+                BaseLedgerOperations,
+                make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -7)
+            )
+        except InsufficientCreditsError as e:
+            return e
+        finally:
+            await session.close()
+
+    return await asyncio.gather(*(debit(session) for session in sessions))
+
+def test_striped_lock_stripes():
+    """Test that keys map to stable stripes."""
+    locks = StripedLock(stripes=8)
+    assert locks.stripe("owner") == locks.stripe("owner")
+    assert all(0 <= locks.stripe(f"owner_{index}") < 8 for index in range(100))
+
+@pytest.mark.asyncio
+async def test_same_worker_debits_are_serialized(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession
+):
+    """Test that concurrent debits of one owner in one worker queue on the striped lock."""
+    owner_id = "serialized_debit_user"
+    await process_ledger_operation(
+        test_session,
+        BaseLedgerOperations,
+        make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10)
+    )
+    contended = owner_locks.contended
+
+    results = await _concurrent_debits(test_engine, owner_id, 3)
+    assert sum(isinstance(result, InsufficientCreditsError) for result in results) == 2
+    assert owner_locks.contended > contended
+    balance_cache.clear()
+    assert (await get_balance(test_session, owner_id)).balance == 3
+
+@pytest.mark.asyncio
+async def test_cross_worker_debits_are_serialized(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch
+):
+    """Test that the balance row lock stops debits from different workers overdrawing."""
+    monkeypatch.setattr("core.shared_ledger.utils.ledger.owner_locks", WorkerLocks())
+    owner_id = "cross_worker_debit_user"
+    await process_ledger_operation(
+        test_session,
+        BaseLedgerOperations,
+        make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10)
+    )
+
+    transactional_engine = test_engine.execution_options(isolation_level="READ COMMITTED")
+    results = await _concurrent_debits(transactional_engine, owner_id, 3)
+    assert sum(isinstance(result, InsufficientCreditsError) for result in results) == 2
+    balance_cache.clear()
+    assert (await get_balance(test_session, owner_id)).balance == 3
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.shared_ledger.utils.partitions import (
+    add_months,
+    create_partition_sql,
+    detach_ledger_partitions,
+    ensure_ledger_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    PartitionMaintainer
+)
+
+def test_month_arithmetic():
+    """Test month boundaries and partition DDL across a year end."""
+    month = month_start(datetime(2026, 12, 31, 23, 30, tzinfo=timezone.utc))
+    assert month == datetime(2026, 12, 1, tzinfo=timezone.utc)
+    assert add_months(month, 1) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert add_months(month, -12) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert create_partition_sql(month) == (
+        "CREATE TABLE IF NOT EXISTS ledger_entries_p202612 PARTITION OF ledger_entries "
+        "FOR VALUES FROM ('2026-12-01T00:00:00+00:00') TO ('2027-01-01T00:00:00+00:00')"
+    )
+
+@pytest.mark.asyncio
+async def test_ledger_entries_partitioned(
+    test_engine: AsyncEngine
+):
+    """Test that the ledger table is partitioned with the current month ready."""
+    async with test_engine.connect() as conn:
+        assert await is_partitioned(conn)
+        months = [month for _, month in await list_partitions(conn)]
+        assert month_start(datetime.now(timezone.utc)) in months
+        assert await ensure_ledger_partitions(conn) == []
+
+@pytest.mark.asyncio
+async def test_ensure_and_detach_partitions(
+    test_engine: AsyncEngine
+):
+    """Test creating partitions ahead and detaching old ones into the archive schema."""
+    table = "partition_test_entries"
+    async with test_engine.connect() as conn:
+        await conn.execute(text("DROP SCHEMA IF EXISTS partition_test_archive CASCADE"))
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        await conn.execute(text(f"CREATE TABLE {table} (created_at timestamptz NOT NULL) PARTITION BY RANGE (created_at)"))
+        try:
+            now = datetime(2026, 11, 15, tzinfo=timezone.utc)
+            created = await ensure_ledger_partitions(conn, months_ahead=2, now=now, table=table)
+            assert created == [f"{table}_p202611", f"{table}_p202612", f"{table}_p202701"]
+            assert await ensure_ledger_partitions(conn, months_ahead=2, now=now, table=table) == []
+
+            await conn.execute(text(f"INSERT INTO {table} VALUES ('2026-11-20'), ('2026-12-20')"))
+            detached = await detach_ledger_partitions(
+                conn,
+                datetime(2026, 12, 10, tzinfo=timezone.utc),
+                archive_schema="partition_test_archive",
+                table=table
+            )
+            assert detached == [f"{table}_p202611"]
+            assert (await conn.execute(text(f"SELECT count(*) FROM {table}"))).scalar() == 1
+            archived = await conn.execute(text(f"SELECT count(*) FROM partition_test_archive.{table}_p202611"))
+            assert archived.scalar() == 1
+        finally:
+            await conn.execute(text("DROP SCHEMA IF EXISTS partition_test_archive CASCADE"))
+            await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+@pytest.mark.asyncio
+async def test_ensure_app_partitions(
+    test_engine: AsyncEngine
+):
+    """Test list-partitioning new months by app, with a default partition for other apps."""
+    table = "app_partition_test_entries"
+    async with test_engine.connect() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        await conn.execute(text(
+            f"CREATE TABLE {table} (app_id varchar NOT NULL, created_at timestamptz NOT NULL) PARTITION BY RANGE (created_at)"
+        ))
+        try:
+            now = datetime(2026, 11, 15, tzinfo=timezone.utc)
+            created = await ensure_ledger_partitions(conn, months_ahead=1, now=now, table=table, app_ids=["alpha"])
+            assert created == [
+                f"{table}_p202611", f"{table}_p202611_alpha", f"{table}_p202611_default",
+                f"{table}_p202612", f"{table}_p202612_alpha", f"{table}_p202612_default",
+            ]
+            # A newly listed app gets partitions from the next month on
+            created = await ensure_ledger_partitions(conn, months_ahead=1, now=now, table=table, app_ids=["alpha", "beta"])
+            assert created == [f"{table}_p202612_beta"]
+
+            await conn.execute(text(f"INSERT INTO {table} VALUES ('alpha', '2026-11-20'), ('beta', '2026-12-20')"))
+            alpha = await conn.execute(text(f"SELECT count(*) FROM {table}_p202611_alpha"))
+            assert alpha.scalar() == 1
+            beta = await conn.execute(text(f"SELECT count(*) FROM {table}_p202612_beta"))
+            assert beta.scalar() == 1
+            with pytest.raises(ValueError):
+                await ensure_ledger_partitions(conn, now=now, table=table, app_ids=["Bad-App"])
+        finally:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+
+@pytest.mark.asyncio
+async def test_maintainer_creates_partitions_periodically(
+    test_engine: AsyncEngine
+):
+    """Test that the background job keeps creating partitions of upcoming months."""
+    table = "maintained_partition_test_entries"
+    async with test_engine.connect() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        await conn.execute(text(f"CREATE TABLE {table} (created_at timestamptz NOT NULL) PARTITION BY RANGE (created_at)"))
+    maintainer = PartitionMaintainer(test_engine, interval=0.01, months_ahead=1, table=table)
+    try:
+        maintainer.start()
+        for _ in range(100):
+            if maintainer.last_created is not None:
+                break
+            await asyncio.sleep(0.01)
+        await maintainer.stop()
+
+        current = month_start(datetime.now(timezone.utc))
+        async with test_engine.connect() as conn:
+            months = [month for _, month in await list_partitions(conn, table)]
+        assert months == [current, add_months(current, 1)]
+        assert await maintainer.run_once() == []
+    finally:
+        await maintainer.stop()
+        async with test_engine.connect() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
@@ -0,0 +1,67 @@
+import logging
+import pytest
+import uuid
+from fastapi import FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.shared_ledger.api.profiling import QUERY_COUNT_HEADER, QueryProfilingMiddleware
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.utils.ledger import process_ledger_operation
+from core.shared_ledger.utils.profiling import (
+    QueryBudgetExceeded,
+    install_query_profiler,
+    profile_queries,
+    query_budget
+)
+from conftest import make_entry
+
+@pytest.mark.asyncio
+async def test_write_path_query_budget(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession
+):
+    """Test that a credit and a debit stay within their pinned statement counts."""
+    install_query_profiler(test_engine)
+    owner_id = f"query_budget_user_{uuid.uuid4()}"
+
+    # Nonce claim, entry insert, and balance upsert; debits also lock the balance row
+    with query_budget(3):
+        await process_ledger_operation(test_session, BaseLedgerOperations, make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10))
+    with query_budget(4) as debit:
+        await process_ledger_operation(test_session, BaseLedgerOperations, make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -5))
+    assert debit.statements[0][0].lstrip().startswith("INSERT INTO ledger_nonces")
+
+    with pytest.raises(QueryBudgetExceeded, match="2 queries issued, budget is 1"):
+        with query_budget(1):
+            await test_session.execute(text("SELECT 1"))
+            await test_session.execute(text("SELECT 2"))
+
+@pytest.mark.asyncio
+async def test_profiling_middleware(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession,
+    caplog: pytest.LogCaptureFixture
+):
+    """Test that profiled requests get debug headers and over-budget ones are logged."""
+    install_query_profiler(test_engine)
+    app = FastAPI()
+    app.middleware("http")(QueryProfilingMiddleware(debug_headers=True, max_queries=2))
+
+    @app.get("/queries/{count}")
+    async def run_queries(count: int) -> Response:
+        for _ in range(count):
+            await test_session.execute(text("SELECT 1"))
+        return Response()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        with caplog.at_level(logging.WARNING, logger="core.shared_ledger.api.profiling"):
+            within = await client.get("/queries/2")
+            over = await client.get("/queries/3")
+
+    assert within.headers[QUERY_COUNT_HEADER] == "2"
+    assert within.headers["server-timing"].startswith("db;dur=")
+    assert over.headers[QUERY_COUNT_HEADER] == "3"
+    assert len(caplog.records) == 1
+    assert "GET /queries/{count} issued 3 queries" in caplog.records[0].getMessage()
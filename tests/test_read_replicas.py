@@ -0,0 +1,99 @@
+import pytest
+import socket
+import uuid
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from apps.example_app.api.dependencies import get_replica_router
+from apps.example_app.main import app
+from core.shared_ledger.api.router import get_replica_router as core_get_replica_router
+from core.shared_ledger.operations.base import LedgerOperationType
+from core.shared_ledger.utils.cache import balance_cache
+from core.shared_ledger.utils.ledger import get_balance
+from core.shared_ledger.utils.replicas import LSN_HEADER, ReplicaRouter, is_replica_session, parse_lsn
+
+def _router(engine: AsyncEngine) -> ReplicaRouter:
+    # The test database stands in for a replica that is always caught up
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return ReplicaRouter(session_factory, [session_factory], wait_timeout=0.05)
+
+def test_parse_lsn():
+    """Test that LSN tokens compare in WAL order."""
+    assert parse_lsn("16/B374D848") == (0x16 << 32) | 0xB374D848
+    assert parse_lsn("1/0") > parse_lsn("0/FFFFFFFF")
+    with pytest.raises(ValueError):
+        parse_lsn("B374D848")
+
+@pytest.mark.asyncio
+async def test_reads_wait_for_or_fall_back_from_replicas(
+    test_engine: AsyncEngine
+):
+    """Test that reads use a caught-up replica and fall back to the primary otherwise."""
+    replicas = _router(test_engine)
+    async with replicas.primary() as primary:
+        token = await replicas.write_token(primary)
+
+    session = await replicas.read_session(token)
+    assert is_replica_session(session)
+    balance_cache.clear()
+    await get_balance(session, "replica_reader")
+    assert balance_cache.get("replica_reader") is None
+    await session.close()
+
+    session = await replicas.read_session("FFFFFFFF/0")
+    assert not is_replica_session(session)
+    await session.close()
+    assert (replicas.metrics.replica_reads, replicas.metrics.fallbacks) == (1, 1)
+
+@pytest.mark.asyncio
+async def test_unreachable_replica_falls_back_to_primary(
+    test_engine: AsyncEngine
+):
+    """Test that reads go to the primary while their replica refuses connections."""
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port = unused.getsockname()[1]
+    dead_engine = create_async_engine(test_engine.url.set(host="127.0.0.1", port=port))
+    replicas = ReplicaRouter(
+        async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False),
+        [async_sessionmaker(dead_engine, class_=AsyncSession, expire_on_commit=False)]
+    )
+
+    for token in (None, "0/0"):
+        session = await replicas.read_session(token)
+        assert not is_replica_session(session)
+        await get_balance(session, "unreachable_replica_reader")
+        await session.close()
+    assert (replicas.metrics.replica_reads, replicas.metrics.fallbacks) == (0, 2)
+    await dead_engine.dispose()
+
+@pytest.mark.asyncio
+async def test_write_token_round_trip(
+    test_client: AsyncClient,
+    test_engine: AsyncEngine
+):
+    """Test that writes return an LSN token that follow-up reads accept."""
+    replicas = _router(test_engine)
+
+    async def override_get_replica_router() -> ReplicaRouter:
+        return replicas
+
+    app.dependency_overrides[get_replica_router] = override_get_replica_router
+    app.dependency_overrides[core_get_replica_router] = override_get_replica_router
+
+    owner_id = "replica_api_user"
+    response = await test_client.post("/ledger/entry", json={
+        "operation": LedgerOperationType.CREDIT_ADD.value,
+        "owner_id": owner_id,
+        "nonce": str(uuid.uuid4())
+    })
+    assert response.status_code == 200
+    token = response.headers[LSN_HEADER]
+
+    response = await test_client.get(f"/ledger/{owner_id}/balance", headers={LSN_HEADER: token})
+    assert response.status_code == 200
+    assert response.json()["balance"] == 10
+    assert replicas.metrics.replica_reads == 1
+
+    response = await test_client.get(f"/ledger/{owner_id}/balance", headers={LSN_HEADER: "latest"})
+    assert response.status_code == 400
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import timedelta
+from typing import AsyncGenerator
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.shared_ledger.config import Settings
+from core.shared_ledger.database import create_ledger_engine, create_session_factory, warm_up_engine
+from core.shared_ledger.models.ledger import LedgerEntry
+from core.shared_ledger.operations.base import (
+    BaseLedgerOperations,
+    LedgerIsolation,
+    LedgerOperationType,
+    LedgerWriteMode
+)
+from core.shared_ledger.utils.ledger import (
+    DuplicateTransactionError,
+    InsufficientCreditsError,
+    get_balance,
+    process_ledger_operation,
+    process_ledger_operations_batch
+)
+from core.shared_ledger.utils.sqlite import create_sqlite_schema
+from conftest import make_entry
+
+class SingleStatementOperations(BaseLedgerOperations):
+    WRITE_MODE = LedgerWriteMode.SINGLE_STATEMENT
+    RESPONSE_RETENTION = timedelta(hours=1)
+
+class SerializableOperations(BaseLedgerOperations):
+    ISOLATION = LedgerIsolation.SERIALIZABLE
+
+@pytest_asyncio.fixture
+async def sqlite_engine(tmp_path) -> AsyncGenerator[AsyncEngine, None]:
+    """Create an engine for a fresh SQLite database file."""
+    engine = create_ledger_engine(Settings(
+        DATABASE_URL=f"sqlite+aiosqlite:///{tmp_path / 'ledger.db'}",
+        SECRET_KEY="test",
+        DB_POOL_SIZE=5
+    ))
+    async with engine.begin() as conn:
+        await create_sqlite_schema(conn)
+    yield engine
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(sqlite_engine: AsyncEngine):
+    """Test that connections run in WAL mode with the configured pragmas."""
+    async with sqlite_engine.connect() as conn:
+        assert await conn.scalar(text("PRAGMA journal_mode")) == "wal"
+        assert await conn.scalar(text("PRAGMA synchronous")) == 1
+        assert await conn.scalar(text("PRAGMA busy_timeout")) == 5000
+    # Warmup writes and rolls back on each connection
+    await warm_up_engine(sqlite_engine, 3)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("operations", [BaseLedgerOperations, SingleStatementOperations, SerializableOperations])
+async def test_sqlite_ledger_operations(sqlite_engine: AsyncEngine, operations):
+    """Test credits, debits, duplicates, replays, and batches against SQLite."""
+    owner_id = f"sqlite_user_{operations.__name__}"
+    async with create_session_factory(sqlite_engine)() as session:
+        credit = await process_ledger_operation(session, operations, make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10))
+        assert credit.balance == 10
+        assert credit.entry.id > 0
+
+        debit = make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -4)
+        assert (await process_ledger_operation(session, operations, debit)).balance == 6
+        if operations.RESPONSE_RETENTION is not None:
+            replay = await process_ledger_operation(session, operations, debit)
+            assert replay.entry.id > credit.entry.id and replay.balance == 6
+        else:
+            with pytest.raises(DuplicateTransactionError):
+                await process_ledger_operation(session, operations, debit)
+        with pytest.raises(InsufficientCreditsError):
+            await process_ledger_operation(session, operations, make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -7))
+
+        results = await process_ledger_operations_batch(session, operations, [
+            make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 5),
+            make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -20),
+            make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -11)
+        ])
+        assert results[0].balance == 11
+        assert isinstance(results[1], InsufficientCreditsError)
+        assert results[2].balance == 0
+
+        assert (await get_balance(session, owner_id, use_cache=False)).balance == 0
+        assert await session.scalar(
+            select(func.sum(LedgerEntry.amount)).where(LedgerEntry.owner_id == owner_id)
+        ) == 0
+
+@pytest.mark.asyncio
+async def test_sqlite_concurrent_debits(sqlite_engine: AsyncEngine):
+    """Test that concurrent debits over separate connections cannot overdraw."""
+    owner_id = "sqlite_concurrent_user"
+    session_factory = create_session_factory(sqlite_engine)
+    async with session_factory() as session:
+        await process_ledger_operation(session, BaseLedgerOperations, make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10))
+
+    async def debit() -> bool:
+        async with session_factory() as session:
+            try:
+                await process_ledger_operation(session, BaseLedgerOperations, make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -3))
+                return True
+            except InsufficientCreditsError:
+                return False
+
+    results = await asyncio.gather(*(debit() for _ in range(8)))
+    assert results.count(True) == 3
+
+    async with session_factory() as session:
+        assert (await get_balance(session, owner_id, use_cache=False)).balance == 1
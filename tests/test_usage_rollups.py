@@ -0,0 +1,71 @@
+import pytest
+import uuid
+from datetime import datetime, timedelta, timezone
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.checkpoints import advance_balance_checkpoints
+from core.shared_ledger.utils.ledger import process_ledger_operation
+from core.shared_ledger.utils.rollups import advance_usage_rollups
+
+async def _usage(client: AsyncClient, granularity: str) -> dict:
+    now = datetime.now(timezone.utc)
+    response = await client.get(
+        "/ledger/stats",
+        params={
+            "granularity": granularity,
+            "since": (now - timedelta(days=1)).isoformat(),
+            "until": (now + timedelta(days=1)).isoformat(),
+            "app_id": BaseLedgerOperations.APP_ID
+        }
+    )
+    assert response.status_code == 200
+    return {
+        series["operation"]: (sum(point["entries"] for point in series["points"]), sum(point["amount"] for point in series["points"]))
+        for series in response.json()["series"]
+    }
+
+@pytest.mark.asyncio
+async def test_rollups_count_each_entry_once(
+    test_session: AsyncSession,
+    test_client: AsyncClient
+):
+    """Test that the rollup job counts checkpointed entries incrementally and /ledger/stats serves them."""
+    # Count entries left over by other tests first
+    await advance_balance_checkpoints(test_session)
+    await advance_usage_rollups(test_session)
+    before = {granularity: await _usage(test_client, granularity) for granularity in ("hour", "day")}
+
+    owner_id = f"rollup_user_{uuid.uuid4().hex[:8]}"
+    for operation in (LedgerOperationType.CREDIT_ADD, LedgerOperationType.CREDIT_ADD, LedgerOperationType.CREDIT_SPEND):
+        entry = LedgerEntryCreate(operation=operation.value, owner_id=owner_id, nonce=str(uuid.uuid4()))
+        await process_ledger_operation(test_session, BaseLedgerOperations, entry)
+
+    # Entries past the checkpoint are not counted yet
+    report = await advance_usage_rollups(test_session)
+    assert report.entries == 0
+    await advance_balance_checkpoints(test_session)
+    report = await advance_usage_rollups(test_session)
+    assert report.owners == 1
+    assert report.entries == 3
+    report = await advance_usage_rollups(test_session)
+    assert report.entries == 0
+
+    for granularity in ("hour", "day"):
+        after = await _usage(test_client, granularity)
+        for operation, (entries, amount) in ((LedgerOperationType.CREDIT_ADD, (2, 20)), (LedgerOperationType.CREDIT_SPEND, (1, -1))):
+            previous = before[granularity].get(operation.value, (0, 0))
+            assert after[operation.value] == (previous[0] + entries, previous[1] + amount)
+
+@pytest.mark.asyncio
+async def test_stats_reject_empty_range(
+    test_client: AsyncClient
+):
+    """Test that a stats range ending before it starts is rejected."""
+    response = await test_client.get(
+        "/ledger/stats",
+        params={"since": "2025-01-02T00:00:00+00:00", "until": "2025-01-01T00:00:00+00:00"}
+    )
+    assert response.status_code == 400
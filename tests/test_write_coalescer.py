@@ -0,0 +1,101 @@
+import asyncio
+import pytest
+import uuid
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerOperationType
+from core.shared_ledger.schemas.ledger import LedgerEntryCreate
+from core.shared_ledger.utils.coalescer import LedgerWriteCoalescer
+from core.shared_ledger.utils.ledger import (
+    get_balance,
+    InsufficientCreditsError,
+    DuplicateTransactionError
+)
+from core.shared_ledger.utils.metrics import coalesced_batch_size, coalesced_queue_wait_seconds
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_a_batch(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession
+):
+    """Test that concurrent submissions are committed together with per-caller results."""
+    owner_id = "coalesced_user"
+    coalescer = LedgerWriteCoalescer(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        max_batch_size=10,
+        flush_interval=0.05
+    )
+    flushed = coalesced_batch_size.count(app=BaseLedgerOperations.APP_ID)
+    waited = coalesced_queue_wait_seconds.count(app=BaseLedgerOperations.APP_ID)
+    nonce = str(uuid.uuid4())
+    entries = [
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=nonce),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=nonce),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_SPEND.value, amount=-50, owner_id=owner_id, nonce=str(uuid.uuid4())),
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id=owner_id, nonce=str(uuid.uuid4())),
+    ]
+
+    results = await asyncio.gather(
+        *(coalescer.submit(BaseLedgerOperations, entry) for entry in entries),
+        return_exceptions=True
+    )
+
+    assert results[0].balance == 10
+    assert isinstance(results[1], DuplicateTransactionError)
+    assert isinstance(results[2], InsufficientCreditsError)
+    assert results[3].balance == 20
+    assert coalescer.metrics.batches == 1
+    assert coalescer.metrics.max_batch_size == 4
+    assert coalesced_batch_size.count(app=BaseLedgerOperations.APP_ID) == flushed + 1
+    assert coalesced_queue_wait_seconds.count(app=BaseLedgerOperations.APP_ID) == waited + 4
+    assert (await get_balance(test_session, owner_id)).balance == 20
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_immediately(
+    test_engine: AsyncEngine
+):
+    """Test that reaching the batch size flushes without waiting for the interval."""
+    coalescer = LedgerWriteCoalescer(
+        async_sessionmaker(test_engine, expire_on_commit=False),
+        max_batch_size=2,
+        flush_interval=60
+    )
+    entries = [
+        LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id="full_batch_user", nonce=str(uuid.uuid4()))
+        for _ in range(2)
+    ]
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(coalescer.submit(BaseLedgerOperations, entry) for entry in entries)),
+        timeout=5
+    )
+
+    assert [result.balance for result in results] == [10, 20]
+    await coalescer.close()
+
+class _StalledSessionFactory:
+    """Session factory whose sessions never open, so flushes hang until cancelled."""
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        await asyncio.Event().wait()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_fails_pending_writes():
+    """Test that callers of a flush cancelled during shutdown get an error instead of hanging."""
+    coalescer = LedgerWriteCoalescer(_StalledSessionFactory(), max_batch_size=1)
+    entry = LedgerEntryCreate(operation=LedgerOperationType.CREDIT_ADD.value, owner_id="stalled_user", nonce=str(uuid.uuid4()))
+    submitted = asyncio.create_task(coalescer.submit(BaseLedgerOperations, entry))
+    await asyncio.sleep(0.01)
+
+    for task in list(coalescer._tasks):
+        task.cancel()
+    await coalescer.close()
+
+    with pytest.raises(RuntimeError, match="stopped before the batch finished"):
+        await asyncio.wait_for(submitted, timeout=5)
@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from core.shared_ledger.operations.base import BaseLedgerOperations, LedgerIsolation, LedgerOperationType
+from core.shared_ledger.utils import ledger
+from core.shared_ledger.utils.ledger import process_ledger_operation
+from core.shared_ledger.utils.cache import balance_cache
+from core.shared_ledger.utils.retry import RetryMetrics, run_with_retries, write_retry_metrics
+from conftest import make_entry
+
+class SerializableOperations(BaseLedgerOperations):
+    ISOLATION = LedgerIsolation.SERIALIZABLE
+
+class RepeatableReadOperations(BaseLedgerOperations):
+    ISOLATION = LedgerIsolation.REPEATABLE_READ
+
+class SqlStateError(Exception):
+    def __init__(self, sqlstate: str):
+        self.sqlstate = sqlstate
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("operations", [SerializableOperations, RepeatableReadOperations])
+async def test_conflicting_debits_are_retried(
+    test_engine: AsyncEngine,
+    test_session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+    operations
+):
+    """Test that overlapping optimistic debits conflict, retry, and both apply."""
+    owner_id = f"optimistic_debit_user_{operations.ISOLATION.name.lower()}"
+    await process_ledger_operation(test_session, operations, make_entry(owner_id, LedgerOperationType.CREDIT_ADD, 10))
+
+    # Let both first attempts read the balance before either writes
+    read_balance = ledger.get_balance
+    both_read = asyncio.Event()
+    reads = 0
+
+    async def get_balance_together(*args, **kwargs):
+        nonlocal reads
+        balance = await read_balance(*args, **kwargs)
+        reads += 1
+        if reads == 2:
+            both_read.set()
+        if reads <= 2:
+            await both_read.wait()
+        return balance
+
+    monkeypatch.setattr(ledger, "get_balance", get_balance_together)
+    transactional_engine = test_engine.execution_options(isolation_level="READ COMMITTED")
+    session_factory = async_sessionmaker(transactional_engine, class_=AsyncSession, expire_on_commit=False)
+    retries = write_retry_metrics.retries
+
+    async def debit() -> object:
+        async with session_factory() as session:
+            return await process_ledger_operation(session, operations, make_entry(owner_id, LedgerOperationType.CREDIT_SPEND, -3))
+
+    results = await asyncio.gather(debit(), debit())
+    assert sorted(result.balance for result in results) == [4, 7]
+    assert write_retry_metrics.retries > retries
+    balance_cache.clear()
+    assert (await read_balance(test_session, owner_id)).balance == 4
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(
+    test_session: AsyncSession
+):
+    """Test that conflicts are retried up to the attempt limit and other errors are not."""
+    metrics = RetryMetrics()
+    calls = 0
+
+    async def conflict():
+        nonlocal calls
+        calls += 1
+        raise DBAPIError("UPDATE owner_balances", {}, SqlStateError("40P01"))
+
+    with pytest.raises(DBAPIError):
+        await run_with_retries(test_session, "SERIALIZABLE", conflict, max_attempts=3, backoff=0, metrics=metrics)
+    assert calls == 3
+    assert (metrics.retries, metrics.deadlocks, metrics.exhausted) == (2, 3, 1)
+
+    async def fail():
+        raise DBAPIError("UPDATE owner_balances", {}, SqlStateError("23505"))
+
+    with pytest.raises(DBAPIError):
+        await run_with_retries(test_session, "SERIALIZABLE", fail, backoff=0, metrics=metrics)
+    assert metrics.attempts == 4
+
+@pytest.mark.asyncio
+async def test_retries_require_a_fresh_transaction(
+    test_session: AsyncSession
+):
+    """Test that an open transaction is rejected instead of keeping its isolation level."""
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+
+    await test_session.execute(text("SELECT 1"))
+    with pytest.raises(RuntimeError):
+        await run_with_retries(test_session, "SERIALIZABLE", attempt, metrics=RetryMetrics())
+    assert calls == 0
+
+    await test_session.rollback()
+    await run_with_retries(test_session, "SERIALIZABLE", attempt, metrics=RetryMetrics())
+    assert calls == 1